@@ -1,10 +1,10 @@
 # app/__init__.py
 import os
-from flask import Flask, g
+from flask import Flask
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
 from flask_cors import CORS
-from flask import current_app
+from app.db.pool import shared_engine
+from app.db.tx import begin_tx, get_conn, init_request_tx  # noqa: F401  (re-exported for routes and scripts)
 
 def create_app():
     load_dotenv()
@@ -14,7 +14,8 @@ def create_app():
     dsn = os.environ.get("DATABASE_URL")
     if not dsn:
         raise RuntimeError("DATABASE_URL is not set. Put it in your .env")
-    app.config["PG_ENGINE"] = create_engine(dsn, pool_pre_ping=True)
+    # one pool per process, shared with app.db.engine (see app/db/pool.py for DB_POOL_* settings)
+    app.config["PG_ENGINE"] = shared_engine(dsn)
 
     CORS(app, resources={r"/api/*": {"origins": "*"}})
 
@@ -22,12 +23,14 @@ def create_app():
     app.config["JWT_SECRET"] = os.environ.get("JWT_SECRET", "dev-secret-change-me")
     app.config["JWT_EXPIRES_HOURS"] = int(os.environ.get("JWT_EXPIRES_HOURS", "24"))
 
+    # "python" (ScoringKernel/rule engine in the app) or "sql" (score_projects_v1 in Postgres)
+    app.config["SCORING_BACKEND"] = os.environ.get("SCORING_BACKEND", "python")
+
+    # graph.svg renderer: "python" (in-process layout) or "graphviz" (spawns `dot`)
+    app.config["GRAPH_BACKEND"] = os.environ.get("GRAPH_BACKEND", "python")
+
     # ---- Per-request connection management ----
-    @app.teardown_appcontext
-    def _close_request_conn(exc):
-        conn = g.pop("_pg_conn", None)
-        if conn is not None:
-            conn.close()
+    init_request_tx(app)
 
     # ---- Blueprints ----
     from app.routes.projects import projects_bp
@@ -39,6 +42,8 @@ def create_app():
     from app.routes.data_ingestion import ingestion_bp
     from app.routes.report import report_bp
     from app.routes.graph import graphs_bp
+    from app.routes.health import health_bp
+    from app.routes.jobs import jobs_bp
 
     app.register_blueprint(projects_bp, url_prefix="/api")        
     app.register_blueprint(theme_weights_bp, url_prefix="/api")
@@ -49,15 +54,7 @@ def create_app():
     app.register_blueprint(ingestion_bp, url_prefix="/api")
     app.register_blueprint(report_bp, url_prefix="/api")
     app.register_blueprint(graphs_bp, url_prefix="/api")
+    app.register_blueprint(health_bp, url_prefix="/api")
+    app.register_blueprint(jobs_bp, url_prefix="/api")
 
     return app
-
-
-def get_conn():
-    engine = current_app.config["PG_ENGINE"]
-    conn = engine.connect()
-    
-    if conn.in_transaction():
-        conn.rollback()
-        
-    return conn
\ No newline at end of file
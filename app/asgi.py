@@ -0,0 +1,193 @@
+# app/asgi.py
+"""
+ASGI serving mode.
+
+The Flask app's blueprints run unchanged, but every request is dispatched
+inside a greenlet (SQLAlchemy's asyncio bridge) against an async engine.
+Each query the sync view and service code issues through `get_conn()`,
+`SessionLocal` or `PG_ENGINE` is awaited on psycopg3's AsyncConnection
+under the hood. A request that waits on the database therefore yields the
+event loop instead of holding a worker thread, so a few worker processes
+can keep thousands of requests in flight. The number that hold a
+connection at once is still bounded by DB_POOL_SIZE + DB_MAX_OVERFLOW;
+the rest wait on the pool without blocking.
+
+Code reached from a view must never hold a threading.Lock across a query
+or any other wait: the request holding it can only resume on the loop
+thread, which the next request contending for the lock has blocked. Take
+such locks around in-memory work only (see catalogue.current) and await
+thread-pool futures rather than calling .result() (see
+graph_cache.get_or_render).
+
+Limitation: CPU-bound work still runs on the loop thread and holds up
+every other request in the process while it runs. That covers the
+ScoringKernel in /metrics and project creation, `?sync=1` /rescore, and
+WeasyPrint in `?sync=1` report.pdf; only the graph SVG layout leaves the
+loop (graph_cache's render pool). It is not moved to run_in_executor for
+the same reason there are no async twins of the service functions: one
+sync implementation serves both modes, and these calls interleave their
+queries with the computation. Keep the inline paths small and use the
+queued job endpoints, which run in the job worker, for the heavy ones.
+
+Both bodies are streamed: `wsgi.input` pulls ASGI body messages as the
+view reads it, and every chunk the WSGI response yields is sent as its
+own `http.response.body` message (more_body=True), so neither an upload
+nor a large PDF or Arrow response is held in memory whole by this layer.
+
+Run with:  uvicorn asgi:app --workers 4
+"""
+import io
+import os
+import sys
+from typing import Optional
+from flask import Flask
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import await_only, greenlet_spawn
+from app.db.pool import create_pooled_async_engine
+
+
+class AsgiApp:
+    """ASGI callable serving a Flask app's WSGI handler on an async engine."""
+
+    def __init__(self, flask_app: Flask, engine: AsyncEngine):
+        self.flask_app = flask_app
+        self.engine = engine
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await greenlet_spawn(_dispatch, self.flask_app.wsgi_app, _environ(scope, receive), send)
+        else:
+            raise NotImplementedError(f"unsupported ASGI scope type {scope['type']!r}")
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+def create_asgi_app(flask_app: Optional[Flask] = None, engine: Optional[AsyncEngine] = None) -> AsgiApp:
+    """
+    Build the ASGI app. Defaults to `create_app()` and a pooled async engine
+    for DATABASE_URL; the Flask app's PG_ENGINE and the ORM SessionLocal are
+    rebound to that engine's sync facade so existing code picks it up.
+    """
+    if flask_app is None:
+        from app import create_app
+        flask_app = create_app()
+    if engine is None:
+        engine = create_pooled_async_engine(os.environ["DATABASE_URL"])
+    flask_app.config["PG_ENGINE"] = engine.sync_engine
+    try:
+        from app.db.engine import SessionLocal
+        SessionLocal.configure(bind=engine.sync_engine)
+    except RuntimeError:  # DATABASE_URL unset - no ORM session to rebind
+        pass
+    return AsgiApp(flask_app, engine)
+
+
+class _BodyStream(io.RawIOBase):
+    """Request body as a file, awaiting the next ASGI message only when the buffered one runs out."""
+
+    def __init__(self, receive):
+        self._receive = receive
+        self._buf = b""
+        self._done = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        while not self._buf and not self._done:
+            message = await_only(self._receive())  # runs in the request's greenlet
+            if message["type"] == "http.disconnect":
+                self._done = True
+                break
+            self._buf = message.get("body", b"")
+            self._done = not message.get("more_body", False)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+
+def _environ(scope, receive) -> dict:
+    """WSGI environ for an ASGI HTTP scope (PEP 3333 string handling)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf8").decode("latin1"),
+        "PATH_INFO": scope["path"].encode("utf8").decode("latin1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1] or 80),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BufferedReader(_BodyStream(receive)),
+        "wsgi.input_terminated": True,  # reads end at the last body message, with or without Content-Length
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": False,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin1").upper().replace("-", "_")
+        value = raw_value.decode("latin1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            environ["CONTENT_LENGTH"] = value
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _dispatch(wsgi_app, environ, send) -> None:
+    """
+    Run one WSGI request inside the request's greenlet, sending each body
+    chunk as its own ASGI message as the app yields it. Headers go out with
+    the first chunk, so an error raised before any body still gets its own
+    status (PEP 3333).
+    """
+    started = {}
+    sent_headers = False
+
+    def start_response(status, headers, exc_info=None):
+        if exc_info and sent_headers:
+            raise exc_info[1].with_traceback(exc_info[2])
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin1"), v.encode("latin1")) for k, v in headers]
+        return write
+
+    def write(data: bytes) -> None:
+        nonlocal sent_headers
+        if not sent_headers:
+            await_only(send({"type": "http.response.start", "status": started["status"],
+                             "headers": started["headers"]}))
+            sent_headers = True
+        if data:
+            await_only(send({"type": "http.response.body", "body": data, "more_body": True}))
+
+    result = wsgi_app(environ, start_response)
+    try:
+        for chunk in result:
+            if chunk:
+                write(chunk)
+        write(b"")  # an empty body still sends its headers
+    finally:
+        close = getattr(result, "close", None)
+        if close is not None:
+            close()
+    await_only(send({"type": "http.response.body", "body": b"", "more_body": False}))
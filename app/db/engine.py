@@ -1,7 +1,7 @@
 import os
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from .base import Base
+from .pool import shared_engine
 
 # Read DATABASE_URL directly from the environment.
 # Supabase example:
@@ -13,8 +13,8 @@ if not DATABASE_URL:
         "DATABASE_URL is not set. Create a .env with DATABASE_URL and load it before importing engine."
     )
 
-# Create sync engine (psycopg3 driver). pool_pre_ping avoids dead connections.
-engine = create_engine(DATABASE_URL, future=True, pool_pre_ping=True, pool_recycle=1800,)
+# Sync engine (psycopg3 driver), the same pool create_app() uses; see pool.py for DB_POOL_* settings.
+engine = shared_engine(DATABASE_URL)
 
 # Session factory you can import anywhere: `from carbonbalance.db.engine import SessionLocal`
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
@@ -26,4 +26,7 @@ def init_db() -> None:
     """
     # Ensure models are imported before create_all
     from app.models import register_models  # noqa: F401
+    from .upgrades import apply_upgrades
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        apply_upgrades(conn)
@@ -0,0 +1,52 @@
+import re
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+
+try:
+    import psycopg
+except ImportError:  # pragma: no cover - psycopg is the production driver
+    psycopg = None
+
+# statements whose rows SQLAlchemy needs as soon as execute() returns
+_RETURNS_ROWS = re.compile(r"^\s*(SELECT|WITH|VALUES|SHOW)\b|\bRETURNING\b", re.IGNORECASE)
+
+_PIPELINE_KEY = "psycopg_pipeline"
+
+
+@contextmanager
+def pipeline(conn: Connection) -> Iterator[Optional["psycopg.Pipeline"]]:
+    """
+    Run the block in psycopg3 pipeline mode: statements that return no rows
+    (BEGIN/SAVEPOINT, UPDATE, INSERT without RETURNING, ...) are queued and
+    go out together with the next statement whose rows are read, or when the
+    block ends. A chain of N writes then costs one round trip instead of N.
+
+    Inside the block, rowcounts of queued statements are not known (-1) and
+    their errors surface at the next sync. Outside psycopg's sync driver
+    (tests, SQLite, the asyncio driver) this is a no-op.
+    """
+    raw = conn.connection.driver_connection
+    if psycopg is None or not isinstance(raw, psycopg.Connection) or _PIPELINE_KEY in conn.info:
+        yield None
+        return
+    with raw.pipeline() as p:
+        conn.info[_PIPELINE_KEY] = p
+        try:
+            yield p
+        finally:
+            conn.info.pop(_PIPELINE_KEY, None)
+
+
+def _sync_before_rows(conn, cursor, statement, parameters, context, executemany):
+    # SQLAlchemy inspects cursor.description right after this hook; flush the
+    # queue so the result is there.
+    p = conn.info.get(_PIPELINE_KEY) if conn.info else None
+    if p is not None and _RETURNS_ROWS.search(statement):
+        p.sync()
+
+
+def install(engine: Engine) -> None:
+    """Let `pipeline()` blocks on this engine's connections read rows."""
+    event.listen(engine, "after_cursor_execute", _sync_before_rows)
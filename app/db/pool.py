@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, replace
+from typing import TYPE_CHECKING, Dict, Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Connection, Engine, make_url
+from . import pipeline
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Supabase's PgBouncer listens on 6543 in transaction mode: a server connection
+# is only ours for one transaction, so session state and prepared statements
+# must not outlive it.
+TRANSACTION_POOLER_PORT = 6543
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    v = os.environ.get(name)
+    if v is None or v == "":
+        return default
+    return v.strip().lower() in {"1", "true", "t", "yes", "y", "on"}
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    size: int = 5
+    max_overflow: int = 10
+    recycle: int = 1800          # seconds; below Supabase/PgBouncer idle timeouts
+    timeout: float = 30.0        # seconds to wait for a free connection
+    lifo: bool = True            # reuse hot connections, let idle ones age out
+    pre_ping: bool = True
+    transaction_pooling: bool = False
+
+    @classmethod
+    def from_env(cls, dsn: str) -> "PoolSettings":
+        """
+        DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_RECYCLE, DB_POOL_TIMEOUT,
+        DB_POOL_LIFO, DB_POOL_PRE_PING and DB_TRANSACTION_POOLING override the
+        defaults. Transaction pooling defaults to on for port 6543.
+        """
+        d = cls()
+        return cls(
+            size=int(os.environ.get("DB_POOL_SIZE", d.size)),
+            max_overflow=int(os.environ.get("DB_MAX_OVERFLOW", d.max_overflow)),
+            recycle=int(os.environ.get("DB_POOL_RECYCLE", d.recycle)),
+            timeout=float(os.environ.get("DB_POOL_TIMEOUT", d.timeout)),
+            lifo=_env_bool("DB_POOL_LIFO", d.lifo),
+            pre_ping=_env_bool("DB_POOL_PRE_PING", d.pre_ping),
+            transaction_pooling=_env_bool("DB_TRANSACTION_POOLING", is_transaction_pooler(dsn)),
+        )
+
+
+def is_transaction_pooler(dsn: str) -> bool:
+    try:
+        return make_url(dsn).port == TRANSACTION_POOLER_PORT
+    except Exception:
+        return False
+
+
+def engine_kwargs(dsn: str, settings: PoolSettings) -> dict:
+    """create_engine() keyword arguments for `settings` (pool args only for pooling dialects)."""
+    url = make_url(dsn)
+    kwargs: dict = {"future": True, "pool_pre_ping": settings.pre_ping, "pool_recycle": settings.recycle}
+    if url.get_backend_name() == "sqlite":
+        return kwargs
+    kwargs.update(
+        pool_size=settings.size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.timeout,
+        pool_use_lifo=settings.lifo,
+    )
+    if settings.transaction_pooling and url.get_driver_name() == "psycopg":
+        # server-side prepared statements would land on whichever backend PgBouncer picks
+        kwargs["connect_args"] = {"prepare_threshold": None}
+    return kwargs
+
+
+class PoolMetrics:
+    """Counters fed by pool events plus checkout wait times recorded by `connect()`."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _inc(self, name: str) -> None:
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def record_wait(self, seconds: float) -> None:
+        with self._lock:
+            self.waits += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def snapshot(self, engine: Optional[Engine] = None) -> dict:
+        with self._lock:
+            out = {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "wait_avg_ms": round(1000 * self.wait_total / self.waits, 3) if self.waits else 0.0,
+                "wait_max_ms": round(1000 * self.wait_max, 3),
+            }
+        pool = engine.pool if engine is not None else None
+        for attr in ("size", "checkedin", "checkedout", "overflow"):
+            fn = getattr(pool, attr, None)
+            if callable(fn):
+                out[attr] = fn()
+        return out
+
+
+_metrics: "weakref.WeakKeyDictionary[Engine, PoolMetrics]" = weakref.WeakKeyDictionary()
+
+
+def metrics_for(engine: Engine) -> PoolMetrics:
+    m = _metrics.get(engine)
+    if m is None:
+        m = _metrics[engine] = PoolMetrics()
+    return m
+
+
+def _attach_metrics(engine: Engine) -> PoolMetrics:
+    m = metrics_for(engine)
+    event.listen(engine, "connect", lambda *a: m._inc("connects"))
+    event.listen(engine, "checkout", lambda *a: m._inc("checkouts"))
+    event.listen(engine, "checkin", lambda *a: m._inc("checkins"))
+    event.listen(engine, "invalidate", lambda *a: m._inc("invalidations"))
+    return m
+
+
+def create_pooled_engine(dsn: str, settings: Optional[PoolSettings] = None, **overrides) -> Engine:
+    """Build an engine from `settings` (default: from the environment) with pool metrics attached."""
+    settings = settings or PoolSettings.from_env(dsn)
+    if overrides:
+        settings = replace(settings, **overrides)
+    engine = create_engine(dsn, **engine_kwargs(dsn, settings))
+    _attach_metrics(engine)
+    pipeline.install(engine)
+    return engine
+
+
+def create_pooled_async_engine(dsn: str, settings: Optional[PoolSettings] = None, **overrides) -> "AsyncEngine":
+    """
+    Async twin of create_pooled_engine: same settings and metrics, on the
+    dialect's asyncio driver (psycopg3's AsyncConnection for postgresql+psycopg).
+    Metrics are keyed by `engine.sync_engine`.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine  # needs greenlet; only the ASGI mode uses it
+
+    settings = settings or PoolSettings.from_env(dsn)
+    if overrides:
+        settings = replace(settings, **overrides)
+    engine = create_async_engine(dsn, **engine_kwargs(dsn, settings))
+    _attach_metrics(engine.sync_engine)
+    return engine
+
+
+_shared: Dict[str, Engine] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_engine(dsn: str) -> Engine:
+    """The one engine (and pool) per DSN for this process."""
+    with _shared_lock:
+        engine = _shared.get(dsn)
+        if engine is None:
+            engine = _shared[dsn] = create_pooled_engine(dsn)
+        return engine
+
+
+def connect(engine: Engine) -> Connection:
+    """engine.connect(), recording how long the checkout took."""
+    started = time.perf_counter()
+    conn = engine.connect()
+    metrics_for(engine).record_wait(time.perf_counter() - started)
+    return conn
@@ -0,0 +1,106 @@
+# app/db/tx.py
+"""
+Request-scoped unit of work: one pooled connection and one transaction per
+request, shared by every `get_conn()` block in the handler and the
+services it calls. It lives in app.db, not the Flask app package, so
+services open savepoints through the db layer (see `begin_tx`) without
+depending on the web app.
+"""
+from flask import current_app, g, has_request_context, jsonify
+from .pool import connect
+
+
+def init_request_tx(app):
+    """
+    One connection and one transaction per request (see get_conn): committed
+    after 2xx/3xx responses, rolled back for errors, released at teardown.
+    """
+
+    @app.after_request
+    def _finish_request_tx(response):
+        conn = g.get("_pg_conn")
+        if conn is None or not conn.in_transaction():
+            return response
+        if response.status_code >= 400:
+            conn.rollback()
+            return response
+        try:
+            conn.commit()
+        except Exception:
+            current_app.logger.exception("request commit failed")
+            conn.rollback()
+            return jsonify({"error": "server_error"}), 500
+        return response
+
+    @app.teardown_appcontext
+    def _close_request_conn(exc):
+        g.pop("_pg_conn_busy", None)
+        conn = g.pop("_pg_conn", None)
+        if conn is not None:
+            conn.close()  # rolls back anything after_request did not settle (unhandled errors)
+
+
+def begin_tx(conn):
+    """
+    Start a unit of work on `conn`: a root transaction, or a SAVEPOINT when one
+    is already open (always the case inside a request). Committing a savepoint
+    only releases it; the request transaction commits with the response.
+    """
+    return conn.begin() if not conn.in_transaction() else conn.begin_nested()
+
+
+class _ConnLease:
+    """
+    A turn on the request's shared connection. Works like a Connection for
+    `with get_conn() as conn:` blocks and plain attribute access; leaving the
+    block keeps the connection and its transaction for the rest of the request.
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+        self._released = False
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        return self._conn
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        if not self._released:
+            self._released = True
+            g._pg_conn_busy = False
+
+
+def get_conn():
+    """
+    Connection for the current request's unit of work.
+
+    Inside a request every `get_conn()` hands out the same pooled connection
+    (`g._pg_conn`) with one transaction already open; handlers and services
+    open savepoints on it via `begin_tx`. The transaction is committed or
+    rolled back in `after_request`. A `get_conn()` nested inside another
+    still-open one, or one outside a request, gets its own connection.
+    """
+    engine = current_app.config["PG_ENGINE"]
+    if not has_request_context() or g.get("_pg_conn_busy"):
+        return _fresh_conn(engine)
+
+    conn = g.get("_pg_conn")
+    if conn is None or conn.closed or conn.invalidated:
+        conn = g._pg_conn = connect(engine)
+    if not conn.in_transaction():
+        conn.begin()
+    g._pg_conn_busy = True
+    return _ConnLease(conn)
+
+
+def _fresh_conn(engine):
+    conn = connect(engine)
+    if conn.in_transaction():
+        conn.rollback()
+    return conn
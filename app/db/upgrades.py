@@ -0,0 +1,45 @@
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.services import eligibility, pg_scoring, stages
+
+# create_all() only creates missing tables; columns/indexes added to existing
+# tables are brought up to date here. Every statement must be idempotent.
+UPGRADES = [
+    # materialised recommendation eligibility (services/eligibility.py)
+    "ALTER TABLE runtime_scores ADD COLUMN IF NOT EXISTS implemented BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE runtime_scores ADD COLUMN IF NOT EXISTS unmet_prereqs INTEGER NOT NULL DEFAULT 0",
+    "ALTER TABLE runtime_scores ADD COLUMN IF NOT EXISTS mutex_hits INTEGER NOT NULL DEFAULT 0",
+    """ALTER TABLE runtime_scores ADD COLUMN IF NOT EXISTS eligible BOOLEAN NOT NULL
+         GENERATED ALWAYS AS (NOT implemented AND unmet_prereqs = 0 AND mutex_hits = 0) STORED""",
+    """CREATE INDEX IF NOT EXISTS ix_runtime_scores_eligible_ranked
+         ON runtime_scores (project_id, theme_weighted_effectiveness DESC, intervention_id DESC)
+         WHERE eligible""",
+    "CREATE INDEX IF NOT EXISTS ix_runtime_scores_rank ON runtime_scores (project_id, rank) WHERE rank IS NOT NULL",
+    # per-project score version for the in-process top-K cache (services/topk.py)
+    "ALTER TABLE projects ADD COLUMN IF NOT EXISTS score_version BIGINT NOT NULL DEFAULT 0",
+    """CREATE OR REPLACE FUNCTION bump_score_version() RETURNS trigger LANGUAGE plpgsql AS $$
+       BEGIN
+         UPDATE projects p SET score_version = p.score_version + 1
+         WHERE p.id IN (SELECT DISTINCT project_id FROM changed_rows);
+         RETURN NULL;
+       END $$""",
+    "DROP TRIGGER IF EXISTS runtime_scores_version_ins ON runtime_scores",
+    """CREATE TRIGGER runtime_scores_version_ins AFTER INSERT ON runtime_scores
+         REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_score_version()""",
+    "DROP TRIGGER IF EXISTS runtime_scores_version_upd ON runtime_scores",
+    """CREATE TRIGGER runtime_scores_version_upd AFTER UPDATE ON runtime_scores
+         REFERENCING NEW TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_score_version()""",
+    "DROP TRIGGER IF EXISTS runtime_scores_version_del ON runtime_scores",
+    """CREATE TRIGGER runtime_scores_version_del AFTER DELETE ON runtime_scores
+         REFERENCING OLD TABLE AS changed_rows FOR EACH STATEMENT EXECUTE FUNCTION bump_score_version()""",
+]
+
+
+def apply_upgrades(conn: Connection) -> None:
+    """Run every upgrade statement (and install the server-side scoring function), then backfill derived columns."""
+    for stmt in UPGRADES + pg_scoring.install_statements():
+        conn.exec_driver_sql(stmt)
+
+    ids = conn.execute(text("SELECT id FROM projects")).scalars().all()
+    eligibility.refresh(conn, ids)
+    stages.refresh_ranks(conn, ids)
@@ -22,6 +22,10 @@ from .project_access import ProjectAccess
 from .stages import Stage
 from .implemented_intervention import ImplementedIntervention
 from .app_config import Config as AppConfig
+from .reference_version import ReferenceVersion
+
+# Background jobs
+from .job import Job
 
 
 def register_models():
@@ -39,6 +43,8 @@ def register_models():
         Stage,
         ImplementedIntervention,
         AppConfig,
+        ReferenceVersion,
+        Job,
     ]
 
 __all__ = [
@@ -55,5 +61,7 @@ __all__ = [
     "Stage",
     "ImplementedIntervention",
     "AppConfig",
+    "ReferenceVersion",
+    "Job",
     "register_models",
 ]
@@ -0,0 +1,38 @@
+# carbonbalance/models/job.py
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Index, Integer, LargeBinary, String, Text, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+class Job(Base):
+    """Background job (services/jobs.py): queued by a request, claimed by a worker with SKIP LOCKED."""
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)            # handler name: ingest | rescore | report_pdf
+    status: Mapped[str] = mapped_column(String, nullable=False, server_default=text("'queued'"))
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, server_default=text("'{}'::jsonb"))
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("3"))
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(String, nullable=True)
+
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    result_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    result_mimetype: Mapped[str | None] = mapped_column(String, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    created_by: Mapped[str | None] = mapped_column(String, nullable=True)  # JWT sub of the requester
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        # the dequeue scan: oldest runnable job first
+        Index("ix_jobs_queued", "run_after", "id", postgresql_where=text("status = 'queued'")),
+        Index("ix_jobs_running", "locked_at", postgresql_where=text("status = 'running'")),
+    )
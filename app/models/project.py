@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import String, ForeignKey, Numeric, Integer, DateTime
+from sqlalchemy import BigInteger, String, ForeignKey, Numeric, Integer, DateTime, text
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql import func
 from ..db.base import Base
@@ -25,6 +25,9 @@ class Project(Base):
     external_openings_area: Mapped[float | None] = mapped_column(Numeric, nullable=True)
     avg_height_per_level: Mapped[float | None] = mapped_column(Numeric, nullable=True)
 
+    # bumped by a trigger on every runtime_scores write; validates cached top-K (services/topk.py)
+    score_version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+
     # add explicit types
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -0,0 +1,16 @@
+# carbonbalance/models/reference_version.py
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, DateTime, text
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
+from ..db.base import Base
+
+class ReferenceVersion(Base):
+    """Single-row counter bumped whenever reference data (interventions, rules, stages...) changes."""
+    __tablename__ = "reference_version"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default=text("0"))
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
@@ -1,5 +1,5 @@
 # carbonbalance/models/runtime_score.py
-from sqlalchemy import Numeric, ForeignKey, Integer
+from sqlalchemy import Boolean, Computed, Numeric, ForeignKey, Index, Integer, text
 from sqlalchemy.orm import Mapped, mapped_column
 from ..db.base import Base
 
@@ -15,3 +15,25 @@ class RuntimeScore(Base):
     adjusted_base_effectiveness: Mapped[float | None] = mapped_column(Numeric, nullable=True)
     theme_weighted_effectiveness: Mapped[float | None] = mapped_column(Numeric, nullable=True)
     rank: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
+    # Materialised eligibility (see services/eligibility.py). Counters are only
+    # tracked for stage interventions; they stay 0 for everything else.
+    implemented: Mapped[bool] = mapped_column(Boolean, nullable=False, server_default=text("false"))
+    unmet_prereqs: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    mutex_hits: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text("0"))
+    eligible: Mapped[bool] = mapped_column(
+        Boolean, Computed("NOT implemented AND unmet_prereqs = 0 AND mutex_hits = 0", persisted=True)
+    )
+
+    __table_args__ = (
+        # top-N per project is a range scan of this index
+        Index(
+            "ix_runtime_scores_eligible_ranked",
+            "project_id",
+            theme_weighted_effectiveness.desc(),
+            intervention_id.desc(),
+            postgresql_where=text("eligible"),
+        ),
+        # page jumps by position (services/stages.refresh_ranks keeps `rank` current)
+        Index("ix_runtime_scores_rank", "project_id", "rank", postgresql_where=text("rank IS NOT NULL")),
+    )
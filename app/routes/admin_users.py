@@ -7,8 +7,7 @@ from psycopg.errors import UniqueViolation
 import re
 import jwt
 
-from .. import get_conn
-
+from ..db.tx import begin_tx, get_conn
 admin_users_bp = Blueprint("admin_users", __name__)
 pwd_ctx = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -102,7 +101,7 @@ def create_user():
     pw_hash = pwd_ctx.hash(password)
 
     with get_conn() as conn:
-        tx = conn.begin() if not conn.in_transaction() else conn.begin_nested()
+        tx = begin_tx(conn)
         try:
             row = conn.execute(
                 text("""
@@ -6,7 +6,7 @@ from passlib.context import CryptContext
 from werkzeug.security import check_password_hash as wz_check  # <- add
 import jwt
 
-from .. import get_conn
+from ..db.tx import get_conn
 
 # make sure this blueprint ends up under /api so FE hits /api/auth/login
 auth_bp = Blueprint("auth", __name__, url_prefix="/api")  # <- add url_prefix here or when registering
@@ -1,8 +1,10 @@
 # app/routes/building_metrics.py
 from flask import Blueprint, request, jsonify, current_app, g
 from sqlalchemy import text
-from .. import get_conn
-from ..services import rules_metric, stages
+from ..db.tx import begin_tx, get_conn
+from ..db.pipeline import pipeline
+from ..services import catalogue, columnar, eligibility, pg_scoring, rescoring, rules_metric, stages
+from ..services.stages import MAX_PAGE_SIZE
 from ..services.weightings import apply_weights
 import jwt
 
@@ -75,49 +77,63 @@ def send_metrics(project_id: int):
         return {"error": "bad_request", "message": "metrics values must be numbers"}, 400
 
     with get_conn() as conn:
-        tx = conn.begin() if not conn.in_transaction() else conn.begin_nested()
+        tx = None
         try:
-            # write metrics -> recompute -> upsert scores -> apply weights
-            rules_metric.save_project_metrics(conn, project_id, metrics)
-            scores = rules_metric.metric_recompute(conn, project_id)
-            rules_metric.upsert_runtime_scores(conn, project_id, scores)
-
-            # Keep theme_weighted_effectiveness in sync
-            apply_weights(project_id, conn)
-
-            if dry_run:
-                tx.rollback()
-            else:
-                tx.commit()
-
-            try:
-                base_count = conn.execute(text("SELECT COUNT(*) FROM interventions")).scalar_one()
-                rule_count = conn.execute(text("SELECT COUNT(*) FROM metric_effects")).scalar_one()
-                current_app.logger.info(
-                    "metrics recompute: interventions=%s rules=%s updated=%s",
-                    base_count, rule_count, len(scores)
-                )
-            except Exception:
-                pass
-
-            return {"project_id": project_id, "updated": len(scores), "dry_run": dry_run}, 200
+            # Pipelined: BEGIN/SAVEPOINT + metrics upsert + catalogue probe, then the three
+            # project-state reads of the kernel, then every write below - five round trips
+            # (two with SCORING_BACKEND=sql).
+            with pipeline(conn):
+                tx = begin_tx(conn)
+                rules_metric.save_project_metrics(conn, project_id, metrics)
+
+                if current_app.config.get("SCORING_BACKEND") == "sql":
+                    # scores, eligibility, weights and ranks in one server-side call
+                    updated = pg_scoring.score_projects(conn, [project_id])
+                else:
+                    # kernel scores (metrics x implemented dependencies) -> eligibility -> weights and ranks
+                    updated = rescoring.rescore_project(conn, project_id, catalogue.current(conn))
+                    eligibility.refresh(conn, [project_id])
+
+                    # Keep theme_weighted_effectiveness in sync
+                    apply_weights(project_id, conn)
+
+                if dry_run:
+                    tx.rollback()
+                else:
+                    tx.commit()
+
+            current_app.logger.info("metrics recompute: project=%s updated=%s", project_id, updated)
+            return {"project_id": project_id, "updated": updated, "dry_run": dry_run}, 200
 
         except Exception:
-            if tx.is_active:
+            if tx is not None and tx.is_active:
                 tx.rollback()
             current_app.logger.exception("Metrics recompute failed")
             return {"error": "Metrics recompute failed"}, 500
 
-# ---------- Top 3 recommendations ----------
+# ---------- Ranked recommendations (top 3 by default) ----------
+RECOMMENDATION_FIELDS = {"recommendations": ("intervention_id", "name", "theme_weighted_effectiveness")}
+
 @metrics_bp.get("/projects/<int:project_id>/recommendations")
 def get_recommendations(project_id: int):
     """
-    GET /projects/{project_id}/recommendations - top 3 recommendations.
+    GET /projects/{project_id}/recommendations - ranked recommendations, paged.
 
     Auth: Bearer JWT required.
 
+    Query:
+      - limit (int, optional, default 3, max 100) - page size
+      - cursor (str, optional) - "next_cursor" from the previous page
+      - from_rank (int, optional) - start after this rank (jump to a page)
+
+    Encoding:
+      Accept: application/vnd.apache.arrow.stream returns the page as an Arrow
+      IPC stream of parallel arrays ("recommendations.intervention_id",
+      "recommendations.theme_weighted_effectiveness", ..., "next_cursor").
+
     Responses:
-      - 200: {"recommendations": [ { ... }, { ... }, { ... } ]}
+      - 200: {"recommendations": [ { ... }, { ... }, { ... } ], "next_cursor": str | null}
+      - 400: {"error":"bad_request", "message":"..."}
       - 401: {"error":"unauthorized"}
       - 500: {"failed to get recommendations"}
     """
@@ -129,10 +145,29 @@ def get_recommendations(project_id: int):
     g.user_role = payload.get("role")
     g.user_email = payload.get("email")
 
+    cursor = request.args.get("cursor") or None
+    try:
+        limit = int(request.args.get("limit", 3))
+        from_rank = request.args.get("from_rank")
+        from_rank = int(from_rank) if from_rank not in (None, "") else None
+    except ValueError:
+        return {"error": "bad_request", "message": "limit and from_rank must be integers"}, 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return {"error": "bad_request", "message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
+
     with get_conn() as conn:
         try:
-            rows = stages.recommendations(conn, project_id, limit=3)
-            return jsonify({"recommendations": [dict(r) for r in rows]}), 200
+            if cursor is None and from_rank is None:
+                # first page: served from the top-K cache
+                rows, next_cursor = stages.first_page(conn, project_id, limit=limit)
+            else:
+                rows, next_cursor = stages.recommendations_page(
+                    conn, project_id, limit=limit, cursor=cursor, from_rank=from_rank
+                )
+            return columnar.respond({"recommendations": [dict(r) for r in rows], "next_cursor": next_cursor},
+                                    fields=RECOMMENDATION_FIELDS)
+        except ValueError as e:
+            return {"error": "bad_request", "message": str(e)}, 400
         except Exception:
             current_app.logger.exception("failed to get recommendations")
             return {"failed to get recommendations"}, 500
@@ -1,6 +1,6 @@
 # app/routes/costing.py
 from flask import Blueprint, request, current_app
-from .. import get_conn
+from ..db.tx import get_conn
 from ..services import costing
 import jwt  # <-- added
 
@@ -1,6 +1,11 @@
+import os
+import tempfile
 from pathlib import Path
 from flask import Blueprint, jsonify, request, current_app, g
-from ..services.data_ingestion import actions
+from ..db.tx import get_conn
+from ..services.data_ingestion import actions, parallel, readers
+from ..services import jobs, rescoring
+from .jobs import accepted, wants_sync
 import traceback
 import jwt 
 
@@ -27,26 +32,98 @@ def _decode_jwt(token: str):
     except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
         return None
 
+
+def _run_ingest(files, sheet, chunk_rows, workers):
+    if files:
+        return actions.ingest_files(files, sheet=sheet, chunk_rows=chunk_rows, workers=workers)
+    return actions.ingest_workbook(chunk_rows=chunk_rows, workers=workers)
+
+
+def _spool_uploads(uploads):
+    """Save uploads where a job worker can read them; returns [[filename, path], ...]."""
+    saved = []
+    for f in uploads:
+        fd, path = tempfile.mkstemp(prefix="ingest-", suffix=Path(f.filename or "").suffix.lower(),
+                                    dir=jobs.spool_dir())
+        os.close(fd)
+        f.save(path)
+        saved.append([f.filename or "", path])
+    return saved
+
+
+@jobs.handler("ingest")
+def ingest_job(payload):
+    """Job body of POST /ingest: bad input fails at once, anything else is retried."""
+    files = [(name, path) for name, path in payload.get("files") or []]
+    resp, status = _run_ingest(files, payload.get("sheet"),
+                               payload.get("chunk_rows", readers.DEFAULT_CHUNK_ROWS),
+                               min(payload.get("workers") or parallel.default_workers(), os.cpu_count() or 1))
+    if status == 400:
+        raise jobs.PermanentJobError(resp["error"])
+    if status != 200:
+        raise RuntimeError(resp["error"])
+    return {"ok": True, **resp}
+
+
+@jobs.handler("rescore")
+def rescore_job(payload):
+    """Job body of POST /rescore; a retry starts over (scores are overwritten, so that is safe)."""
+    progress = rescoring.rescore_projects(
+        current_app.config["PG_ENGINE"],
+        project_ids=payload.get("project_ids"),
+        after_id=payload.get("after_id", 0),
+        chunk_size=payload.get("chunk_size", rescoring.DEFAULT_CHUNK_SIZE),
+        workers=min(payload.get("workers", 1), os.cpu_count() or 1),
+    )
+    return {"ok": True, "progress": progress.to_dict()}
+
+
 @ingestion_bp.post("/ingest")
 def ingest():
     """
-    POST /ingest - upsert reference data from Excel (Admin only).
+    POST /ingest - upsert reference data from uploaded files or the server workbook (Admin only).
 
     Auth: Bearer JWT with role=Admin.
 
     Description:
-      Reads the configured Excel workbook (themes, interventions, stages,
-      metric_effects, intervention_effects) and upserts records by *name*.
+      Streams each input in chunks (openpyxl read-only mode for XLSX, chunked
+      readers for CSV and Parquet), COPYs every chunk into a staging table and
+      then merges themes, interventions, stages, metric_effects and
+      intervention_effects by *name* in one transaction - either everything
+      lands or nothing does. Memory stays at one chunk however large the file.
 
-    Request: (no body) - uses server-side EXCEL_PATH.
+      Merges are diffs by content hash: only new, changed and removed rows are
+      written, and a sheet that is sent replaces its stages/effects rows
+      (themes and interventions are never deleted). "changes" lists what moved
+      and which projects it can affect - pass "project_ids" to POST /rescore
+      ("all_projects": true means rescore everything). The reference version
+      is only bumped when something changed.
+
+    Request:
+      - multipart/form-data with one or more "file" parts (.xlsx, .csv, .parquet).
+        A CSV/Parquet file holds one sheet, named by the file stem
+        (e.g. metric_effects.csv) or the "sheet" form field.
+      - no files: uses server-side EXCEL_PATH.
+      Query/form (optional): chunk_rows (default 5000); workers - input sheets
+        are parsed and validated in that many processes, then staged and merged
+        in dependency order (default: INGEST_WORKERS or the CPU count in the
+        background job, 1 with sync=1 so a web process only starts a pool on request).
+      Query (optional): sync=1 - run inside the request and answer 200/400/500
+        instead of queueing a background job.
 
     Responses:
-      - 200: {"ok": true, "details": { "themes": {...}, "interventions": {...},
-                                       "stages": {...}, "metric_effects": {...},
-                                       "intervention_effects": {...} }}
+      - 202: {"ok": true, "job_id": int, "status": "queued", "status_url": "/api/jobs/<id>"}
+             (default) - poll the status URL; the finished job's "result" is the 200 body below,
+             and a 400-type failure ends the job as "failed" without retries
+      - 200: (sync=1) {"ok": true, "details": { "<sheet>": {"success": "...", "rows": int, "chunks": int,
+                                                   "seconds": float, "rows_per_second": float}, ... },
+                          "changes": {"inserted": {table: int}, "updated": {...}, "deleted": {...},
+                                      "theme_ids": [...], "intervention_ids": [...],
+                                      "all_projects": bool, "project_ids": [...] | null}}
+      - 400: {"error": "unknown sheet / missing columns / unsupported file type ..."}
       - 401: {"error":"unauthorized"}
       - 403: {"error":"forbidden"}
-      - 500: {"error": "...", "trace": "...", "details": {...}}
+      - 500: {"error": "...", "trace": "..."}
     """
 
     token = _get_bearer_token()
@@ -57,40 +134,117 @@ def ingest():
         return jsonify({"error": "forbidden"}), 403
     g.user_id = payload.get("sub")
 
-    results = {}
     try:
-        resp, status = actions.upsert_themes_by_name()
-        results["themes"] = resp
-        if status != 200: return jsonify(results), status
-
-        resp, status = actions.upsert_interventions_by_name()
-        results["interventions"] = resp
-        if status != 200: return jsonify(results), status
-
-        resp, status = actions.upsert_stages_by_names()
-        results["stages"] = resp
-        if status != 200: return jsonify(results), status
-
-        resp, status = actions.upsert_effects_by_names(
-            sheet="metric_effects",
-            id_key_cause="cause",
-            id_key_effect="effected_intervention",
-        )
-        results["metric_effects"] = resp
-        if status != 200: return jsonify(results), status
+        chunk_rows = int(request.values.get("chunk_rows", readers.DEFAULT_CHUNK_ROWS))
+        workers = int(request.values["workers"]) if request.values.get("workers") else None
+    except ValueError:
+        return jsonify({"error": "chunk_rows and workers must be ints"}), 400
+    if chunk_rows <= 0 or (workers is not None and workers <= 0):
+        return jsonify({"error": "chunk_rows and workers must be positive"}), 400
+    if workers is not None:
+        workers = min(workers, os.cpu_count() or 1)
 
-        resp, status = actions.upsert_effects_by_names(
-            sheet="intervention_effects",
-            id_key_cause="cause_intervention",
-            id_key_effect="effected_intervention",
-        )
-        results["intervention_effects"] = resp
-        if status != 200: return jsonify(results), status
+    uploads = request.files.getlist("file")
+    sheet = request.form.get("sheet")
+    try:
+        if wants_sync():
+            files = [(f.filename or "", f.stream) for f in uploads]
+            resp, status = _run_ingest(files, sheet, chunk_rows, workers or 1)
+            if status != 200:
+                return jsonify(resp), status
+            return jsonify({"ok": True, **resp}), 200
 
-        return jsonify({"ok": True, "details": results}), 200
+        for f in uploads:
+            readers.file_kind(f.filename or "")
+        saved = _spool_uploads(uploads)
+        with get_conn() as conn:
+            job_id = jobs.enqueue(conn, "ingest", {
+                "files": saved, "sheet": sheet, "chunk_rows": chunk_rows, "workers": workers,
+                "cleanup": [path for _, path in saved],
+            }, created_by=g.user_id)
+        return accepted(job_id)
 
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        return jsonify({"error": str(e), "trace": traceback.format_exc(), "details": results}), 500
+        return jsonify({"error": str(e), "trace": traceback.format_exc()}), 500
+
+
+@ingestion_bp.post("/rescore")
+def rescore():
+    """
+    POST /rescore - recompute runtime scores for all (or selected) projects (Admin only).
+
+    Auth: Bearer JWT with role=Admin.
+
+    Description:
+      Re-scores projects against the current reference data, in project-id
+      order and in chunks committed one at a time. Run after /ingest so
+      existing projects stop showing stale scores. If the request fails part
+      way, resend it with "after_id" set to the last reported
+      "last_project_id" to resume.
+
+    Request JSON (all optional):
+      { "project_ids": [1, 2, ...], "after_id": 0, "chunk_size": 500, "workers": 1 }
+      "workers" > 1 shards chunks across that many processes (capped at the CPU count).
+    Query (optional): sync=1 - run inside the request instead of queueing a background job.
+
+    Responses:
+      - 202: {"ok": true, "job_id": int, "status": "queued", "status_url": "/api/jobs/<id>"}
+             (default) - the finished job's "result" is the 200 body below
+      - 200: (sync=1) {"ok": true, "progress": {"total": int, "processed": int, "rows_written": int,
+                                       "chunks": int, "last_project_id": int, "catalogue_version": int,
+                                       "elapsed_seconds": float, "projects_per_minute": float}}
+      - 400: {"error": "..."}
+      - 401: {"error":"unauthorized"}
+      - 403: {"error":"forbidden"}
+      - 500: (sync=1) {"error": "rescore_failed", "progress": {...}}
+    """
+
+    token = _get_bearer_token()
+    payload = _decode_jwt(token)
+    if not payload:
+        return jsonify({"error": "unauthorized"}), 401
+    if payload.get("role") != "Admin":
+        return jsonify({"error": "forbidden"}), 403
+    g.user_id = payload.get("sub")
+
+    body = request.get_json(silent=True) or {}
+    project_ids = body.get("project_ids")
+    try:
+        after_id = int(body.get("after_id", 0))
+        chunk_size = int(body.get("chunk_size", rescoring.DEFAULT_CHUNK_SIZE))
+        workers = int(body.get("workers", 1))
+        if project_ids is not None:
+            if not isinstance(project_ids, list):
+                raise ValueError
+            project_ids = [int(p) for p in project_ids]
+    except (TypeError, ValueError):
+        return jsonify({"error": "project_ids must be a list of ints; after_id, chunk_size and workers must be ints"}), 400
+    if chunk_size <= 0 or workers <= 0:
+        return jsonify({"error": "chunk_size and workers must be positive"}), 400
+
+    if not wants_sync():
+        with get_conn() as conn:
+            job_id = jobs.enqueue(conn, "rescore", {
+                "project_ids": project_ids, "after_id": after_id, "chunk_size": chunk_size, "workers": workers,
+            }, created_by=g.user_id)
+        return accepted(job_id)
+
+    last = {}
+    try:
+        progress = rescoring.rescore_projects(
+            current_app.config["PG_ENGINE"],
+            project_ids=project_ids,
+            after_id=after_id,
+            chunk_size=chunk_size,
+            on_progress=lambda p: last.update(p.to_dict()),
+            workers=min(workers, os.cpu_count() or 1),
+        )
+        return jsonify({"ok": True, "progress": progress.to_dict()}), 200
+    except Exception:
+        current_app.logger.exception("rescore failed")
+        return jsonify({"error": "rescore_failed", "progress": last}), 500
 
 
 @ingestion_bp.delete("/clear_db")
@@ -1,57 +1,32 @@
-from flask import Blueprint, jsonify, request
+import hashlib
+import logging
+from concurrent.futures import TimeoutError as RenderTimeout
+from flask import Blueprint, current_app, jsonify, request
 from sqlalchemy import text
-from app import get_conn 
+from app.db.tx import get_conn
+from app.services import columnar, graph_cache, graph_layout
+from app.services.graph import GraphParams, load_graph
 from graphviz import Digraph
 from flask import Response
 
 
 graphs_bp = Blueprint("graphs", __name__)
+log = logging.getLogger(__name__)
 
-GRAPH_SQL = text("""
-    WITH nodes AS (
-      SELECT rs.intervention_id, rs.theme_weighted_effectiveness AS score
-      FROM runtime_scores rs
-      WHERE rs.project_id = :project_id
-      ORDER BY rs.theme_weighted_effectiveness DESC
-      LIMIT :top_n
-    ),
-    edges AS (
-      SELECT
-        ie.cause_intervention    AS src,
-        ie.effected_intervention AS dst,
-        ie.multiplier,
-        CASE
-          WHEN ie.multiplier > 1 THEN 1
-          WHEN ie.multiplier < 1 THEN -1
-          ELSE 0
-        END AS sign,
-        ABS(ie.multiplier - 1)   AS strength
-      FROM intervention_effects ie
-      JOIN nodes n1 ON n1.intervention_id = ie.cause_intervention
-      JOIN nodes n2 ON n2.intervention_id = ie.effected_intervention
-      WHERE ABS(ie.multiplier - 1) >= :epsilon
-    )
+# what a graph can depend on: the project's scores (score_version, bumped by a
+# trigger on every runtime_scores write) and the reference data (edges, labels)
+VERSIONS_SQL = text("""
     SELECT
-      (
-        SELECT json_agg(json_build_object(
-          'id', n.intervention_id,
-          'label', COALESCE(i.name, n.intervention_id::text),
-          'score', n.score
-        ))
-        FROM nodes n
-        LEFT JOIN interventions i ON i.id = n.intervention_id
-      ) AS nodes,
-      (
-        SELECT json_agg(json_build_object(
-          'src', e.src,
-          'dst', e.dst,
-          'weight', e.sign * e.strength,
-          'multiplier', e.multiplier
-        ))
-        FROM edges e
-      ) AS edges;
+      (SELECT score_version FROM projects WHERE id = :project_id) AS score_version,
+      (SELECT version FROM reference_version WHERE id = 1)        AS reference_version
 """)
 
+# column order of the Arrow encoding (services/columnar.py), also for empty graphs
+GRAPH_FIELDS = {"nodes": ("id", "label", "score"), "edges": ("src", "dst", "weight", "multiplier")}
+
+# bump when either renderer draws differently, to retire cached SVGs and ETags
+SVG_STYLE = "1"
+
 @graphs_bp.get("/projects/<int:project_id>/graph")
 def project_graph(project_id: int):
     """
@@ -59,48 +34,48 @@ def project_graph(project_id: int):
 
     Description:
       Returns the top-N interventions (by theme_weighted_effectiveness) and the
-      edges between them derived from intervention_effects.
-
-    Params (fixed defaults):
-      - top_n = 30
-      - epsilon = 0.05
+      edges between them derived from intervention_effects. Edges come from the
+      in-memory adjacency index (services/edge_index.py, rebuilt with the
+      catalogue), pruned by strength |multiplier - 1| >= epsilon.
+
+    Query (all optional):
+      - top_n (int, 1-500, default 30)
+      - epsilon (float >= 0, default 0.05)
+      - theme_ids (comma-separated ints): only interventions of these themes
+      - focus (intervention id): only interventions within `depth` hops of it
+        (edges of strength >= epsilon, either direction); focus is always included
+      - depth (int, 0-4, default 1): used with focus
+
+    Encoding:
+      Accept: application/vnd.apache.arrow.stream returns the same payload as
+      an Arrow IPC stream of parallel arrays ("nodes.id", "nodes.score",
+      "edges.src", "edges.dst", "edges.weight", ...; see services/columnar.py).
 
     Responses:
-      - 200: {"project_id": <int>, "params": {"top_n": 30, "epsilon": 0.05},
-              "nodes": [{"id": <int>, "label": <str>, "score": <float>}, ...],
+      - 200: {"project_id": <int>,
+              "params": {"top_n": 30, "epsilon": 0.05, "theme_ids": [], "focus": null, "depth": null},
+              "nodes": [{"id": <int>, "label": <str>, "score": <float|null>}, ...],
               "edges": [{"src": <int>, "dst": <int>, "weight": <float>, "multiplier": <float>}, ...]}
-      - 400: {"error": "Invalid top_n or epsilon"}
+      - 400: {"error": "top_n must be between 1 and 500" | "unknown focus intervention 7" | ...}
     """
 
     try:
-        top_n = 30
-        epsilon = 0.05
-    except ValueError:
-        return jsonify({"error": "Invalid top_n or epsilon"}), 400
-
-    with get_conn() as conn:
-        row = conn.execute(GRAPH_SQL, {
-            "project_id": project_id,
-            "top_n": top_n,
-            "epsilon": epsilon
-        }).mappings().one_or_none()
+        params = GraphParams.from_args(request.args)
+        with get_conn() as conn:
+            nodes, edges = load_graph(conn, project_id, params)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if row is None:
-        return jsonify({"project_id": project_id, "params": {"top_n": top_n, "epsilon": epsilon}, "nodes": [], "edges": []}), 200
-
-    nodes = row["nodes"] or []
-    edges = row["edges"] or []
-
-    return jsonify({
+    return columnar.respond({
         "project_id": project_id,
-        "params": {"top_n": top_n, "epsilon": epsilon},
+        "params": params.to_dict(),
         "nodes": nodes,
         "edges": edges
-    }), 200
+    }, fields=GRAPH_FIELDS)
 
 
 
-def _svg_from_nodes_edges(nodes, edges, title="Intervention Graph"):
+def _svg_from_nodes_edges(nodes, edges, title="Intervention Graph", backend="python"):
     """
     Build an SVG for the intervention graph.
 
@@ -108,10 +83,22 @@ def _svg_from_nodes_edges(nodes, edges, title="Intervention Graph"):
       - nodes: [{"id": int, "label": str, "score": float}, ...]
       - edges: [{"src": int, "dst": int, "weight": float, "multiplier": float}, ...]
       - title: diagram title
+      - backend: "python" (in-process layout, services/graph_layout.py) or
+        "graphviz" (runs the external `dot` binary)
 
     Returns:
       - bytes: SVG payload
     """
+    if backend == "graphviz":
+        return _graphviz_svg(nodes, edges, title)
+    try:
+        return graph_layout.render_svg(nodes, edges, title)
+    except Exception:
+        log.exception("in-process graph layout failed; falling back to Graphviz")
+        return _graphviz_svg(nodes, edges, title)
+
+
+def _graphviz_svg(nodes, edges, title):
     g = Digraph("G", format="svg")
     g.attr(rankdir="LR", labelloc="t", label=title, fontsize="18", fontname="Inter")
     g.attr("graph", bgcolor="white", margin="0.2")
@@ -150,22 +137,71 @@ def _svg_from_nodes_edges(nodes, edges, title="Intervention Graph"):
     return g.pipe()
 
 
+def _svg_style():
+    return f"{SVG_STYLE}:{current_app.config.get('GRAPH_BACKEND', 'python')}"
+
+
+def render_svg(project_id, nodes, edges, timeout=None):
+    """
+    SVG bytes of a loaded graph (see load_graph), through the render cache.
+    Used by graph.svg and by the PDF report, which inlines it rather than
+    fetching graph.svg over HTTP. Raises concurrent.futures.TimeoutError
+    if the render outlasts `timeout`.
+    """
+    backend = current_app.config.get("GRAPH_BACKEND", "python")
+    title = f"Project {project_id}"
+    key = graph_cache.content_key(nodes, edges, title, style=_svg_style())
+    return graph_cache.get_or_render(key, lambda: _svg_from_nodes_edges(nodes, edges, title, backend),
+                                     timeout=timeout)
+
+
 @graphs_bp.get("/projects/<int:project_id>/graph.svg")
 def project_graph_svg(project_id: int):
     """
     GET /projects/{project_id}/graph.svg - graph as SVG.
 
     Query:
-      - top_n (int, optional, default 30)
-      - epsilon is fixed at 0.05 in this endpoint.
+      - top_n, epsilon, theme_ids, focus, depth - as GET /projects/{project_id}/graph
+
+    Rendering:
+      GRAPH_BACKEND picks the renderer: "python" (default; in-process layered
+      layout) or "graphviz" (the external `dot` binary).
+
+    Caching:
+      The ETag covers the project's score version, the reference-data version
+      and the query parameters, so If-None-Match answers 304 after one small query. Rendered
+      SVGs are cached on disk by their drawn content (services/graph_cache.py)
+      and Graphviz runs on a bounded pool.
 
     Responses:
-      - 200: SVG diagram
+      - 200: SVG diagram (ETag, Cache-Control: no-cache)
+      - 304: unchanged since the client's ETag
+      - 400: {"error": "..."} - bad query parameters
+      - 503: {"error": "graph render timed out"} - the render continues; retry after Retry-After
     """
-    top_n = int(request.args.get("top_n", 30))
-    epsilon = 0.05
+    try:
+        params = GraphParams.from_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    style = _svg_style()
     with get_conn() as conn:
-        row = conn.execute(GRAPH_SQL, {"project_id": project_id, "top_n": top_n, "epsilon": epsilon}).mappings().one_or_none()
-    nodes, edges = (row["nodes"] or []), (row["edges"] or [])
-    svg_bytes = _svg_from_nodes_edges(nodes, edges, title=f"Project {project_id}")
-    return Response(svg_bytes, mimetype="image/svg+xml")
\ No newline at end of file
+        versions = conn.execute(VERSIONS_SQL, {"project_id": project_id}).mappings().one()
+        etag = hashlib.sha1(
+            f"{project_id}:{versions['score_version']}:{versions['reference_version']}:"
+            f"{params.cache_key()}:{style}".encode()
+        ).hexdigest()
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers={"ETag": f'"{etag}"', "Cache-Control": "no-cache"})
+
+        try:
+            nodes, edges = load_graph(conn, project_id, params)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+    try:
+        svg_bytes = render_svg(project_id, nodes, edges, timeout=graph_cache.RENDER_TIMEOUT)
+    except RenderTimeout:
+        return jsonify({"error": "graph render timed out"}), 503, {"Retry-After": "2"}
+    resp = Response(svg_bytes, mimetype="image/svg+xml")
+    resp.set_etag(etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
\ No newline at end of file
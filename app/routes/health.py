@@ -0,0 +1,37 @@
+from flask import Blueprint, current_app, jsonify, request
+from sqlalchemy import text
+from app.db.tx import get_conn
+from app.db.pool import is_transaction_pooler, metrics_for
+
+health_bp = Blueprint("health", __name__)
+
+
+@health_bp.get("/health")
+def health():
+    """
+    GET /health - liveness plus connection-pool metrics.
+
+    Auth: none.
+
+    Query:
+      - deep (bool, optional) - also run `SELECT 1` through the pool
+
+    Responses:
+      - 200: {"ok": true, "pool": {"size": int, "checkedout": int, "overflow": int, "checkedin": int,
+                                   "connects": int, "checkouts": int, "checkins": int, "invalidations": int,
+                                   "wait_avg_ms": float, "wait_max_ms": float, "transaction_pooling": bool}}
+      - 503: {"ok": false, "error": "database_unavailable", "pool": {...}}
+    """
+    engine = current_app.config["PG_ENGINE"]
+    pool = metrics_for(engine).snapshot(engine)
+    pool["transaction_pooling"] = is_transaction_pooler(engine.url.render_as_string(hide_password=False))
+
+    if (request.args.get("deep") or "").strip().lower() in {"1", "true", "t", "yes", "y", "on"}:
+        try:
+            with get_conn() as conn:
+                conn.execute(text("SELECT 1"))
+        except Exception:
+            current_app.logger.exception("health check query failed")
+            return jsonify({"ok": False, "error": "database_unavailable", "pool": pool}), 503
+
+    return jsonify({"ok": True, "pool": pool}), 200
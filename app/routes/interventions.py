@@ -2,8 +2,14 @@
 from __future__ import annotations
 from flask import Blueprint, request, jsonify, current_app, g
 from sqlalchemy import text
-from .. import get_conn
-from ..services.rules_intervention import intervention_recompute
+from ..db.tx import begin_tx, get_conn
+from ..services import catalogue, eligibility, pg_scoring
+from ..services.rules_intervention import (
+    batch_intervention_recompute,
+    implement_interventions,
+    intervention_recompute,
+)
+from ..services.stages import MAX_PAGE_SIZE, recommendations
 from ..services.weightings import apply_weights, decay_by_intervention
 import jwt
 from typing import List, Dict
@@ -40,10 +46,7 @@ def _project_exists(conn, project_id: int) -> bool:
     ).scalar_one_or_none() is not None
 
 def _intervention_exists(conn, intervention_id: int) -> bool:
-    return conn.execute(
-        text("SELECT 1 FROM interventions WHERE id = :iid"),
-        {"iid": intervention_id},
-    ).scalar_one_or_none() is not None
+    return intervention_id in catalogue.current(conn).interventions
 
 # --- routes ----------------------------------------------------------------
 
@@ -72,7 +75,7 @@ def apply_intervention(project_id: int):
           "dry_run": bool,
           "insert_attempted": bool,
           "insert_returned_row": bool,
-          "verified_persisted": bool,
+          "verified_persisted": bool,   # row is in the request transaction, committed with this 200
           "decay_applied": bool,
           "decay_params": {"alpha": float, "floor": float} | null
         }
@@ -116,7 +119,7 @@ def apply_intervention(project_id: int):
         if not _intervention_exists(conn, cause_id):
             return {"error": "not_found", "message": "intervention not found"}, 404
 
-        tx = conn.begin() if not conn.in_transaction() else conn.begin_nested()
+        tx = begin_tx(conn)
         try:
             # per-request timeout (doesn't change global DB)
             try:
@@ -136,8 +139,21 @@ def apply_intervention(project_id: int):
                     {"pid": project_id, "iid": cause_id, "uid": g.user_id},
                 ).scalar_one_or_none()
 
-            # recompute / reweight while we still hold the tx
-            new_scores = intervention_recompute(conn, project_id, cause_id)
+            snap = catalogue.current(conn)
+            if inserted_row:
+                eligibility.mark_implemented(conn, project_id, [cause_id], snap)
+
+            # recompute / reweight while we still hold the tx. An intervention's effects are
+            # folded in once, when it becomes implemented (as in the scoring kernel); applying
+            # it again must not compound them a second time.
+            if dry_run:
+                newly_implemented = conn.execute(
+                    text("SELECT 1 FROM implemented_interventions WHERE project_id = :pid AND impl_id = :iid"),
+                    {"pid": project_id, "iid": cause_id},
+                ).first() is None
+            else:
+                newly_implemented = inserted_row is not None
+            new_scores = intervention_recompute(conn, project_id, cause_id, snap) if newly_implemented else {}
             try:
                 apply_weights(project_id, conn)
             except Exception:
@@ -160,22 +176,6 @@ def apply_intervention(project_id: int):
             current_app.logger.exception("apply_intervention failed")
             return {"error": "server_error"}, 500
 
-    #  verify with a fresh connection that the row actually exists
-    verified = False
-    if not dry_run:
-        with get_conn() as conn2:
-            try:
-                verified = conn2.execute(
-                    text("""
-                        SELECT 1 FROM implemented_interventions
-                        WHERE project_id = :pid AND impl_id = :iid
-                        LIMIT 1
-                    """),
-                    {"pid": project_id, "iid": cause_id},
-                ).scalar_one_or_none() is not None
-            except Exception:
-                pass
-
     return jsonify({
         "project_id": project_id,
         "cause_intervention_id": cause_id,
@@ -184,7 +184,7 @@ def apply_intervention(project_id: int):
         "dry_run": dry_run,
         "insert_attempted": not dry_run,
         "insert_returned_row": bool(inserted_row),
-        "verified_persisted": bool(verified),
+        "verified_persisted": not dry_run,
         "decay_applied": (not dry_run and want_decay),
         "decay_params": {"alpha": alpha, "floor": floor} if want_decay else None,
     }), 200
@@ -200,8 +200,14 @@ def apply_interventions_batch(project_id: int):
     Request (JSON):
       - intervention_ids (list[int], required)
 
+    Description:
+      Validates, inserts and recomputes the whole batch in one transaction:
+      one INSERT for all ids, one folded recompute over the newly implemented
+      causes, then a single apply_weights.
+
     Query:
       - dry_run (bool, optional) - if true, no inserts/recompute
+      - limit (int, optional, default 3, max 100) - size of next_recommendations
 
     Responses:
       - 200: {
@@ -209,7 +215,7 @@ def apply_interventions_batch(project_id: int):
           "applied_count": int,
           "intervention_ids": [int, ...],
           "dry_run": bool,
-          "next_recommendations": [ { ... up to 3 ... } ],
+          "next_recommendations": [ { ... up to limit ... } ],
           "has_more": bool
         }
       - 400: {"error":"bad_request", "message":"..."}
@@ -238,65 +244,52 @@ def apply_interventions_batch(project_id: int):
         return {"error": "bad_request", "message": "intervention_ids must be integers"}, 400
     
     dry_run = _parse_bool(request.args.get("dry_run"))
+    try:
+        limit = int(request.args.get("limit", 3))
+    except ValueError:
+        return {"error": "bad_request", "message": "limit must be an integer"}, 400
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return {"error": "bad_request", "message": f"limit must be between 1 and {MAX_PAGE_SIZE}"}, 400
     
     with get_conn() as conn:
         # Validate project exists
         if not _project_exists(conn, project_id):
             return {"error": "not_found", "message": "project not found"}, 404
     
-        # Validate all interventions exist
-        for iid in intervention_ids:
-            if not _intervention_exists(conn, iid):
-                return {"error": "not_found", "message": f"intervention {iid} not found"}, 404
-    
-    applied_count = 0
-    
-    if not dry_run:
-        for iid in intervention_ids:
-            with get_conn() as conn:
-                try:
-                    conn.exec_driver_sql("COMMIT")
-                    
-                    result = conn.execute(
-                        text("""
-                            INSERT INTO implemented_interventions (project_id, impl_id, user_id)
-                            VALUES (:pid, :iid, :uid)
-                            ON CONFLICT (project_id, impl_id) DO NOTHING
-                            RETURNING project_id, impl_id, user_id
-                        """),
-                        {"pid": project_id, "iid": iid, "uid": g.user_id},
-                    ).fetchone()
-                    
-                    if result:
-                        applied_count += 1
-                        conn.exec_driver_sql("COMMIT")
-                        
-                except Exception as e:
-                    current_app.logger.exception(f"Insert failed for intervention {iid}")
-        
-        # Do recomputes in a separate connection
-        if applied_count > 0:
-            with get_conn() as compute_conn:
-                compute_conn.exec_driver_sql("COMMIT")
-                
-                for iid in intervention_ids:
+        # Validate all interventions exist (in-memory against the catalogue snapshot)
+        snap = catalogue.current(conn)
+        missing = [iid for iid in intervention_ids if iid not in snap.interventions]
+        if missing:
+            return {"error": "not_found", "message": f"intervention {missing[0]} not found"}, 404
+
+        applied_ids: List[int] = []
+        if not dry_run:
+            tx = begin_tx(conn)  # savepoint in the request transaction
+            try:
+                # one INSERT for the whole batch; only newly implemented causes are folded in
+                applied_ids = implement_interventions(
+                    conn, project_id, list(dict.fromkeys(intervention_ids)), g.user_id
+                )
+                if applied_ids and current_app.config.get("SCORING_BACKEND") == "sql":
+                    pg_scoring.score_projects(conn, [project_id])
+                elif applied_ids:
+                    eligibility.mark_implemented(conn, project_id, applied_ids, snap)
+                    batch_intervention_recompute(conn, project_id, applied_ids, snap)
                     try:
-                        intervention_recompute(compute_conn, project_id, iid)
-                    except Exception as e:
-                        current_app.logger.exception(f"Recompute failed for intervention {iid}")
-                
-                # Refresh theme-weighted effectiveness
-                try:
-                    apply_weights(project_id, compute_conn)
-                    compute_conn.exec_driver_sql("COMMIT")
-                except Exception:
-                    current_app.logger.exception("apply_weights failed (non-fatal)")
-    
-    # Get fresh recommendations
-    with get_conn() as conn2:
+                        apply_weights(project_id, conn)
+                    except Exception:
+                        current_app.logger.exception("apply_weights failed (non-fatal)")
+                tx.commit()
+            except Exception:
+                if tx.is_active:
+                    tx.rollback()
+                current_app.logger.exception("apply_interventions_batch failed")
+                return {"error": "server_error"}, 500
+        applied_count = len(applied_ids)
+
+        # Get fresh recommendations
         try:
-            from ..services.stages import recommendations
-            next_recs = recommendations(conn2, project_id, limit=3)
+            next_recs = recommendations(conn, project_id, limit=limit)
         except Exception:
             current_app.logger.exception("Failed to get next recommendations")
             next_recs = []
@@ -0,0 +1,116 @@
+from flask import Blueprint, jsonify, request, current_app, url_for, Response
+from ..db.tx import get_conn
+from ..services import jobs
+import jwt
+
+jobs_bp = Blueprint("jobs", __name__)
+
+def _get_bearer_token():
+    auth = request.headers.get("Authorization", "")
+    if not auth or not auth.lower().startswith("bearer "):
+        return None
+    return auth.split(None, 1)[1]
+
+def _decode_jwt(token: str):
+    if not token:
+        return None
+    secret = current_app.config.get("JWT_SECRET")
+    if not secret:
+        return None
+    try:
+        return jwt.decode(token, secret, algorithms=["HS256"])
+    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+        return None
+
+
+def wants_sync() -> bool:
+    """`?sync=1` asks a job-backed endpoint to run inline and answer with the result, as before."""
+    return request.args.get("sync", "").lower() in ("1", "true", "yes")
+
+
+def accepted(job_id: int):
+    """202 response for a queued job, pointing at its status endpoint."""
+    status_url = url_for("jobs.job_status", job_id=job_id)
+    resp = jsonify({"ok": True, "job_id": job_id, "status": jobs.QUEUED, "status_url": status_url})
+    resp.headers["Location"] = status_url
+    return resp, 202
+
+
+def _load_job(job_id: int):
+    """(job, None) for a job the caller may see, else (None, error response)."""
+    # authenticate before the lookup, so anonymous callers cannot probe which ids exist
+    payload = _decode_jwt(_get_bearer_token())
+    if not payload:
+        return None, (jsonify({"error": "unauthorized"}), 401)
+    with get_conn() as conn:
+        job = jobs.get(conn, job_id)
+    if job is None:
+        return None, (jsonify({"error": "job not found"}), 404)
+    # a job without an owner is Admin-only
+    if payload.get("role") != "Admin" and (job["created_by"] is None or str(payload.get("sub")) != job["created_by"]):
+        return None, (jsonify({"error": "forbidden"}), 403)
+    return job, None
+
+
+@jobs_bp.get("/jobs/<int:job_id>")
+def job_status(job_id: int):
+    """
+    GET /jobs/{job_id} - status of a background job.
+
+    Auth: Bearer JWT of the user who queued the job, or role=Admin
+          (jobs queued without a user are readable by Admins only).
+
+    Description:
+      Poll until "status" is "succeeded" or "failed". A failed attempt is
+      retried with backoff while attempts remain, so "queued" can follow
+      "running"; "error" holds the last failure.
+
+    Responses:
+      - 200: {"id": int, "kind": "ingest|rescore|report_pdf", "status": "queued|running|succeeded|failed",
+              "attempts": int, "max_attempts": int, "result": {...} | null, "error": str | null,
+              "result_url": str | null, "created_at": iso, "updated_at": iso, "finished_at": iso | null}
+      - 401/403: {"error": "unauthorized" | "forbidden"}
+      - 404: {"error":"job not found"}
+    """
+    job, error = _load_job(job_id)
+    if error:
+        return error
+    done = job["status"] == jobs.SUCCEEDED
+    return jsonify({
+        "id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "max_attempts": job["max_attempts"],
+        "result": job["result"],
+        "error": job["error"],
+        "result_url": url_for("jobs.job_result", job_id=job_id) if done else None,
+        **{k: job[k].isoformat() if job[k] else None for k in ("created_at", "updated_at", "finished_at")},
+    }), 200
+
+
+@jobs_bp.get("/jobs/<int:job_id>/result")
+def job_result(job_id: int):
+    """
+    GET /jobs/{job_id}/result - output of a finished job.
+
+    Auth: as GET /jobs/{job_id}.
+
+    Responses:
+      - 200: the stored file (e.g. application/pdf for report_pdf jobs), or the JSON result
+      - 401/403: {"error": "unauthorized" | "forbidden"}
+      - 404: {"error":"job not found"}
+      - 409: {"error":"job not finished", "status": "..."} / {"error": "job failed", ...}
+    """
+    job, error = _load_job(job_id)
+    if error:
+        return error
+    if job["status"] == jobs.FAILED:
+        return jsonify({"error": "job failed", "status": job["status"], "detail": job["error"]}), 409
+    if job["status"] != jobs.SUCCEEDED:
+        return jsonify({"error": "job not finished", "status": job["status"]}), 409
+    if job["has_blob"]:
+        with get_conn() as conn:
+            blob, mimetype = jobs.get_blob(conn, job_id)
+        return Response(blob, mimetype=mimetype)
+    return jsonify(job["result"]), 200
@@ -4,8 +4,9 @@ from datetime import datetime
 from flask import Blueprint, request, jsonify, current_app, g
 import jwt
 from sqlalchemy import text
-from .. import get_conn
-from ..services import rules_metric  # used for optional post-create recompute
+from ..db.tx import begin_tx, get_conn
+from ..db.pipeline import pipeline
+from ..services import rules_metric, catalogue, eligibility, pg_scoring, rescoring  # used for optional post-create recompute
 from ..services.weightings import apply_weights  # NEW
 
 projects_bp = Blueprint("projects", __name__)
@@ -139,7 +140,7 @@ def create_project():
     """
 
     with get_conn() as conn:
-        tx = conn.begin()
+        tx = begin_tx(conn)
         try:
             try:
                 conn.exec_driver_sql("SET LOCAL statement_timeout = 8000")
@@ -156,27 +157,31 @@ def create_project():
                 if k in fields and fields[k] is not None
             }
             if metrics_in_body:
-                with get_conn() as conn2:
-                    tx2 = conn2.begin() if not conn2.in_transaction() else conn2.begin_nested()
-                    try:
+                # same connection: the new row is only visible inside this request's transaction
+                tx2 = None
+                try:
+                    sql_backend = current_app.config.get("SCORING_BACKEND") == "sql"
+                    with pipeline(conn):  # the writes share round trips (see building_metrics)
+                        tx2 = begin_tx(conn)
+                        rules_metric.save_project_metrics(conn, project_id, metrics_in_body)
+                        if sql_backend:
+                            pg_scoring.score_projects(conn, [project_id])
+                        else:
+                            rescoring.rescore_project(conn, project_id, catalogue.current(conn))
+                            eligibility.refresh(conn, [project_id])
+                    if not sql_backend:
+                        # Make theme-weighted values current right away. Outside the pipeline on
+                        # purpose: a pipelined error only surfaces at the next sync, after this
+                        # except and apply_weights' savepoint are gone, so it would not stay non-fatal.
                         try:
-                            conn2.exec_driver_sql("SET LOCAL statement_timeout = 8000")
-                        except Exception:
-                            pass
-
-                        rules_metric.save_project_metrics(conn2, project_id, metrics_in_body)
-                        scores = rules_metric.metric_recompute(conn2, project_id)
-                        rules_metric.upsert_runtime_scores(conn2, project_id, scores)
-                        # Make theme-weighted values current right away
-                        try:
-                            apply_weights(project_id, conn2)
+                            apply_weights(project_id, conn)
                         except Exception:
                             current_app.logger.exception("apply_weights (post-create) failed")
-                        tx2.commit()
-                    except Exception:
-                        if tx2.is_active:
-                            tx2.rollback()
-                        current_app.logger.exception("post-create recompute failed")
+                    tx2.commit()
+                except Exception:
+                    if tx2 is not None and tx2.is_active:
+                        tx2.rollback()
+                    current_app.logger.exception("post-create recompute failed")
 
             return jsonify({"project": _row_to_dict(row)}), 201
         except Exception:
@@ -255,7 +260,7 @@ def patch_project(project_id: int):
     updates["pid"] = project_id
 
     with get_conn() as conn:
-        tx = conn.begin()
+        tx = begin_tx(conn)
         try:
             try:
                 conn.exec_driver_sql("SET LOCAL statement_timeout = 8000")  # NEW
@@ -307,7 +312,7 @@ def delete_project(project_id: int):
         return {"error": "unauthorized"}, 401
 
     with get_conn() as conn:
-        tx = conn.begin()
+        tx = begin_tx(conn)
         try:
             try:
                 conn.exec_driver_sql("SET LOCAL statement_timeout = 8000")  # NEW
@@ -1,15 +1,73 @@
+import base64
 from flask import Blueprint, jsonify, current_app, render_template, request, url_for, Response
-from .. import get_conn
-from ..services import report as report_service
-from weasyprint import HTML
+from ..db.tx import get_conn
+from ..services import columnar, jobs, report as report_service
+from .graph import render_svg
+from .jobs import accepted, wants_sync
+from weasyprint import HTML, default_url_fetcher
+import jwt
 
 report_bp = Blueprint("report", __name__)
 
+def _jwt_sub():
+    """`sub` of a valid bearer token, if any; only queuing a PDF job requires one."""
+    auth = request.headers.get("Authorization", "")
+    if not auth.lower().startswith("bearer "):
+        return None
+    try:
+        payload = jwt.decode(auth.split(None, 1)[1], current_app.config.get("JWT_SECRET") or "",
+                             algorithms=["HS256"])
+    except jwt.InvalidTokenError:
+        return None
+    return payload.get("sub")
+
+
+def _inline_only_fetcher(url, *args, **kwargs):
+    """WeasyPrint URL fetcher for reports: data: URIs only, never an HTTP request (back into this server)."""
+    if not url.startswith("data:"):
+        raise ValueError(f"report PDFs do not fetch external resources: {url}")
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+def render_pdf(project_id: int) -> bytes:
+    """
+    PDF of report.html for a project; needs an app context.
+
+    The implemented list and the graph come from one DB read
+    (report_service.load_report); the graph is rendered in process (through
+    the graph.svg render cache), then inlined as a data: URI, so WeasyPrint
+    never calls back into this server.
+    """
+    with get_conn() as conn:
+        implemented, nodes, edges = report_service.load_report(conn, project_id)
+    svg = render_svg(project_id, nodes, edges)
+
+    html_str = render_template(
+        "report.html",
+        project_id=project_id,
+        implemented=implemented,
+        graph_src="data:image/svg+xml;base64," + base64.b64encode(svg).decode("ascii")
+    )
+
+    return HTML(string=html_str, url_fetcher=_inline_only_fetcher).write_pdf()
+
+
+@jobs.handler("report_pdf")
+def report_pdf_job(payload):
+    """Job body of GET /report.pdf (run_one provides the app context)."""
+    pdf = render_pdf(payload["project_id"])
+    return jobs.JobOutput(result={"project_id": payload["project_id"], "bytes": len(pdf)},
+                          blob=pdf, mimetype="application/pdf")
+
 @report_bp.get("/projects/<int:project_id>/implemented-with-scores")
 def get_implemented(project_id: int):
     """
     GET /projects/{project_id}/implemented-with-scores -- implemented interventions + scores.
 
+    Encoding:
+      Accept: application/vnd.apache.arrow.stream returns an Arrow IPC stream
+      of parallel arrays ("implemented_interventions.intervention_id", ".name", ".score").
+
     Responses:
       - 200: {"project_id": int, "implemented_interventions": [ {...}, ... ]}
       - 500: {"error":"failed to generate implemented intervention output"}
@@ -17,10 +75,10 @@ def get_implemented(project_id: int):
     try:
         with get_conn() as conn:
             implemented = report_service.implemented(conn, project_id)
-        return jsonify({
+        return columnar.respond({
             "project_id": project_id,
             "implemented_interventions": implemented
-        }), 200
+        }, fields={"implemented_interventions": ("intervention_id", "name", "score")})
     except Exception as e:
         current_app.logger.exception("Failed to generate implemented interventions")
         return jsonify({"error": "failed to generate implemented intervention output"}), 500
@@ -41,13 +99,13 @@ def report_html(project_id: int):
     with get_conn() as conn:
         implemented = report_service.implemented(conn, project_id)
 
-    graph_url = url_for("graphs.project_graph_svg", project_id=project_id, _external=True)
+    graph_src = url_for("graphs.project_graph_svg", project_id=project_id, _external=True)
 
     return render_template(
         "report.html",
         project_id=project_id,
         implemented=implemented,
-        graph_url=graph_url
+        graph_src=graph_src
     )
 
 
@@ -58,24 +116,29 @@ def report_pdf(project_id: int):
 
     Description:
       Renders the same content as the HTML report and converts it to PDF.
+      The graph SVG is rendered in process and inlined; the PDF render makes
+      no HTTP requests, so it also works with a single web worker.
+      By default the render is queued as a background job: poll the status
+      URL, then download the PDF from GET /jobs/{job_id}/result. Queuing
+      needs a bearer token, since the job is readable only by its owner.
+      With ?sync=1 the PDF is rendered inside the request.
+
+    Auth:
+      Bearer JWT to queue the job; none for ?sync=1.
 
     Responses:
-      - 200: application/pdf
+      - 202: {"ok": true, "job_id": int, "status": "queued", "status_url": "/api/jobs/<id>"}
+      - 200: (sync=1) application/pdf
+      - 401: {"error": "unauthorized"} - queued without a valid bearer token
       - 500: HTML/PDF generation failure
     """
 
-    with get_conn() as conn:
-        implemented = report_service.implemented(conn, project_id)
-
-    graph_url = url_for("graphs.project_graph_svg", project_id=project_id, _external=True)
+    if wants_sync():
+        return Response(render_pdf(project_id), mimetype="application/pdf")
 
-    html_str = render_template(
-        "report.html",
-        project_id=project_id,
-        implemented=implemented,
-        graph_url=graph_url
-    )
-
-    pdf_bytes = HTML(string=html_str, base_url=request.host_url).write_pdf()
-
-    return Response(pdf_bytes, mimetype="application/pdf")
+    owner = _jwt_sub()
+    if owner is None:
+        return jsonify({"error": "unauthorized"}), 401
+    with get_conn() as conn:
+        job_id = jobs.enqueue(conn, "report_pdf", {"project_id": project_id}, created_by=owner)
+    return accepted(job_id)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from flask import Blueprint, request, jsonify, current_app, g
 from sqlalchemy import text
 from ..services.weightings import apply_weights
-from .. import get_conn
+from ..db.tx import begin_tx, get_conn
 import jwt  # <-- added
 
 theme_weights_bp = Blueprint("theme_weights", __name__, url_prefix="/api")
@@ -187,7 +187,7 @@ def upsert_project_theme_weightings(project_id: int):
     dry_run = _parse_bool(request.args.get("dry_run")) or bool(payload_json.get("dry_run"))
 
     with get_conn() as conn:
-        tx = conn.begin()
+        tx = begin_tx(conn)
         try:
             # ensure project exists
             exists = conn.execute(
@@ -0,0 +1,186 @@
+from dataclasses import dataclass
+from functools import cached_property
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .edge_index import EdgeIndex
+from .rule_engine import MetricRuleEngine
+from .rules_intervention import fetch_intervention_rules
+from .rules_metric import fetch_metric_rules
+from .types import InterventionRule, MetricRule
+
+
+@dataclass(frozen=True)
+class InterventionInfo:
+    id: int
+    name: str
+    theme_id: int
+    base_effectiveness: float
+    cost_weight: float
+    is_stage: bool
+
+
+@dataclass(frozen=True)
+class ThemeInfo:
+    id: int
+    name: str
+    description: Optional[str]
+
+
+@dataclass(frozen=True)
+class Catalogue:
+    """
+    Immutable snapshot of the reference tables, stamped with `reference_version.version`.
+
+    Shared by every request in the process; never mutate it - a newer
+    version replaces the whole object.
+    """
+    version: int
+    interventions: Mapping[int, InterventionInfo]
+    themes: Mapping[int, ThemeInfo]
+    prereqs: Mapping[int, Tuple[int, ...]]   # stage src -> dst ids that must be implemented first
+    mutexes: Mapping[int, Tuple[int, ...]]   # stage src -> dst ids that block it once implemented
+    metric_rules: Tuple[MetricRule, ...]
+    intervention_rules: Tuple[InterventionRule, ...]
+    rules_by_cause: Mapping[int, Tuple[InterventionRule, ...]]
+    step_size: Optional[float]
+    metric_engine: MetricRuleEngine
+
+    def _dependents(self, adjacency: Mapping[int, Tuple[int, ...]]) -> Mapping[int, Tuple[int, ...]]:
+        pairs = []
+        for src, dsts in adjacency.items():
+            info = self.interventions.get(src)
+            if info is not None and info.is_stage:
+                pairs.extend((dst, src) for dst in dsts)
+        return _group(pairs)
+
+    @cached_property
+    def prereq_dependents(self) -> Mapping[int, Tuple[int, ...]]:
+        """dst -> stage srcs that list it as a prereq (implementing dst unblocks them)."""
+        return self._dependents(self.prereqs)
+
+    @cached_property
+    def mutex_dependents(self) -> Mapping[int, Tuple[int, ...]]:
+        """dst -> stage srcs that list it as a mutex (implementing dst blocks them)."""
+        return self._dependents(self.mutexes)
+
+    @cached_property
+    def edge_index(self) -> EdgeIndex:
+        """intervention_effects as a strength-sorted adjacency index, for graph edge selection."""
+        return EdgeIndex(self.intervention_rules)
+
+
+def fetch_version(conn: Connection) -> int:
+    """The cheap staleness probe: one PK lookup."""
+    v = conn.execute(text("SELECT version FROM reference_version WHERE id = 1")).scalar()
+    return int(v or 0)
+
+
+def bump_version(conn: Connection) -> int:
+    """Mark reference data as changed; other workers rebuild on their next `current()`."""
+    return int(conn.execute(
+        text("""
+            INSERT INTO reference_version (id, version, updated_at)
+            VALUES (1, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT (id) DO UPDATE
+              SET version = reference_version.version + 1,
+                  updated_at = CURRENT_TIMESTAMP
+            RETURNING version
+        """)
+    ).scalar_one())
+
+
+def _group(pairs) -> Mapping[int, Tuple]:
+    """{key: tuple of values} in one pass, values kept in input order."""
+    out: Dict[int, List] = {}
+    for k, v in pairs:
+        out.setdefault(k, []).append(v)
+    return MappingProxyType({k: tuple(v) for k, v in out.items()})
+
+
+def load_catalogue(conn: Connection, version: int) -> Catalogue:
+    """Read every reference table and assemble a snapshot tagged with `version`."""
+    interventions = {
+        int(r["id"]): InterventionInfo(
+            id=int(r["id"]),
+            name=str(r["name"]),
+            theme_id=int(r["theme_id"]),
+            base_effectiveness=float(r["base_effectiveness"]),
+            cost_weight=float(r["cost_weight"]),
+            is_stage=bool(r["is_stage"]),
+        )
+        for r in conn.execute(text("""
+            SELECT id, name, theme_id,
+                   COALESCE(base_effectiveness, 0) AS base_effectiveness,
+                   COALESCE(cost_weight, 0)        AS cost_weight,
+                   COALESCE(is_stage, FALSE)       AS is_stage
+            FROM interventions
+        """)).mappings().all()
+    }
+    themes = {
+        int(r["id"]): ThemeInfo(id=int(r["id"]), name=str(r["name"]), description=r["description"])
+        for r in conn.execute(text("SELECT id, name, description FROM themes")).mappings().all()
+    }
+    stage_rows = conn.execute(
+        text("SELECT src_intervention_id, dst_intervention_id, relation_type FROM stages")
+    ).mappings().all()
+    step_size = conn.execute(text("SELECT step_size FROM config LIMIT 1")).scalar()
+
+    metric_rules = tuple(fetch_metric_rules(conn))
+    intervention_rules = tuple(fetch_intervention_rules(conn))
+
+    return Catalogue(
+        version=version,
+        interventions=MappingProxyType(interventions),
+        themes=MappingProxyType(themes),
+        prereqs=_group((int(r["src_intervention_id"]), int(r["dst_intervention_id"]))
+                       for r in stage_rows if r["relation_type"] == "prereq"),
+        mutexes=_group((int(r["src_intervention_id"]), int(r["dst_intervention_id"]))
+                       for r in stage_rows if r["relation_type"] == "mutex"),
+        metric_rules=metric_rules,
+        intervention_rules=intervention_rules,
+        rules_by_cause=_group((r.cause_intervention_id, r) for r in intervention_rules),
+        step_size=(float(step_size) if step_size is not None else None),
+        metric_engine=MetricRuleEngine(
+            {i.id: i.base_effectiveness for i in interventions.values()}, metric_rules
+        ),
+    )
+
+
+# --- process-wide snapshot -------------------------------------------------
+_current: Optional[Catalogue] = None
+_lock = Lock()
+
+
+def current(conn: Connection, version: Optional[int] = None) -> Catalogue:
+    """
+    Return the process snapshot, rebuilding it if `reference_version` moved.
+    Costs one PK lookup when the snapshot is fresh, none when the caller
+    already read `version` in the same transaction (see report.load_report).
+
+    The rebuild runs outside `_lock`, which only guards the swap: under the
+    ASGI server every request shares the event-loop thread, and a thread
+    lock held across a query would block the loop (and so the query) for
+    good. Requests that find the snapshot stale at the same moment may each
+    build one; the newest version wins.
+    """
+    global _current
+    if version is None:
+        version = fetch_version(conn)
+    snap = _current
+    if snap is not None and snap.version == version:
+        return snap
+    snap = load_catalogue(conn, version)
+    with _lock:
+        if _current is None or _current.version < version:
+            _current = snap  # swapped only once fully built
+    return snap
+
+
+def invalidate() -> None:
+    """Drop this process' snapshot immediately (the version bump covers other processes)."""
+    global _current
+    with _lock:
+        _current = None
@@ -0,0 +1,81 @@
+"""
+Compact columnar encoding for list-heavy API responses.
+
+`Accept: application/vnd.apache.arrow.stream` on /graph,
+/recommendations and /implemented-with-scores returns the same payload as
+the JSON body, laid out column-wise as an Arrow IPC stream:
+
+  - a list of objects becomes one list-typed column per field
+    ("nodes.id", "nodes.score", "edges.src", "edges.weight", ...): parallel
+    arrays that decode straight into typed arrays, with no per-row objects
+    and no repeated keys
+  - a nested object is flattened with dotted names ("params.top_n")
+  - a scalar, or a list of scalars, is a column of its own
+
+The stream holds one record batch of one row, so every column reads as
+`table[name][0]`. Clients that send no Accept header, or prefer JSON, get
+JSON exactly as before.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Mapping, Optional, Sequence
+from flask import Response, jsonify, request
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+
+Fields = Mapping[str, Sequence[str]]   # list key -> field names, so empty lists still get their columns
+
+
+def _scalar(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def columns(payload: Mapping[str, Any], fields: Optional[Fields] = None, prefix: str = "") -> Dict[str, Any]:
+    """Flatten a JSON-shaped payload into {column name: value or list of values}."""
+    fields = fields or {}
+    out: Dict[str, Any] = {}
+    for key, value in payload.items():
+        name = prefix + key
+        if isinstance(value, Mapping):
+            out.update(columns(value, prefix=name + "."))
+        elif isinstance(value, (list, tuple)) and (name in fields or any(isinstance(v, Mapping) for v in value)):
+            names = list(fields.get(name, ()))
+            for row in value:
+                names.extend(k for k in row if k not in names)
+            for f in names:
+                out[f"{name}.{f}"] = [_scalar(row.get(f)) for row in value]
+        elif isinstance(value, (list, tuple)):
+            out[name] = [_scalar(v) for v in value]
+        else:
+            out[name] = _scalar(value)
+    return out
+
+
+def to_arrow(payload: Mapping[str, Any], fields: Optional[Fields] = None) -> bytes:
+    """Arrow IPC stream bytes for `payload` (see the module docstring for the layout)."""
+    import pyarrow as pa   # only needed for Arrow responses
+
+    cols = columns(payload, fields)
+    batch = pa.RecordBatch.from_arrays([pa.array([v]) for v in cols.values()], names=list(cols))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, batch.schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def wants_arrow() -> bool:
+    return request.accept_mimetypes.best_match([JSON, ARROW_STREAM]) == ARROW_STREAM
+
+
+def respond(payload: Mapping[str, Any], status: int = 200, fields: Optional[Fields] = None):
+    """`payload` as JSON, or as an Arrow stream when the client's Accept header prefers it."""
+    if not wants_arrow():
+        resp = jsonify(payload)
+    else:
+        try:
+            resp = Response(to_arrow(payload, fields), mimetype=ARROW_STREAM)
+        except ImportError:
+            return jsonify({"error": "arrow responses need pyarrow installed"}), 406
+    resp.status_code = status
+    resp.vary.add("Accept")
+    return resp
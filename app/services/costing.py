@@ -1,30 +1,32 @@
 import math
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
+from . import catalogue
 
 
 def calc_cost_level(conn: Connection, project_id: int):
     """
     Return how many "cost tokens" ($) to display for a given project
     num tokens = floor(total_cost_weight / step_size).
+    step_size and cost weights come from the shared catalogue snapshot.
     """
-    # Get the size of a token
-    step_size = conn.execute(
-        text("SELECT step_size FROM config LIMIT 1")
-    ).scalar_one()
-
+    snap = catalogue.current(conn)
+    step_size = snap.step_size
+    if step_size is None:
+        raise LookupError("config.step_size is not set")
 
     # Sum weights
-    total_weight = conn.execute(
+    impl_ids = conn.execute(
         text("""
-            SELECT COALESCE(SUM(i.cost_weight), 0) AS total_weight
-            FROM implemented_interventions AS ii
-            JOIN interventions AS i
-              ON i.id = ii.impl_id
-            WHERE (ii.project_id = :pid)
+            SELECT impl_id
+            FROM implemented_interventions
+            WHERE project_id = :pid
         """),
         {"pid": project_id}
-    ).scalar_one()
+    ).scalars().all()
+    total_weight = sum(
+        snap.interventions[iid].cost_weight for iid in impl_ids if iid in snap.interventions
+    )
 
     # Convert to token count
     tokens = math.floor(total_weight / step_size) if step_size > 0 else 0
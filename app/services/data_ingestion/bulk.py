@@ -0,0 +1,520 @@
+"""
+Set-based, streaming reference-data ingestion.
+
+Sheets arrive as a stream of (sheet, DataFrame chunk) pairs (see readers.py);
+each chunk is cleaned in pandas and COPYed into a temporary staging table
+straight away, so memory holds one chunk at a time however large the input
+is. Once everything is staged, each live table is filled with one
+INSERT ... SELECT; name -> id lookups happen in the merge joins.
+
+Merges are diffs: rows are compared by content hash and only the inserts,
+updates and deletes that differ are applied, each recorded in a ChangeSet.
+"""
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+import pandas as pd
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .changeset import ChangeSet
+
+try:
+    import psycopg
+except ImportError:  # pragma: no cover - psycopg is the production driver
+    psycopg = None
+
+REQUIRED = {
+    "themes": ["name"],
+    "interventions": ["name", "theme_name", "base_effectiveness", "is_stage"],
+    "stages": ["src_intervention_name", "dst_intervention_name", "relation_type"],
+    "metric_effects": ["cause_name", "effected_intervention_name", "metric_type",
+                       "lower_bound", "upper_bound", "multiplier"],
+    "intervention_effects": ["cause_intervention_name", "effected_intervention_name", "metric_type",
+                             "lower_bound", "upper_bound", "multiplier"],
+}
+
+_EFFECTS_DDL = ("n bigint, cause_name text, effect_name text, metric_type text, "
+                "lower_bound numeric, upper_bound numeric, multiplier numeric, reasoning text")
+
+# staging tables: (name, column DDL); `n` is the sheet row, for last-row-wins merges.
+# stg_themes.src is 0 for the themes sheet, 1 for names taken from interventions.theme_name.
+_STAGING = {
+    "themes": ("stg_themes", "src smallint, n bigint, name text"),
+    "interventions": ("stg_interventions",
+                      "n bigint, name text, theme_name text, base_effectiveness numeric, is_stage boolean"),
+    "stages": ("stg_stages", "n bigint, src_name text, dst_name text, relation_type text"),
+    "metric_effects": ("stg_metric_effects", _EFFECTS_DDL),
+    "intervention_effects": ("stg_intervention_effects", _EFFECTS_DDL),
+}
+
+# lower(trim(name)) -> id, one id per key (matches the old name -> id dict lookups)
+_INTERVENTION_KEYS = """
+    iv AS (
+      SELECT DISTINCT ON (lower(trim(name))) lower(trim(name)) AS key, id
+      FROM interventions
+      ORDER BY lower(trim(name)), id
+    )
+"""
+
+
+@dataclass
+class SheetStats:
+    """Per-sheet counters; `seconds` covers parsing, staging and the sheet's merge (summed across workers)."""
+    rows: int = 0
+    chunks: int = 0
+    skipped_missing: int = 0
+    skipped_invalid: int = 0
+    skipped_blank_rel: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def require_columns(df: pd.DataFrame, sheet: str) -> pd.DataFrame:
+    if sheet not in REQUIRED:
+        raise ValueError(f"unknown sheet '{sheet}' (expected one of {sorted(REQUIRED)})")
+    missing = [c for c in REQUIRED[sheet] if c not in df.columns]
+    if missing:
+        raise ValueError(f"missing columns in '{sheet}': {missing}")
+    return df
+
+
+def _clean(series: pd.Series) -> pd.Series:
+    return series.map(lambda v: "" if v is None else str(v).strip())
+
+
+def parse_bool(v) -> bool:
+    if isinstance(v, bool):
+        return v
+    if v is None:
+        return False
+    s = str(v).strip().lower()
+    return s in {"1", "true", "t", "yes", "y", "on"}
+
+
+LABEL_MAP = {
+    # capitalisation
+    "strong positive":   "Strong Positive",
+    "moderate positive": "Moderate Positive",
+    "weak positive":     "Weak Positive",
+    "weak negative":     "Weak Negative",
+    "moderate negative": "Moderate Negative",
+    "strong negative":   "Strong Negative",
+    # shorthands
+    "sp": "Strong Positive", "mp": "Moderate Positive", "wp": "Weak Positive",
+    "wn": "Weak Negative",   "mn": "Moderate Negative", "sn": "Strong Negative",
+    "+strong": "Strong Positive", "+moderate": "Moderate Positive", "+weak": "Weak Positive",
+    "-weak": "Weak Negative", "-moderate": "Moderate Negative", "-strong": "Strong Negative",
+}
+
+LABEL_VALUES = {
+    "Strong Positive": 1.5,
+    "Moderate Positive": 1.3,
+    "Weak Positive": 1.1,
+    "Weak Negative": 0.9,
+    "Moderate Negative": 0.7,
+    "Strong Negative": 0.5,
+}
+
+
+def normalize_label(v: str | None) -> str | None:
+    if not v:
+        return None
+    key = " ".join(str(v).strip().lower().split())
+    return LABEL_MAP.get(key)
+
+
+def label_to_numeric(v):
+    return LABEL_VALUES.get(normalize_label(v))
+
+
+def _rows(*columns) -> List[tuple]:
+    # tolist() hands back Python scalars, which the COPY adapters understand
+    return list(zip(*(c.tolist() for c in columns)))
+
+
+def _float_or_none(series: pd.Series) -> pd.Series:
+    return pd.to_numeric(series, errors="coerce").astype(object).where(lambda s: pd.notnull(s), None)
+
+
+# --- per-chunk cleaning (pure pandas, no DB) ----------------------------------
+def theme_rows(df: pd.DataFrame, sheet: str = "themes") -> List[tuple]:
+    """Theme names from a themes chunk, or the themes an interventions chunk refers to."""
+    column, src = ("name", 0) if sheet == "themes" else ("theme_name", 1)
+    names = _clean(require_columns(df, sheet)[column])
+    keep = names != ""
+    return [(src, n, name) for n, name in _rows(df.index[keep], names[keep])]
+
+
+def intervention_rows(df: pd.DataFrame) -> List[tuple]:
+    require_columns(df, "interventions")
+    name, theme = _clean(df["name"]), _clean(df["theme_name"])
+    base = _float_or_none(df["base_effectiveness"])
+    is_stage = df["is_stage"].map(parse_bool)
+    keep = (name != "") & (theme != "")
+    return _rows(df.index[keep], name[keep], theme[keep], base[keep], is_stage[keep])
+
+
+def stage_rows(df: pd.DataFrame) -> Tuple[List[tuple], Dict[str, int]]:
+    require_columns(df, "stages")
+    src, dst, rel = _clean(df["src_intervention_name"]), _clean(df["dst_intervention_name"]), _clean(df["relation_type"])
+    blank_rel = rel == ""
+    missing = ~blank_rel & ((src == "") | (dst == ""))
+    keep = ~blank_rel & ~missing
+    rows = _rows(df.index[keep], src[keep], dst[keep], rel[keep])
+    return rows, {"skipped_blank_rel": int(blank_rel.sum()), "skipped_missing": int(missing.sum())}
+
+
+def effect_rows(df: pd.DataFrame, sheet: str) -> Tuple[List[tuple], Dict[str, int]]:
+    require_columns(df, sheet)
+    cause_col = "cause_name" if sheet == "metric_effects" else "cause_intervention_name"
+    cause, effect = _clean(df[cause_col]), _clean(df["effected_intervention_name"])
+    metric_type = _clean(df["metric_type"]).map(lambda v: v or None)
+    lb, ub = _float_or_none(df["lower_bound"]), _float_or_none(df["upper_bound"])
+    mult = df["multiplier"].map(label_to_numeric)
+    reasoning = (_clean(df["reasoning"]).map(lambda v: v or None)
+                 if "reasoning" in df.columns else pd.Series([None] * len(df), index=df.index, dtype=object))
+
+    bad_bounds = lb.notna() & ub.notna() & ~(ub.astype(float) > lb.astype(float))
+    invalid = mult.isna() | (mult.fillna(1) <= 0) | bad_bounds
+    missing = ~invalid & ((cause == "") | (effect == ""))
+    keep = ~invalid & ~missing
+    rows = _rows(df.index[keep], cause[keep], effect[keep], metric_type[keep],
+                 lb[keep], ub[keep], mult[keep], reasoning[keep])
+    return rows, {"skipped_invalid": int(invalid.sum()), "skipped_missing": int(missing.sum())}
+
+
+# --- staging -----------------------------------------------------------------
+def create_staging(conn: Connection) -> None:
+    """(Re)create every staging table, empty; they are dropped on commit."""
+    for table, ddl in _STAGING.values():
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"CREATE TEMP TABLE {table} ({ddl}) ON COMMIT DROP"))
+
+
+def stage(conn: Connection, kind: str, rows: Sequence[tuple]) -> str:
+    """Append `rows` to the staging table for `kind`; returns the table name."""
+    table, ddl = _STAGING[kind]
+    copy_rows(conn, table, [c.split()[0] for c in ddl.split(", ")], rows)
+    return table
+
+
+@dataclass
+class CleanChunk:
+    """One parsed chunk, cleaned and ready to stage; plain data, so pool workers can hand it back."""
+    sheet: str
+    size: int
+    rows: Dict[str, List[tuple]]  # staging table kind -> rows
+    skipped: Dict[str, int]
+    seconds: float = 0.0
+
+
+def clean_chunk(sheet: str, df: pd.DataFrame) -> CleanChunk:
+    """Validate and clean one chunk of `sheet` (no DB access)."""
+    t0 = time.perf_counter()
+    skipped: Dict[str, int] = {}
+    if sheet == "themes":
+        rows = {"themes": theme_rows(df)}
+    elif sheet == "interventions":
+        rows = {"themes": theme_rows(df, "interventions"), "interventions": intervention_rows(df)}
+    elif sheet == "stages":
+        stage_list, skipped = stage_rows(df)
+        rows = {"stages": stage_list}
+    else:
+        effect_list, skipped = effect_rows(df, sheet)
+        rows = {sheet: effect_list}
+    return CleanChunk(sheet, len(df), rows, skipped, time.perf_counter() - t0)
+
+
+def clean_chunks(chunks: Iterable[Tuple[str, pd.DataFrame]]) -> Iterator[CleanChunk]:
+    """Clean (sheet, DataFrame) chunks in this process; `seconds` includes reading the chunk."""
+    it = iter(chunks)
+    while True:
+        t0 = time.perf_counter()
+        try:
+            sheet, df = next(it)
+        except StopIteration:
+            return
+        chunk = clean_chunk(sheet, df)
+        chunk.seconds = time.perf_counter() - t0
+        yield chunk
+
+
+def load_chunk(conn: Connection, chunk: CleanChunk, stats: SheetStats) -> None:
+    """Stage a cleaned chunk, updating `stats`."""
+    for kind, rows in chunk.rows.items():
+        stage(conn, kind, rows)
+    stats.rows += chunk.size
+    stats.chunks += 1
+    for key, value in chunk.skipped.items():
+        setattr(stats, key, getattr(stats, key) + value)
+
+
+def copy_rows(conn: Connection, table: str, columns: Sequence[str], rows: Iterable[Sequence[Any]]) -> None:
+    """COPY FROM STDIN on psycopg connections; an executemany INSERT on anything else."""
+    raw = conn.connection.driver_connection
+    cols = ", ".join(columns)
+    if psycopg is not None and isinstance(raw, psycopg.Connection):
+        with raw.cursor() as cur, cur.copy(f"COPY {table} ({cols}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(row)
+        return
+    rows = list(rows)
+    if rows:
+        conn.execute(
+            text(f"INSERT INTO {table} ({cols}) VALUES ({', '.join(f':{c}' for c in columns)})"),
+            [dict(zip(columns, r)) for r in rows],
+        )
+
+
+# --- merges ------------------------------------------------------------------
+def _content_hash(*exprs: str) -> str:
+    # numerics go through float8 so 1.5 and 1.50 hash alike
+    return f"md5(ROW({', '.join(exprs)})::text)"
+
+
+def _effect_hash(alias: str, cause: str, effect: str) -> str:
+    return _content_hash(
+        f"{alias}.{cause}", f"{alias}.{effect}", f"{alias}.metric_type::text",
+        f"{alias}.lower_bound::float8", f"{alias}.upper_bound::float8",
+        f"{alias}.multiplier::float8", f"{alias}.reasoning",
+    )
+
+
+def merge_themes(conn: Connection, changes: ChangeSet) -> int:
+    """Insert staged theme names not present yet (case-insensitive); returns rows inserted."""
+    ids = conn.execute(text("""
+        WITH src AS (
+          SELECT DISTINCT ON (lower(name)) name
+          FROM stg_themes
+          ORDER BY lower(name), src, n
+        ),
+        ins AS (
+          INSERT INTO themes (name)
+          SELECT s.name FROM src s
+          WHERE NOT EXISTS (SELECT 1 FROM themes t WHERE lower(trim(t.name)) = lower(s.name))
+          ON CONFLICT (name) DO NOTHING
+          RETURNING id
+        )
+        SELECT ARRAY(SELECT id FROM ins)
+    """)).scalar() or []
+    changes.theme_ids.update(ids)
+    changes.count("themes", inserted=len(ids))
+    return len(ids)
+
+
+def merge_interventions(conn: Connection, changes: ChangeSet) -> Tuple[int, int, int]:
+    """
+    Upsert interventions by name (last sheet row wins), touching only rows
+    whose content hash changed; returns (inserted, updated, skipped_missing_theme).
+    """
+    old = _content_hash("interventions.theme_id", "interventions.base_effectiveness::float8", "interventions.is_stage")
+    new = _content_hash("EXCLUDED.theme_id", "EXCLUDED.base_effectiveness::float8", "EXCLUDED.is_stage")
+    row = conn.execute(text(f"""
+        WITH th AS (
+          SELECT DISTINCT ON (lower(trim(name))) lower(trim(name)) AS key, id
+          FROM themes
+          ORDER BY lower(trim(name)), id
+        ),
+        src AS (
+          SELECT DISTINCT ON (s.name) s.name, th.id AS theme_id, s.base_effectiveness, s.is_stage
+          FROM stg_interventions s
+          JOIN th ON th.key = lower(s.theme_name)
+          ORDER BY s.name, s.n DESC
+        ),
+        ins AS (
+          INSERT INTO interventions (name, theme_id, base_effectiveness, is_stage)
+          SELECT name, theme_id, base_effectiveness, is_stage FROM src
+          ON CONFLICT (name) DO UPDATE
+            SET theme_id = EXCLUDED.theme_id,
+                base_effectiveness = EXCLUDED.base_effectiveness,
+                is_stage = EXCLUDED.is_stage
+            WHERE {old} <> {new}
+          RETURNING id, (xmax = 0) AS inserted
+        )
+        SELECT ARRAY(SELECT id FROM ins WHERE inserted) AS inserted_ids,
+               ARRAY(SELECT id FROM ins WHERE NOT inserted) AS updated_ids,
+               (SELECT COUNT(*) FROM stg_interventions s
+                WHERE NOT EXISTS (SELECT 1 FROM th WHERE th.key = lower(s.theme_name))) AS unresolved
+    """)).mappings().one()
+    inserted, updated = list(row["inserted_ids"] or []), list(row["updated_ids"] or [])
+    changes.intervention_ids.update(inserted + updated)
+    changes.count("interventions", inserted=len(inserted), updated=len(updated))
+    return len(inserted), len(updated), int(row["unresolved"])
+
+
+def merge_stages(conn: Connection, changes: ChangeSet) -> Tuple[int, int, int]:
+    """
+    Make `stages` match the staged relations (resolved by intervention name):
+    insert the new ones, delete the ones no longer listed; returns
+    (inserted, deleted, unresolved).
+    """
+    row = conn.execute(text(f"""
+        WITH {_INTERVENTION_KEYS},
+        r AS (
+          SELECT DISTINCT a.id AS src, b.id AS dst, s.relation_type
+          FROM stg_stages s
+          JOIN iv a ON a.key = lower(s.src_name)
+          JOIN iv b ON b.key = lower(s.dst_name)
+        ),
+        ins AS (
+          INSERT INTO stages (src_intervention_id, dst_intervention_id, relation_type)
+          SELECT src, dst, relation_type FROM r
+          ON CONFLICT (src_intervention_id, dst_intervention_id, relation_type) DO NOTHING
+          RETURNING src_intervention_id AS src, dst_intervention_id AS dst, relation_type::text AS rel
+        ),
+        del AS (
+          DELETE FROM stages x
+          WHERE NOT EXISTS (
+            SELECT 1 FROM r
+            WHERE r.src = x.src_intervention_id AND r.dst = x.dst_intervention_id
+              AND r.relation_type = x.relation_type::text
+          )
+          RETURNING x.src_intervention_id AS src, x.dst_intervention_id AS dst, x.relation_type::text AS rel
+        ),
+        chg AS (SELECT * FROM ins UNION ALL SELECT * FROM del)
+        SELECT (SELECT COUNT(*) FROM ins) AS inserted,
+               (SELECT COUNT(*) FROM del) AS deleted,
+               (SELECT COALESCE(json_agg(json_build_array(src, dst, rel)), '[]') FROM chg) AS changed,
+               (SELECT COUNT(*) FROM stg_stages s
+                WHERE NOT EXISTS (SELECT 1 FROM iv WHERE iv.key = lower(s.src_name))
+                   OR NOT EXISTS (SELECT 1 FROM iv WHERE iv.key = lower(s.dst_name))) AS unresolved
+    """)).mappings().one()
+    for src, dst, rel in row["changed"] or []:
+        changes.intervention_ids.add(src)
+        changes.stage_rules.append((dst, rel))
+    changes.count("stages", inserted=int(row["inserted"]), deleted=int(row["deleted"]))
+    return int(row["inserted"]), int(row["deleted"]), int(row["unresolved"])
+
+
+def merge_effects(conn: Connection, sheet: str, changes: ChangeSet) -> Tuple[int, int, int]:
+    """
+    Make metric_effects / intervention_effects match the staged rows by
+    content hash (cause, effect, type, bounds, multiplier, reasoning): insert
+    rows whose hash is new, delete rows whose hash is gone plus duplicate
+    copies of the same hash. A changed row is a delete and an insert. Returns
+    (inserted, deleted, unresolved).
+    """
+    if sheet == "metric_effects":
+        cause_col, cause_join, cause_expr = "cause", "", "s.cause_name"
+    else:
+        cause_col = "cause_intervention"
+        cause_join, cause_expr = "JOIN iv c ON c.key = lower(s.cause_name)", "c.id"
+    table, staging = sheet, _STAGING[sheet][0]
+    row = conn.execute(text(f"""
+        WITH {_INTERVENTION_KEYS},
+        r AS (
+          SELECT {cause_expr} AS cause, e.id AS effect, CAST(s.metric_type AS metric_type) AS metric_type,
+                 s.lower_bound, s.upper_bound, s.multiplier, s.reasoning
+          FROM {staging} s
+          {cause_join}
+          JOIN iv e ON e.key = lower(s.effect_name)
+        ),
+        src AS (
+          SELECT DISTINCT ON (h) *
+          FROM (SELECT r.*, {_effect_hash("r", "cause", "effect")} AS h FROM r) hashed
+          ORDER BY h
+        ),
+        cur AS (
+          SELECT x.id, {_effect_hash("x", cause_col, "effected_intervention")} AS h,
+                 row_number() OVER (PARTITION BY {_effect_hash("x", cause_col, "effected_intervention")}
+                                    ORDER BY x.id) AS k
+          FROM {table} x
+        ),
+        ins AS (
+          INSERT INTO {table}
+            ({cause_col}, effected_intervention, metric_type, lower_bound, upper_bound, multiplier, reasoning)
+          SELECT d.cause, d.effect, d.metric_type, d.lower_bound, d.upper_bound, d.multiplier, d.reasoning
+          FROM src d
+          WHERE NOT EXISTS (SELECT 1 FROM cur WHERE cur.h = d.h)
+          RETURNING {cause_col} AS cause, effected_intervention AS effect,
+                    lower_bound::float8 AS lb, upper_bound::float8 AS ub
+        ),
+        del AS (
+          DELETE FROM {table} x
+          USING cur
+          WHERE x.id = cur.id
+            AND (cur.k > 1 OR NOT EXISTS (SELECT 1 FROM src WHERE src.h = cur.h))
+          RETURNING x.{cause_col} AS cause, x.effected_intervention AS effect,
+                    x.lower_bound::float8 AS lb, x.upper_bound::float8 AS ub
+        ),
+        chg AS (SELECT * FROM ins UNION ALL SELECT * FROM del)
+        SELECT (SELECT COUNT(*) FROM ins) AS inserted,
+               (SELECT COUNT(*) FROM del) AS deleted,
+               (SELECT COALESCE(json_agg(json_build_array(cause, effect, lb, ub)), '[]') FROM chg) AS changed,
+               (SELECT COUNT(*) FROM {staging}) - (SELECT COUNT(*) FROM r) AS unresolved
+    """)).mappings().one()
+    for cause, effect, lb, ub in row["changed"] or []:
+        changes.intervention_ids.add(effect)
+        if sheet == "metric_effects":
+            changes.metric_rules.append((cause, lb, ub))
+        else:
+            changes.cause_interventions.add(cause)
+    changes.count(sheet, inserted=int(row["inserted"]), deleted=int(row["deleted"]))
+    return int(row["inserted"]), int(row["deleted"]), int(row["unresolved"])
+
+
+# --- whole ingest ------------------------------------------------------------
+def ingest(conn: Connection, chunks: Iterable[CleanChunk]) -> Tuple[Dict[str, Dict[str, Any]], ChangeSet]:
+    """
+    Stage every cleaned chunk from `chunks` (clean_chunks() or
+    parallel.parse_uploads()), then diff-merge, all on `conn`
+    (the caller owns the transaction). Sheets may arrive in any order and in
+    any number of chunks. A sheet that arrives is authoritative for its table:
+    rows missing from it are deleted from stages and the effects tables
+    (themes and interventions are only inserted/updated - projects point at
+    them). Sheets that never arrive are left alone.
+
+    Returns (per sheet merged: {"success": msg, "rows", "chunks", "seconds",
+    "rows_per_second"}, ChangeSet of what actually changed).
+    """
+    create_staging(conn)
+    stats: Dict[str, SheetStats] = {}
+    for chunk in chunks:
+        s = stats.setdefault(chunk.sheet, SheetStats())
+        t0 = time.perf_counter()
+        load_chunk(conn, chunk, s)
+        s.seconds += chunk.seconds + time.perf_counter() - t0
+
+    if "interventions" in stats:  # interventions stage theme names too
+        stats.setdefault("themes", SheetStats())
+
+    changes = ChangeSet()
+    results: Dict[str, Dict[str, Any]] = {}
+    for sheet in REQUIRED:  # merge order: names must exist before they are looked up
+        if sheet not in stats:
+            continue
+        s = stats[sheet]
+        t0 = time.perf_counter()
+        msg = _merge(conn, sheet, s, changes)
+        s.seconds += time.perf_counter() - t0
+        results[sheet] = {"success": msg, "rows": s.rows, "chunks": s.chunks,
+                          "seconds": round(s.seconds, 3), "rows_per_second": round(s.rows_per_second, 1)}
+    return results, changes
+
+
+def _merge(conn: Connection, sheet: str, s: SheetStats, changes: ChangeSet) -> str:
+    if sheet == "themes":
+        return f"themes: inserted {merge_themes(conn, changes)} new rows by name"
+    if sheet == "interventions":
+        inserted, updated, unresolved = merge_interventions(conn, changes)
+        msg = f"interventions: processed {s.rows} rows (inserted {inserted}, updated {updated})"
+        return msg + (f" (skipped {unresolved} missing theme_id)" if unresolved else "")
+    if sheet == "stages":
+        inserted, deleted, unresolved = merge_stages(conn, changes)
+        details = []
+        if s.skipped_missing + unresolved:
+            details.append(f"skipped {s.skipped_missing + unresolved} (missing name/id)")
+        if s.skipped_blank_rel:
+            details.append(f"skipped {s.skipped_blank_rel} (blank relation_type)")
+        msg = f"stages: processed {s.rows} rows (inserted {inserted}, deleted {deleted})"
+        return msg + (" (" + ", ".join(details) + ")" if details else "")
+    inserted, deleted, unresolved = merge_effects(conn, sheet, changes)
+    msg = f"{sheet}: processed {s.rows} rows (inserted {inserted}, deleted {deleted})"
+    if s.skipped_missing + unresolved:
+        msg += f"; skipped {s.skipped_missing + unresolved} missing ID/name"
+    if s.skipped_invalid:
+        msg += f"; skipped {s.skipped_invalid} invalid bounds/multiplier"
+    return msg
@@ -0,0 +1,105 @@
+"""
+What an ingest changed, and which projects that can affect.
+
+Merges record the rows they inserted, updated and deleted here; after the
+merge `resolve_projects` narrows the change down to the projects whose
+runtime scores can move, so callers can rescore (POST /rescore with
+project_ids) and invalidate caches for those only.
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from app.services.rules_metric import PROJECT_METRIC_COLUMNS
+
+
+@dataclass
+class ChangeSet:
+    """Per-table row counts plus the interventions/projects whose scores can change."""
+    inserted: Dict[str, int] = field(default_factory=dict)
+    updated: Dict[str, int] = field(default_factory=dict)
+    deleted: Dict[str, int] = field(default_factory=dict)
+    theme_ids: Set[int] = field(default_factory=set)
+    intervention_ids: Set[int] = field(default_factory=set)
+    # None until resolve_projects(); stays None when every project is affected
+    project_ids: Optional[Set[int]] = None
+    all_projects: bool = False
+
+    # changed rule rows, for resolve_projects()
+    metric_rules: List[Tuple[str, Optional[float], Optional[float]]] = field(default_factory=list)
+    cause_interventions: Set[int] = field(default_factory=set)
+    stage_rules: List[Tuple[int, str]] = field(default_factory=list)
+
+    def count(self, table: str, inserted: int = 0, updated: int = 0, deleted: int = 0) -> None:
+        for bucket, n in ((self.inserted, inserted), (self.updated, updated), (self.deleted, deleted)):
+            if n:
+                bucket[table] = bucket.get(table, 0) + n
+
+    @property
+    def empty(self) -> bool:
+        return not (self.inserted or self.updated or self.deleted)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "deleted": self.deleted,
+            "theme_ids": sorted(self.theme_ids),
+            "intervention_ids": sorted(self.intervention_ids),
+            "all_projects": self.all_projects,
+            "project_ids": None if self.project_ids is None else sorted(self.project_ids),
+        }
+
+
+def resolve_projects(conn: Connection, changes: ChangeSet) -> ChangeSet:
+    """
+    Fill in `changes.project_ids`:
+
+      - a new or changed intervention is scored for every project -> all projects
+      - a metric_effects row: projects whose metric falls inside its bounds
+      - an intervention_effects row: projects that implemented its cause
+      - a mutex stage: projects that implemented its dst; a prereq stage:
+        projects that have not (their unmet count moves)
+    """
+    if changes.all_projects or changes.inserted.get("interventions") or changes.updated.get("interventions"):
+        changes.all_projects, changes.project_ids = True, None
+        return changes
+    if not (changes.metric_rules or changes.cause_interventions or changes.stage_rules):
+        changes.project_ids = set()
+        return changes
+
+    unpivot = ", ".join(f"('{c}', p.{c}::float8)" for c in sorted(PROJECT_METRIC_COLUMNS))
+    rows = conn.execute(
+        text(f"""
+            SELECT ii.project_id
+            FROM implemented_interventions ii
+            WHERE ii.impl_id = ANY(CAST(:causes AS integer[]))
+            UNION
+            SELECT p.id
+            FROM projects p
+            CROSS JOIN LATERAL (VALUES {unpivot}) AS m(name, value)
+            JOIN unnest(CAST(:metrics AS text[]), CAST(:lbs AS float8[]), CAST(:ubs AS float8[])) AS r(name, lb, ub)
+              ON r.name = m.name
+             AND m.value IS NOT NULL
+             AND (r.lb IS NULL OR r.lb <= m.value)
+             AND (r.ub IS NULL OR r.ub >= m.value)
+            UNION
+            SELECT p.id
+            FROM projects p
+            JOIN unnest(CAST(:dsts AS integer[]), CAST(:rels AS text[])) AS st(dst, rel)
+              ON (st.rel = 'mutex') = EXISTS (
+                   SELECT 1 FROM implemented_interventions x
+                   WHERE x.project_id = p.id AND x.impl_id = st.dst
+                 )
+        """),
+        {
+            "causes": sorted(changes.cause_interventions),
+            "metrics": [m for m, _, _ in changes.metric_rules],
+            "lbs": [lb for _, lb, _ in changes.metric_rules],
+            "ubs": [ub for _, _, ub in changes.metric_rules],
+            "dsts": [d for d, _ in changes.stage_rules],
+            "rels": [r for _, r in changes.stage_rules],
+        },
+    ).scalars().all()
+    changes.project_ids = {int(r) for r in rows}
+    return changes
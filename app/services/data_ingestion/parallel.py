@@ -0,0 +1,109 @@
+"""
+Parallel parsing and validation for ingest.
+
+Parsing a sheet and cleaning its rows needs no database, so each input
+sheet (a CSV/Parquet file, or one sheet of a workbook) is handed to a
+process-pool worker. A worker streams its sheet through the chunked
+readers and bulk.clean_chunk and pickles the cleaned chunks into a spool
+file. The parent process reads those spool files back one chunk at a time,
+in job order, and stages them, so memory stays flat and only COPY and the
+merges - which have ordering constraints - run serially on the connection.
+"""
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+from . import bulk, readers
+
+Job = Tuple[str, str, Optional[str]]  # (filename, path on disk, sheet)
+
+
+def default_workers() -> int:
+    return int(os.environ.get("INGEST_WORKERS") or os.cpu_count() or 1)
+
+
+def _pool_context():
+    # never plain fork: the caller is usually a threaded web or job-worker process,
+    # and a forked child inherits other threads' held locks and open DB sockets
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _on_disk(files: Iterable[Tuple[str, readers.Source]], spool: str) -> List[Tuple[str, str]]:
+    """(filename, path) for every upload; streams are copied to `spool` so workers can open them."""
+    out = []
+    for i, (filename, source) in enumerate(files):
+        if isinstance(source, (str, Path)):
+            out.append((filename, str(source)))
+            continue
+        path = os.path.join(spool, f"upload-{i}{Path(filename).suffix.lower()}")
+        with open(path, "wb") as fh:
+            shutil.copyfileobj(source, fh)
+        out.append((filename, path))
+    return out
+
+
+def plan_jobs(files: Iterable[Tuple[str, str]], sheet: Optional[str] = None) -> List[Job]:
+    """One job per input sheet; workbooks are split by sheet. Validates names up front."""
+    jobs: List[Job] = []
+    for filename, path in files:
+        if readers.file_kind(filename) == "xlsx":
+            jobs.extend((filename, path, name) for name in readers.xlsx_sheets(path))
+        else:
+            jobs.append((filename, path, readers.sheet_for(filename, sheet)))
+    return jobs
+
+
+def _job_chunks(job: Job, chunk_rows: int) -> Iterator[readers.Chunk]:
+    filename, path, sheet = job
+    return readers.iter_upload(filename, path, sheet, chunk_rows)
+
+
+def _parse_job(job: Job, chunk_rows: int, spool: str) -> str:
+    """Worker: clean every chunk of one input sheet into a spool file; returns its path."""
+    fd, out = tempfile.mkstemp(prefix="clean-", suffix=".pickle", dir=spool)
+    with os.fdopen(fd, "wb") as fh:
+        for chunk in bulk.clean_chunks(_job_chunks(job, chunk_rows)):
+            pickle.dump(chunk, fh, protocol=pickle.HIGHEST_PROTOCOL)
+    return out
+
+
+def _read_spool(path: str) -> Iterator[bulk.CleanChunk]:
+    try:
+        with open(path, "rb") as fh:
+            while True:
+                try:
+                    yield pickle.load(fh)
+                except EOFError:
+                    return
+    finally:
+        os.unlink(path)
+
+
+def parse_uploads(
+    files: Iterable[Tuple[str, readers.Source]],
+    sheet: Optional[str] = None,
+    chunk_rows: int = readers.DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+) -> Iterator[bulk.CleanChunk]:
+    """
+    Cleaned chunks of every input, ready for bulk.ingest. With `workers > 1`
+    and more than one input sheet, sheets are parsed concurrently in a
+    process pool; chunks are still yielded in input order.
+    """
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    with tempfile.TemporaryDirectory(prefix="ingest-") as spool:
+        jobs = plan_jobs(_on_disk(files, spool), sheet)
+        if workers == 1 or len(jobs) <= 1:
+            for job in jobs:
+                yield from bulk.clean_chunks(_job_chunks(job, chunk_rows))
+            return
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=_pool_context()) as pool:
+            futures = [pool.submit(_parse_job, job, chunk_rows, spool) for job in jobs]
+            for future in futures:
+                yield from _read_spool(future.result())
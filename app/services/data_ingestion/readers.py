@@ -0,0 +1,115 @@
+"""
+Chunked readers for reference-data uploads.
+
+Every reader yields (sheet, DataFrame) pairs of at most `chunk_rows` rows,
+with lower-cased column names, None for blanks and an index that keeps
+counting across chunks (the sheet row number). Nothing holds more than one
+chunk: XLSX goes through openpyxl's read-only mode, CSV through pandas'
+chunked reader and Parquet through pyarrow's record batches.
+"""
+from pathlib import Path
+from typing import IO, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+import pandas as pd
+from openpyxl import load_workbook
+from .bulk import REQUIRED
+
+DEFAULT_CHUNK_ROWS = 5000
+
+Chunk = Tuple[str, pd.DataFrame]
+Source = Union[str, Path, IO[bytes]]
+
+
+def _frame(rows: Sequence[Sequence], columns: List[str], start: int) -> pd.DataFrame:
+    df = pd.DataFrame(list(rows), columns=columns, index=range(start, start + len(rows)), dtype=object)
+    return df.where(pd.notnull(df), None)
+
+
+def _columns(header: Iterable) -> List[str]:
+    return [str(c).strip().lower() if c is not None else "" for c in header]
+
+
+def sheet_for(filename: str, sheet: Optional[str] = None) -> str:
+    """Target sheet of a single-sheet upload: `sheet` if given, else the file stem."""
+    name = (sheet or Path(filename).stem).strip().lower()
+    if name not in REQUIRED:
+        raise ValueError(f"unknown sheet '{name}' (expected one of {sorted(REQUIRED)})")
+    return name
+
+
+def xlsx_sheets(source: Source) -> List[str]:
+    """Known sheets of a workbook, in workbook order (reads only the workbook index)."""
+    wb = load_workbook(source, read_only=True)
+    try:
+        return [name.strip().lower() for name in wb.sheetnames if name.strip().lower() in REQUIRED]
+    finally:
+        wb.close()
+
+
+def iter_xlsx(source: Source, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+              only: Optional[str] = None) -> Iterator[Chunk]:
+    """Every known sheet of a workbook (or just `only`), in workbook order; other sheets are ignored."""
+    wb = load_workbook(source, read_only=True, data_only=True)
+    try:
+        for ws in wb.worksheets:
+            sheet = ws.title.strip().lower()
+            if sheet not in REQUIRED or (only is not None and sheet != only):
+                continue
+            rows = ws.iter_rows(values_only=True)
+            columns = _columns(next(rows, ()))
+            batch, start = [], 0
+            for row in rows:
+                if all(v is None for v in row):  # trailing/blank rows, as read_excel drops them
+                    continue
+                batch.append(row[:len(columns)])
+                if len(batch) == chunk_rows:
+                    yield sheet, _frame(batch, columns, start)
+                    start += len(batch)
+                    batch = []
+            if batch or start == 0:
+                yield sheet, _frame(batch, columns, start)
+    finally:
+        wb.close()
+
+
+def iter_csv(source: Source, sheet: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    for df in pd.read_csv(source, chunksize=chunk_rows, dtype=object, skip_blank_lines=True):
+        df.columns = _columns(df.columns)
+        yield sheet, df.where(pd.notnull(df), None)
+
+
+def iter_parquet(source: Source, sheet: str, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("parquet uploads need pyarrow installed")
+    start = 0
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+        df = batch.to_pandas().astype(object)
+        df.columns = _columns(df.columns)
+        df.index = range(start, start + len(df))
+        start += len(df)
+        yield sheet, df.where(pd.notnull(df), None)
+
+
+def file_kind(filename: str) -> str:
+    """"xlsx", "csv" or "parquet", from the file extension."""
+    ext = Path(filename).suffix.lower()
+    if ext in (".xlsx", ".xlsm"):
+        return "xlsx"
+    if ext == ".csv":
+        return "csv"
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    raise ValueError(f"unsupported file type '{ext or filename}' (expected .xlsx, .csv or .parquet)")
+
+
+def iter_upload(filename: str, source: Source, sheet: Optional[str] = None,
+                chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[Chunk]:
+    """Dispatch on the file extension (.xlsx/.xlsm, .csv, .parquet/.pq)."""
+    kind = file_kind(filename)
+    if kind == "xlsx":
+        return iter_xlsx(source, chunk_rows, only=sheet)
+    if kind == "csv":
+        return iter_csv(source, sheet_for(filename, sheet), chunk_rows)
+    return iter_parquet(source, sheet_for(filename, sheet), chunk_rows)
+
@@ -0,0 +1,93 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+from .types import InterventionRule
+
+
+@dataclass(frozen=True)
+class Edge:
+    src: int
+    dst: int
+    multiplier: float
+    strength: float     # |multiplier - 1|, the pruning key
+
+    @property
+    def weight(self) -> float:
+        """Signed strength: > 0 boosts the effected intervention, < 0 dampens it."""
+        if self.multiplier > 1:
+            return self.strength
+        if self.multiplier < 1:
+            return -self.strength
+        return 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"src": self.src, "dst": self.dst, "weight": self.weight, "multiplier": self.multiplier}
+
+
+class _Adjacency:
+    """node -> its edges, strongest first, with negated strengths alongside for bisecting."""
+
+    def __init__(self, groups: Dict[int, List[Edge]]):
+        self._edges: Dict[int, Tuple[Edge, ...]] = {}
+        self._keys: Dict[int, Tuple[float, ...]] = {}
+        for node, edges in groups.items():
+            edges.sort(key=lambda e: (-e.strength, e.src, e.dst))
+            self._edges[node] = tuple(edges)
+            self._keys[node] = tuple(-e.strength for e in edges)
+
+    def at_least(self, node: int, epsilon: float) -> Tuple[Edge, ...]:
+        edges = self._edges.get(node)
+        if not edges:
+            return ()
+        return edges[:bisect_right(self._keys[node], -epsilon)]
+
+
+class EdgeIndex:
+    """
+    Adjacency of intervention_effects in both directions (cause -> effected
+    and effected -> cause) with |multiplier - 1| precomputed and each list
+    sorted strongest first, so "edges of node u stronger than epsilon" is a
+    bisect and a slice. Built once per catalogue snapshot (Catalogue.edge_index).
+    """
+
+    def __init__(self, rules: Iterable[InterventionRule]):
+        out: Dict[int, List[Edge]] = {}
+        inc: Dict[int, List[Edge]] = {}
+        for r in rules:
+            e = Edge(r.cause_intervention_id, r.effect_intervention_id, r.multiplier, abs(r.multiplier - 1.0))
+            out.setdefault(e.src, []).append(e)
+            inc.setdefault(e.dst, []).append(e)
+        self._out = _Adjacency(out)
+        self._in = _Adjacency(inc)
+
+    def outgoing(self, node: int, epsilon: float = 0.0) -> Tuple[Edge, ...]:
+        return self._out.at_least(node, epsilon)
+
+    def incoming(self, node: int, epsilon: float = 0.0) -> Tuple[Edge, ...]:
+        return self._in.at_least(node, epsilon)
+
+    def edges_between(self, nodes: Iterable[int], epsilon: float = 0.0) -> List[Edge]:
+        """Edges with both ends in `nodes` and strength >= epsilon, grouped by source in `nodes` order."""
+        order = list(nodes)
+        members = set(order)
+        return [e for u in order for e in self.outgoing(u, epsilon) if e.dst in members]
+
+    def neighbourhood(self, focus: int, depth: int, epsilon: float = 0.0) -> Dict[int, int]:
+        """Interventions within `depth` hops of `focus` along edges of strength >= epsilon, either direction -> hops."""
+        hops = {focus: 0}
+        frontier = [focus]
+        for d in range(1, depth + 1):
+            nxt = []
+            for u in frontier:
+                for e in self.outgoing(u, epsilon):
+                    if e.dst not in hops:
+                        hops[e.dst] = d
+                        nxt.append(e.dst)
+                for e in self.incoming(u, epsilon):
+                    if e.src not in hops:
+                        hops[e.src] = d
+                        nxt.append(e.src)
+            if not nxt:
+                break
+            frontier = nxt
+        return hops
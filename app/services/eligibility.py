@@ -0,0 +1,117 @@
+from collections import Counter
+from typing import TYPE_CHECKING, Dict, Iterable, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+if TYPE_CHECKING:
+    from .catalogue import Catalogue
+
+
+def counters_sql(project_id: str, intervention_id: str, is_stage: str) -> str:
+    """
+    SQL for (implemented, unmet_prereqs, mutex_hits) of one runtime_scores row,
+    given expressions for its project id, intervention id and interventions.is_stage.
+    """
+    return f"""
+        EXISTS (
+          SELECT 1 FROM implemented_interventions ii
+          WHERE ii.project_id = {project_id} AND ii.impl_id = {intervention_id}
+        ),
+        CASE WHEN COALESCE({is_stage}, FALSE) THEN (
+          SELECT COUNT(*) FROM stages s
+          WHERE s.src_intervention_id = {intervention_id}
+            AND s.relation_type = 'prereq'
+            AND NOT EXISTS (
+              SELECT 1 FROM implemented_interventions ii
+              WHERE ii.project_id = {project_id} AND ii.impl_id = s.dst_intervention_id
+            )
+        ) ELSE 0 END,
+        CASE WHEN COALESCE({is_stage}, FALSE) THEN (
+          SELECT COUNT(*) FROM stages s
+          WHERE s.src_intervention_id = {intervention_id}
+            AND s.relation_type = 'mutex'
+            AND EXISTS (
+              SELECT 1 FROM implemented_interventions ii
+              WHERE ii.project_id = {project_id} AND ii.impl_id = s.dst_intervention_id
+            )
+        ) ELSE 0 END"""
+
+
+def refresh(conn: Connection, project_ids: Sequence[int]) -> None:
+    """
+    Recompute every eligibility counter for `project_ids` from scratch.
+
+    Used when runtime_scores rows are (re)created or reference stages change;
+    the per-apply path is `mark_implemented`.
+    """
+    ids = [int(p) for p in project_ids]
+    if not ids:
+        return
+    conn.execute(
+        text(f"""
+            UPDATE runtime_scores r
+            SET (implemented, unmet_prereqs, mutex_hits) = ({counters_sql("r.project_id", "r.intervention_id", "i.is_stage")}
+            )
+            FROM interventions i
+            WHERE i.id = r.intervention_id
+              AND r.project_id = ANY(:ids)
+        """),
+        {"ids": ids},
+    )
+
+
+def implemented_deltas(catalogue: "Catalogue", newly_implemented: Iterable[int]) -> Dict[int, tuple]:
+    """
+    {intervention_id: (implemented, unmet_prereqs delta, mutex_hits delta)} for a set of
+    newly implemented interventions. Touches only their stage neighbours, so the
+    cost is O(sum of their degrees).
+    """
+    implemented = set(int(i) for i in newly_implemented)
+    unmet: Counter = Counter()
+    hits: Counter = Counter()
+    for iid in implemented:
+        for src in catalogue.prereq_dependents.get(iid, ()):
+            unmet[src] -= 1
+        for src in catalogue.mutex_dependents.get(iid, ()):
+            hits[src] += 1
+    return {
+        iid: (iid in implemented, unmet[iid], hits[iid])
+        for iid in implemented | set(unmet) | set(hits)
+    }
+
+
+def mark_implemented(conn: Connection, project_id: int, newly_implemented: Iterable[int],
+                     catalogue: "Catalogue") -> int:
+    """
+    Apply the eligibility effect of interventions that were *just* inserted into
+    implemented_interventions (pass only new ids - the deltas are not idempotent).
+    One UPDATE over the touched rows; returns how many rows were addressed.
+    Rows that do not exist yet are not created here: whoever inserts them
+    fills the counters in with `counters_sql`.
+    """
+    deltas = implemented_deltas(catalogue, newly_implemented)
+    if not deltas:
+        return 0
+    iids = list(deltas)
+    conn.execute(
+        text("""
+            UPDATE runtime_scores r
+            SET implemented   = r.implemented OR x.impl,
+                unmet_prereqs = GREATEST(r.unmet_prereqs + x.du, 0),
+                mutex_hits    = r.mutex_hits + x.dm
+            FROM unnest(
+              CAST(:iids AS integer[]), CAST(:impl AS boolean[]),
+              CAST(:du AS integer[]), CAST(:dm AS integer[])
+            ) AS x(iid, impl, du, dm)
+            WHERE r.project_id = :pid
+              AND r.intervention_id = x.iid
+        """),
+        {
+            "pid": project_id,
+            "iids": iids,
+            "impl": [deltas[i][0] for i in iids],
+            "du": [deltas[i][1] for i in iids],
+            "dm": [deltas[i][2] for i in iids],
+        },
+    )
+    return len(iids)
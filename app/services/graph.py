@@ -0,0 +1,108 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from . import catalogue as catalogue_service
+
+DEFAULT_TOP_N = 30
+MAX_TOP_N = 500
+DEFAULT_EPSILON = 0.05
+DEFAULT_DEPTH = 1
+MAX_DEPTH = 4
+
+# top-N by score; the pinned (focus) intervention sorts first whatever its score
+_NODES_SQL = """
+    SELECT rs.intervention_id AS id, rs.theme_weighted_effectiveness AS score
+    FROM runtime_scores rs
+    WHERE rs.project_id = :project_id {candidates}
+    ORDER BY (rs.intervention_id = :pinned) DESC, rs.theme_weighted_effectiveness DESC, rs.intervention_id DESC
+    LIMIT :top_n
+"""
+NODES_SQL = text(_NODES_SQL.format(candidates=""))
+NODES_IN_SQL = text(_NODES_SQL.format(candidates="AND rs.intervention_id = ANY(:ids)"))
+
+
+@dataclass(frozen=True)
+class GraphParams:
+    top_n: int = DEFAULT_TOP_N
+    epsilon: float = DEFAULT_EPSILON
+    theme_ids: Tuple[int, ...] = ()
+    focus: Optional[int] = None
+    depth: int = DEFAULT_DEPTH
+
+    @classmethod
+    def from_args(cls, args: Mapping[str, str]) -> "GraphParams":
+        """Parse query args (top_n, epsilon, theme_ids=1,2, focus, depth); ValueError on bad input."""
+        try:
+            top_n = int(args.get("top_n", DEFAULT_TOP_N))
+            epsilon = float(args.get("epsilon", DEFAULT_EPSILON))
+            theme_ids = tuple(sorted({int(t) for t in str(args.get("theme_ids", "")).split(",") if t.strip()}))
+            focus = int(args["focus"]) if args.get("focus") not in (None, "") else None
+            depth = int(args.get("depth", DEFAULT_DEPTH))
+        except (TypeError, ValueError):
+            raise ValueError("top_n, focus and depth must be ints, epsilon a number, theme_ids comma-separated ints")
+        if not 1 <= top_n <= MAX_TOP_N:
+            raise ValueError(f"top_n must be between 1 and {MAX_TOP_N}")
+        if not epsilon >= 0:
+            raise ValueError("epsilon must be >= 0")
+        if not 0 <= depth <= MAX_DEPTH:
+            raise ValueError(f"depth must be between 0 and {MAX_DEPTH}")
+        return cls(top_n, epsilon, theme_ids, focus, depth)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"top_n": self.top_n, "epsilon": self.epsilon, "theme_ids": list(self.theme_ids),
+                "focus": self.focus, "depth": self.depth if self.focus is not None else None}
+
+    def cache_key(self) -> str:
+        depth = self.depth if self.focus is not None else ""
+        return f"{self.top_n}:{self.epsilon!r}:{','.join(map(str, self.theme_ids))}:{self.focus}:{depth}"
+
+
+def load_graph(conn: Connection, project_id: int,
+               params: GraphParams = GraphParams()) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Nodes and edges of a project's intervention graph.
+
+    Nodes are the project's top_n interventions by theme_weighted_effectiveness,
+    optionally limited to `theme_ids` and/or to the `depth`-hop neighbourhood
+    of `focus` (which is always included). Edges are the intervention_effects
+    between them with |multiplier - 1| >= epsilon, read from the catalogue's
+    EdgeIndex rather than joined in SQL, so the only query is the top-N scan.
+    Raises ValueError for an unknown focus intervention.
+    """
+    cat = catalogue_service.current(conn)
+    index = cat.edge_index
+
+    candidates = None
+    if params.focus is not None:
+        if params.focus not in cat.interventions:
+            raise ValueError(f"unknown focus intervention {params.focus}")
+        candidates = set(index.neighbourhood(params.focus, params.depth, params.epsilon))
+    if params.theme_ids:
+        themed = {i.id for i in cat.interventions.values() if i.theme_id in params.theme_ids}
+        candidates = themed if candidates is None else candidates & themed
+        if params.focus is not None:
+            candidates.add(params.focus)
+
+    bind = {"project_id": project_id, "top_n": params.top_n, "pinned": params.focus}
+    if candidates is None:
+        rows = conn.execute(NODES_SQL, bind).mappings().all()
+    elif candidates:
+        rows = conn.execute(NODES_IN_SQL, {**bind, "ids": sorted(candidates)}).mappings().all()
+    else:
+        rows = []
+    return build_graph(cat, rows, params)
+
+
+def build_graph(cat: catalogue_service.Catalogue, rows: List[Mapping[str, Any]],
+                params: GraphParams = GraphParams()) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Nodes (labelled from the snapshot) and edges for top-N score rows ({"id", "score"}) already read."""
+    nodes = [{"id": int(r["id"]), "score": float(r["score"]) if r["score"] is not None else None} for r in rows]
+    if params.focus is not None and all(n["id"] != params.focus for n in nodes):
+        nodes = [{"id": params.focus, "score": None}] + nodes[:params.top_n - 1]   # focus has no score row
+    for n in nodes:
+        info = cat.interventions.get(n["id"])
+        n["label"] = info.name if info is not None else str(n["id"])
+
+    edges = [e.to_dict() for e in cat.edge_index.edges_between([n["id"] for n in nodes], params.epsilon)]
+    return nodes, edges
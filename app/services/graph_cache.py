@@ -0,0 +1,167 @@
+"""
+Render cache for the intervention-graph SVG.
+
+Graphviz runs as a subprocess and takes 100ms to seconds per graph, so
+rendered SVGs are kept on disk, named by a digest of exactly what is drawn
+(node ids and labels in rank order, edges and their weights, the title).
+A graph whose drawn content did not change is never rendered twice, even
+when the scores behind it moved. Files are evicted least-recently-used
+once the directory grows past GRAPH_CACHE_MAX_MB; every process (and every
+gunicorn worker) on a host shares the same directory.
+
+Renders run on a small thread pool (GRAPH_RENDER_WORKERS) so at most that
+many `dot` processes run at once, and concurrent requests for the same
+graph share one render. A request waits at most GRAPH_RENDER_TIMEOUT
+seconds (awaiting, not blocking, under the ASGI server); a slow render
+keeps going in the background and lands in the cache for the retry.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from threading import Lock, RLock
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy.util import await_only
+from sqlalchemy.util.concurrency import in_greenlet
+
+
+def content_key(nodes: List[Dict[str, Any]], edges: List[Dict[str, Any]], title: str, style: str = "") -> str:
+    """Digest of what the SVG shows; scores only matter through node order. Change `style` with the drawing code."""
+    drawn = {
+        "style": style,
+        "title": title,
+        "nodes": [[n["id"], n.get("label", str(n["id"]))] for n in nodes],
+        "edges": sorted([e["src"], e["dst"], round(float(e["weight"]), 6), round(float(e["multiplier"]), 6)]
+                        for e in edges),
+    }
+    return hashlib.sha256(json.dumps(drawn, sort_keys=True).encode()).hexdigest()
+
+
+class SvgCache:
+    """
+    Directory of `<key>.svg` files, LRU by mtime (a hit touches the file),
+    trimmed to `max_bytes` after every write. Writes are atomic renames, so
+    readers in other processes never see a partial file.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.svg"
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if self.max_bytes <= 0:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp, self._path(key))
+        self.evict()
+
+    def evict(self) -> int:
+        """Delete least-recently-used files until the directory fits `max_bytes`; returns how many went."""
+        with self._lock:
+            entries = []
+            for path in self.directory.glob("*.svg"):
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+            total = sum(size for _, size, _ in entries)
+            removed = 0
+            for _, size, path in sorted(entries, key=lambda e: e[0]):
+                if total <= self.max_bytes:
+                    break
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+                total -= size
+                removed += 1
+            return removed
+
+    def clear(self) -> None:
+        for path in self.directory.glob("*.svg"):
+            path.unlink(missing_ok=True)
+
+
+class RenderPool:
+    """At most `workers` renders at a time; one render per key however many requests want it."""
+
+    def __init__(self, workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="graph-render")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = RLock()  # a render that already finished runs its done-callback inside submit()
+
+    def submit(self, key: str, fn: Callable[[], bytes]) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._inflight[key] = self._executor.submit(fn)
+                future.add_done_callback(lambda _f: self._forget(key))
+            return future
+
+    def _forget(self, key: str) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+
+
+def get_or_render(key: str, render: Callable[[], bytes], timeout: Optional[float] = None) -> bytes:
+    """
+    The cached SVG for `key`, rendering (and storing) it on the pool on a miss.
+    Raises concurrent.futures.TimeoutError if the render outlasts `timeout`.
+    """
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    def render_and_store() -> bytes:
+        svg = render()
+        cache.put(key, svg)
+        return svg
+
+    return _wait(pool.submit(key, render_and_store), timeout)
+
+
+def _wait(future: Future, timeout: Optional[float]) -> bytes:
+    """
+    future.result(timeout). Under the ASGI server (inside a request's
+    greenlet on the event loop) the future is awaited instead, so other
+    requests keep running while this one waits for its render.
+    """
+    if not in_greenlet():
+        return future.result(timeout=timeout)
+    try:
+        return await_only(asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout))
+    except asyncio.TimeoutError:
+        raise FutureTimeout() from None
+
+
+RENDER_TIMEOUT = float(os.environ.get("GRAPH_RENDER_TIMEOUT", "10"))
+
+cache = SvgCache(
+    os.environ.get("GRAPH_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "carbonbalance-graph-cache"),
+    max_bytes=int(float(os.environ.get("GRAPH_CACHE_MAX_MB", "64")) * 1024 * 1024),
+)
+pool = RenderPool(int(os.environ.get("GRAPH_RENDER_WORKERS", "2")))
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+import math
+import numpy as np
+
+
+@dataclass(frozen=True)
+class _Node:
+    center: float
+    lo_sorted: np.ndarray   # lower bounds of intervals containing `center`, ascending
+    lo_order: np.ndarray    # interval positions in the same order
+    hi_sorted: np.ndarray   # upper bounds of the same intervals, ascending
+    hi_order: np.ndarray
+    left: Optional["_Node"]
+    right: Optional["_Node"]
+
+
+class IntervalIndex:
+    """
+    Static centred interval tree over closed intervals [lower, upper].
+
+    `None` bounds are open-ended (same semantics as `types.in_bounds`).
+    `stab(v)` returns the positions of every interval containing `v` in
+    O(log n + k): each level is one binary search plus a contiguous slice.
+    """
+
+    def __init__(self, lower: Sequence[Optional[float]], upper: Sequence[Optional[float]]):
+        self.lower = np.asarray([-np.inf if v is None else v for v in lower], dtype=np.float64)
+        self.upper = np.asarray([np.inf if v is None else v for v in upper], dtype=np.float64)
+        if self.lower.shape != self.upper.shape:
+            raise ValueError("lower and upper must have the same length")
+        self._root = self._build(np.arange(len(self.lower), dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.lower)
+
+    def _build(self, idx: np.ndarray) -> Optional[_Node]:
+        if len(idx) == 0:
+            return None
+        lo, hi = self.lower[idx], self.upper[idx]
+
+        # Median finite endpoint: some interval owns it, so `mid` is never empty
+        ends = np.concatenate([lo, hi])
+        ends = np.sort(ends[np.isfinite(ends)])
+        center = float(ends[len(ends) // 2]) if len(ends) else 0.0
+
+        left_mask = hi < center
+        right_mask = lo > center
+        mid = idx[~(left_mask | right_mask)]
+
+        lo_order = mid[np.argsort(self.lower[mid], kind="stable")]
+        hi_order = mid[np.argsort(self.upper[mid], kind="stable")]
+        return _Node(
+            center=center,
+            lo_sorted=self.lower[lo_order],
+            lo_order=lo_order,
+            hi_sorted=self.upper[hi_order],
+            hi_order=hi_order,
+            left=self._build(idx[left_mask]),
+            right=self._build(idx[right_mask]),
+        )
+
+    def stab(self, value: Optional[float]) -> np.ndarray:
+        """Positions (unordered) of intervals with lower <= value <= upper."""
+        if value is None or math.isnan(value):
+            return np.empty(0, dtype=np.int64)
+        parts: List[np.ndarray] = []
+        node = self._root
+        while node is not None:
+            if value < node.center:
+                k = np.searchsorted(node.lo_sorted, value, side="right")
+                parts.append(node.lo_order[:k])
+                node = node.left
+            elif value > node.center:
+                k = np.searchsorted(node.hi_sorted, value, side="left")
+                parts.append(node.hi_order[k:])
+                node = node.right
+            else:
+                parts.append(node.lo_order)
+                break
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(parts)
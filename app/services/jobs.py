@@ -0,0 +1,327 @@
+"""
+Background jobs on a Postgres table.
+
+A request enqueues a job (a row in `jobs`) inside its own transaction and
+answers 202 with the job id; worker processes (worker.py) claim queued jobs
+with `FOR UPDATE SKIP LOCKED`, so any number of workers can poll the same
+table without handing a job out twice. A claimed job runs in its own
+transactions; on success its JSON result (and optional binary result, e.g.
+a PDF) is stored on the row, on failure it is retried with exponential
+backoff up to `max_attempts`. While a job runs, its worker refreshes
+`locked_at` every JOB_HEARTBEAT_SECONDS; a job whose heartbeat has been
+silent for JOB_TIMEOUT_SECONDS (its worker died) is requeued. A long job
+with a live worker is never handed out a second time.
+
+Handlers are plain functions registered with `@handler("kind")` next to the
+route that enqueues them; they run inside the Flask app context, take the
+job payload and return a dict or a JobOutput.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+log = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 300.0
+STALE_CHECK_SECONDS = 60.0
+
+
+class PermanentJobError(Exception):
+    """Raised by a handler for a failure that a retry cannot fix (bad input); the job fails at once."""
+
+
+@dataclass
+class JobOutput:
+    result: Optional[Dict[str, Any]] = None
+    blob: Optional[bytes] = None
+    mimetype: Optional[str] = None
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+    max_attempts: int
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+
+
+def handler(kind: str):
+    """Register `fn(payload) -> dict | JobOutput` as the handler for jobs of `kind`."""
+    def register(fn):
+        HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def timeout_seconds() -> float:
+    """Seconds without a heartbeat after which a running job counts as abandoned."""
+    return float(os.environ.get("JOB_TIMEOUT_SECONDS") or 120)
+
+
+def heartbeat_seconds() -> float:
+    return float(os.environ.get("JOB_HEARTBEAT_SECONDS") or 30)
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds to wait before attempt `attempts + 1`: 5s, 10s, 20s, ... capped at 5 minutes."""
+    return min(RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), RETRY_MAX_SECONDS)
+
+
+def spool_dir() -> str:
+    """Where requests leave uploads for workers (JOB_SPOOL_DIR; must be shared with the worker hosts)."""
+    path = os.environ.get("JOB_SPOOL_DIR") or os.path.join(tempfile.gettempdir(), "carbonbalance-jobs")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+# --- queue operations ----------------------------------------------------------
+def enqueue(conn: Connection, kind: str, payload: Optional[Dict[str, Any]] = None,
+            max_attempts: int = DEFAULT_MAX_ATTEMPTS, created_by: Optional[str] = None) -> int:
+    """Queue a job; it becomes visible to workers when `conn`'s transaction commits. Returns the job id."""
+    if kind not in HANDLERS:
+        raise ValueError(f"unknown job kind '{kind}'")
+    return int(conn.execute(
+        text("""
+            INSERT INTO jobs (kind, payload, max_attempts, created_by)
+            VALUES (:kind, CAST(:payload AS jsonb), :max_attempts, :created_by)
+            RETURNING id
+        """),
+        {"kind": kind, "payload": json.dumps(payload or {}), "max_attempts": max_attempts,
+         "created_by": str(created_by) if created_by is not None else None},
+    ).scalar_one())
+
+
+def get(conn: Connection, job_id: int) -> Optional[Dict[str, Any]]:
+    """Job status row (without the binary result), or None."""
+    row = conn.execute(
+        text("""
+            SELECT id, kind, status, attempts, max_attempts, result, error,
+                   result_mimetype, result_blob IS NOT NULL AS has_blob, created_by,
+                   created_at, updated_at, finished_at
+            FROM jobs WHERE id = :id
+        """),
+        {"id": job_id},
+    ).mappings().first()
+    return dict(row) if row else None
+
+
+def get_blob(conn: Connection, job_id: int) -> Optional[Tuple[bytes, str]]:
+    row = conn.execute(
+        text("SELECT result_blob, result_mimetype FROM jobs WHERE id = :id AND result_blob IS NOT NULL"),
+        {"id": job_id},
+    ).first()
+    return (bytes(row[0]), row[1] or "application/octet-stream") if row else None
+
+
+def claim(conn: Connection, worker_id: str) -> Optional[ClaimedJob]:
+    """Take the oldest runnable job, skipping rows other workers hold locked."""
+    row = conn.execute(
+        text("""
+            UPDATE jobs
+            SET status = 'running', attempts = attempts + 1,
+                locked_at = now(), locked_by = :worker, updated_at = now()
+            WHERE id = (
+              SELECT id FROM jobs
+              WHERE status = 'queued' AND run_after <= now()
+              ORDER BY run_after, id
+              FOR UPDATE SKIP LOCKED
+              LIMIT 1
+            )
+            RETURNING id, kind, payload, attempts, max_attempts
+        """),
+        {"worker": worker_id},
+    ).mappings().first()
+    if row is None:
+        return None
+    payload = row["payload"]
+    if isinstance(payload, str):
+        payload = json.loads(payload)
+    return ClaimedJob(row["id"], row["kind"], payload or {}, row["attempts"], row["max_attempts"])
+
+
+def complete(conn: Connection, job_id: int, output: JobOutput) -> None:
+    conn.execute(
+        text("""
+            UPDATE jobs
+            SET status = 'succeeded', result = CAST(:result AS jsonb), result_blob = :blob,
+                result_mimetype = :mimetype, error = NULL, locked_at = NULL,
+                updated_at = now(), finished_at = now()
+            WHERE id = :id
+        """),
+        {"id": job_id, "result": json.dumps(output.result) if output.result is not None else None,
+         "blob": output.blob, "mimetype": output.mimetype},
+    )
+
+
+def fail(conn: Connection, job: ClaimedJob, error: str, retry: bool = True) -> str:
+    """Record a failed attempt: requeue with backoff while attempts remain, else mark failed. Returns the new status."""
+    status = QUEUED if retry and job.attempts < job.max_attempts else FAILED
+    conn.execute(
+        text("""
+            UPDATE jobs
+            SET status = :status, error = :error, locked_at = NULL, locked_by = NULL, updated_at = now(),
+                run_after = now() + make_interval(secs => :delay),
+                finished_at = CASE WHEN :status = 'failed' THEN now() END
+            WHERE id = :id
+        """),
+        {"id": job.id, "status": status, "error": error[:4000], "delay": retry_delay(job.attempts)},
+    )
+    return status
+
+
+def heartbeat(conn: Connection, job_id: int, worker_id: str) -> bool:
+    """Refresh a running job's `locked_at`; False if the job is no longer this worker's."""
+    return bool(conn.execute(
+        text("""
+            UPDATE jobs SET locked_at = now(), updated_at = now()
+            WHERE id = :id AND status = 'running' AND locked_by = :worker
+        """),
+        {"id": job_id, "worker": worker_id},
+    ).rowcount)
+
+
+def requeue_stale(conn: Connection, timeout: float) -> int:
+    """Put jobs whose heartbeat stopped `timeout` seconds ago back in the queue (or fail them when out of attempts)."""
+    return conn.execute(
+        text("""
+            UPDATE jobs
+            SET status = CASE WHEN attempts < max_attempts THEN 'queued' ELSE 'failed' END,
+                finished_at = CASE WHEN attempts < max_attempts THEN NULL ELSE now() END,
+                error = 'worker timed out', locked_at = NULL, locked_by = NULL, updated_at = now()
+            WHERE status = 'running' AND locked_at < now() - make_interval(secs => :timeout)
+        """),
+        {"timeout": timeout},
+    ).rowcount or 0
+
+
+# --- workers ---------------------------------------------------------------------
+def _cleanup(payload: Dict[str, Any]) -> None:
+    for path in payload.get("cleanup") or []:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class _Heartbeat:
+    """Background thread calling heartbeat() every `interval` seconds until the block exits."""
+
+    def __init__(self, engine, job_id: int, worker_id: str, interval: float):
+        self.engine, self.job_id, self.worker_id, self.interval = engine, job_id, worker_id, interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job_id}-heartbeat", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                with self.engine.begin() as conn:
+                    if not heartbeat(conn, self.job_id, self.worker_id):
+                        log.warning("job %s is no longer held by %s", self.job_id, self.worker_id)
+                        return
+            except Exception:
+                log.exception("heartbeat for job %s failed", self.job_id)  # the next beat may get through
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_one(app, worker_id: str) -> bool:
+    """Claim and run one job inside `app`'s context; False when the queue was empty."""
+    engine = app.config["PG_ENGINE"]
+    with engine.begin() as conn:
+        job = claim(conn, worker_id)
+    if job is None:
+        return False
+
+    retry, error, output = True, None, None
+    try:
+        fn = HANDLERS.get(job.kind)
+        if fn is None:
+            raise PermanentJobError(f"no handler for job kind '{job.kind}'")
+        with app.app_context(), _Heartbeat(engine, job.id, worker_id, heartbeat_seconds()):
+            out = fn(job.payload)
+        output = out if isinstance(out, JobOutput) else JobOutput(result=out)
+    except PermanentJobError as e:
+        retry, error = False, str(e)
+    except Exception as e:
+        log.exception("job %s (%s) attempt %s failed", job.id, job.kind, job.attempts)
+        error = f"{type(e).__name__}: {e}"
+
+    with engine.begin() as conn:
+        if output is not None:
+            complete(conn, job.id, output)
+            status = SUCCEEDED
+        else:
+            status = fail(conn, job, error, retry=retry)
+    if status != QUEUED:
+        _cleanup(job.payload)
+    log.info("job %s (%s) -> %s", job.id, job.kind, status)
+    return True
+
+
+def work(app, worker_id: Optional[str] = None, poll_interval: float = 1.0,
+         stop: Optional[Callable[[], bool]] = None) -> None:
+    """Run jobs until `stop()` is true, sleeping `poll_interval` whenever the queue is empty."""
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    engine = app.config["PG_ENGINE"]
+    next_stale_check = 0.0
+    while not (stop and stop()):
+        if time.monotonic() >= next_stale_check:
+            with engine.begin() as conn:
+                requeued = requeue_stale(conn, timeout_seconds())
+            if requeued:
+                log.warning("requeued %s stale job(s)", requeued)
+            next_stale_check = time.monotonic() + STALE_CHECK_SECONDS
+        if not run_one(app, worker_id):
+            time.sleep(poll_interval)
+
+
+def _worker_main(poll_interval: float) -> None:
+    from app import create_app
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(processName)s %(message)s")
+    work(create_app(), poll_interval=poll_interval)
+
+
+def default_processes() -> int:
+    return int(os.environ.get("JOB_WORKERS") or os.cpu_count() or 1)
+
+
+def run_workers(processes: int, poll_interval: float = 1.0) -> None:
+    """Start `processes` worker processes (each builds its own app and pool) and wait for them."""
+    ctx = multiprocessing.get_context("spawn")  # fresh interpreters: no inherited DB sockets
+    procs = [ctx.Process(target=_worker_main, args=(poll_interval,), name=f"job-worker-{i}")
+             for i in range(processes)]
+    for p in procs:
+        p.start()
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.terminate()
+        for p in procs:
+            p.join()
+        raise
+
@@ -0,0 +1,129 @@
+from typing import List, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from .rules_metric import PROJECT_METRIC_COLUMNS
+
+# Bump the suffix whenever the scoring semantics change; old versions stay
+# callable until nothing references them.
+FUNCTION_NAME = "score_projects_v1"
+
+
+def install_statements() -> List[str]:
+    """
+    DDL for the server-side scoring path (run by db/upgrades.apply_upgrades).
+
+    `score_projects_v1(project_ids integer[])` is the ScoringKernel in SQL:
+
+        adjusted = base * metric_factor * dependency_factor
+        final    = adjusted * theme weight_norm
+
+    plus the materialised eligibility counters and `rank`, upserted into
+    runtime_scores for every (project, intervention) in one statement.
+    Returns the number of rows written.
+    """
+    unpivot = ",\n                     ".join(
+        f"('{c}', p.{c}::float8)" for c in sorted(PROJECT_METRIC_COLUMNS)
+    )
+    return [
+        # multiplies like Python's running product (0 and negatives included)
+        "CREATE OR REPLACE AGGREGATE float8_product(float8) (SFUNC = float8mul, STYPE = float8, INITCOND = '1')",
+        f"""CREATE OR REPLACE FUNCTION {FUNCTION_NAME}(project_ids integer[]) RETURNS integer
+            LANGUAGE plpgsql AS $$
+            DECLARE
+              written integer;
+            BEGIN
+              WITH p AS (
+                SELECT id FROM projects WHERE id = ANY(project_ids)
+              ),
+              pm AS (  -- one row per non-null metric column
+                SELECT p.id AS project_id, m.name, m.value
+                FROM projects p
+                CROSS JOIN LATERAL (
+                  VALUES {unpivot}
+                ) AS m(name, value)
+                WHERE p.id = ANY(project_ids) AND m.value IS NOT NULL
+              ),
+              mf AS (
+                SELECT pm.project_id, me.effected_intervention AS iid, float8_product(me.multiplier::float8) AS f
+                FROM pm
+                JOIN metric_effects me
+                  ON me.cause = pm.name
+                 AND (me.lower_bound IS NULL OR me.lower_bound <= pm.value)
+                 AND (me.upper_bound IS NULL OR me.upper_bound >= pm.value)
+                GROUP BY 1, 2
+              ),
+              df AS (
+                SELECT ii.project_id, ie.effected_intervention AS iid, float8_product(ie.multiplier::float8) AS f
+                FROM implemented_interventions ii
+                JOIN intervention_effects ie ON ie.cause_intervention = ii.impl_id
+                WHERE ii.project_id = ANY(project_ids)
+                GROUP BY 1, 2
+              ),
+              s AS (
+                SELECT p.id AS project_id, i.id AS iid,
+                       COALESCE(i.base_effectiveness, 0)::float8 * COALESCE(mf.f, 1) * COALESCE(df.f, 1) AS adj,
+                       COALESCE(w.weight_norm, 0)::float8 AS weight,
+                       ii.impl_id IS NOT NULL AS implemented,
+                       CASE WHEN COALESCE(i.is_stage, FALSE) THEN (
+                         SELECT COUNT(*) FROM stages st
+                         WHERE st.src_intervention_id = i.id AND st.relation_type = 'prereq'
+                           AND NOT EXISTS (
+                             SELECT 1 FROM implemented_interventions x
+                             WHERE x.project_id = p.id AND x.impl_id = st.dst_intervention_id
+                           )
+                       ) ELSE 0 END AS unmet_prereqs,
+                       CASE WHEN COALESCE(i.is_stage, FALSE) THEN (
+                         SELECT COUNT(*) FROM stages st
+                         WHERE st.src_intervention_id = i.id AND st.relation_type = 'mutex'
+                           AND EXISTS (
+                             SELECT 1 FROM implemented_interventions x
+                             WHERE x.project_id = p.id AND x.impl_id = st.dst_intervention_id
+                           )
+                       ) ELSE 0 END AS mutex_hits
+                FROM p
+                CROSS JOIN interventions i
+                LEFT JOIN mf ON mf.project_id = p.id AND mf.iid = i.id
+                LEFT JOIN df ON df.project_id = p.id AND df.iid = i.id
+                LEFT JOIN project_theme_weightings w ON w.project_id = p.id AND w.theme_id = i.theme_id
+                LEFT JOIN implemented_interventions ii ON ii.project_id = p.id AND ii.impl_id = i.id
+              ),
+              e AS (
+                SELECT s.*, s.adj * s.weight AS final,
+                       NOT s.implemented AND s.unmet_prereqs = 0 AND s.mutex_hits = 0 AS eligible
+                FROM s
+              )
+              INSERT INTO runtime_scores
+                (project_id, intervention_id, adjusted_base_effectiveness, theme_weighted_effectiveness,
+                 implemented, unmet_prereqs, mutex_hits, rank)
+              SELECT project_id, iid, adj, final, implemented, unmet_prereqs, mutex_hits,
+                     CASE WHEN eligible THEN
+                       ROW_NUMBER() OVER (PARTITION BY project_id, eligible ORDER BY final DESC, iid DESC)
+                     END
+              FROM e
+              ON CONFLICT (project_id, intervention_id) DO UPDATE
+                SET adjusted_base_effectiveness  = EXCLUDED.adjusted_base_effectiveness,
+                    theme_weighted_effectiveness = EXCLUDED.theme_weighted_effectiveness,
+                    implemented                  = EXCLUDED.implemented,
+                    unmet_prereqs                = EXCLUDED.unmet_prereqs,
+                    mutex_hits                   = EXCLUDED.mutex_hits,
+                    rank                         = EXCLUDED.rank;
+              GET DIAGNOSTICS written = ROW_COUNT;
+              RETURN written;
+            END $$""",
+    ]
+
+
+def score_projects(conn: Connection, project_ids: Sequence[int]) -> int:
+    """
+    Recompute runtime_scores (scores, eligibility, ranks) for `project_ids`
+    entirely in Postgres - one round trip. Same results as the ScoringKernel
+    path used by services/rescoring.py and the live metrics routes
+    (rescoring.rescore_project), up to float rounding.
+    """
+    ids = [int(p) for p in project_ids]
+    if not ids:
+        return 0
+    return int(conn.execute(
+        text(f"SELECT {FUNCTION_NAME}(CAST(:ids AS integer[]))"),
+        {"ids": ids},
+    ).scalar() or 0)
@@ -1,13 +1,10 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
+from . import catalogue as catalogue_service
+from .graph import NODES_SQL, GraphParams, build_graph
 
-def implemented(conn: Connection, project_id: int) -> List[Dict[str, Any]]:
-    """
-    Return implemented interventions for a project, ordered by score (desc).
-    Each item has: intervention_id:int, name:str, score:float|None
-    """
-    result = conn.execute(text("""
+_IMPLEMENTED_SQL = """
         SELECT
           ii.impl_id AS intervention_id,
           i.name,
@@ -19,6 +16,44 @@ def implemented(conn: Connection, project_id: int) -> List[Dict[str, Any]]:
           ON rs.project_id = ii.project_id
          AND rs.intervention_id = ii.impl_id
         WHERE ii.project_id = :project_id
-        ORDER BY COALESCE(rs.theme_weighted_effectiveness, 0) DESC, i.name
+"""
+_IMPLEMENTED_ORDER = "COALESCE({t}.score, 0) DESC, {t}.name"
+
+# everything report.pdf shows, plus the catalogue version to label the graph with, in one statement
+REPORT_SQL = text(f"""
+    SELECT
+      COALESCE((SELECT version FROM reference_version WHERE id = 1), 0) AS reference_version,
+      COALESCE((
+        SELECT json_agg(x ORDER BY {_IMPLEMENTED_ORDER.format(t="x")})
+        FROM ({_IMPLEMENTED_SQL}) x
+      ), '[]') AS implemented,
+      COALESCE((
+        SELECT json_agg(n ORDER BY n.score DESC, n.id DESC)
+        FROM ({NODES_SQL.text}) n
+      ), '[]') AS nodes
+""")
+
+def implemented(conn: Connection, project_id: int) -> List[Dict[str, Any]]:
+    """
+    Return implemented interventions for a project, ordered by score (desc).
+    Each item has: intervention_id:int, name:str, score:float|None
+    """
+    result = conn.execute(text(f"""
+        SELECT * FROM ({_IMPLEMENTED_SQL}) x
+        ORDER BY {_IMPLEMENTED_ORDER.format(t="x")}
     """), {"project_id": project_id})
     return [dict(m) for m in result.mappings().all()]
+
+
+def load_report(conn: Connection, project_id: int,
+                params: GraphParams = GraphParams()) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    (implemented, graph nodes, graph edges) for a project's PDF report from
+    one statement: the implemented list, the graph's top-N score rows and
+    the reference version. The catalogue snapshot (labels and edges) is
+    taken at that version, so a fresh snapshot costs no further query.
+    """
+    row = conn.execute(REPORT_SQL, {"project_id": project_id, "top_n": params.top_n, "pinned": None}).mappings().one()
+    cat = catalogue_service.current(conn, int(row["reference_version"]))
+    nodes, edges = build_graph(cat, row["nodes"], params)
+    return list(row["implemented"]), nodes, edges
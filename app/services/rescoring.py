@@ -0,0 +1,235 @@
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Iterator, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from app.db.pool import create_pooled_engine
+from . import catalogue as catalogue_service
+from . import eligibility
+from .stages import refresh_ranks
+from .catalogue import Catalogue
+from .scoring import ScoringKernel, kernel_for
+from .storage import PostgresStorage
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+@dataclass
+class RescoreProgress:
+    """Running totals; `last_project_id` is the resume point (`after_id`) for the next run."""
+    total: int
+    processed: int = 0
+    rows_written: int = 0
+    chunks: int = 0
+    last_project_id: int = 0
+    catalogue_version: int = 0
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    @property
+    def projects_per_minute(self) -> float:
+        return self.processed * 60.0 / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.processed >= self.total
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "processed": self.processed,
+            "rows_written": self.rows_written,
+            "chunks": self.chunks,
+            "last_project_id": self.last_project_id,
+            "catalogue_version": self.catalogue_version,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "projects_per_minute": round(self.projects_per_minute, 1),
+        }
+
+
+def _filter_sql(project_ids: Optional[Sequence[int]]) -> str:
+    return " AND id = ANY(:ids)" if project_ids is not None else ""
+
+
+def count_projects(conn: Connection, after_id: int = 0, project_ids: Optional[Sequence[int]] = None) -> int:
+    params = {"after": after_id, "ids": list(project_ids or [])}
+    return int(conn.execute(
+        text("SELECT COUNT(*) FROM projects WHERE id > :after" + _filter_sql(project_ids)),
+        params,
+    ).scalar() or 0)
+
+
+def next_chunk(conn: Connection, after_id: int, limit: int,
+               project_ids: Optional[Sequence[int]] = None) -> List[int]:
+    """Keyset page of project ids strictly after `after_id`, ascending."""
+    params = {"after": after_id, "n": limit, "ids": list(project_ids or [])}
+    return [int(p) for p in conn.execute(
+        text("SELECT id FROM projects WHERE id > :after" + _filter_sql(project_ids)
+             + " ORDER BY id LIMIT :n"),
+        params,
+    ).scalars().all()]
+
+
+def _pages(engine: Engine, after_id: int, chunk_size: int,
+           project_ids: Optional[Sequence[int]]) -> Iterator[List[int]]:
+    while True:
+        with engine.connect() as conn:
+            ids = next_chunk(conn, after_id, chunk_size, project_ids)
+        if not ids:
+            return
+        yield ids
+        after_id = ids[-1]
+
+
+def rescore_project(conn: Connection, project_id: int, snap: Optional[Catalogue] = None) -> int:
+    """
+    Kernel-score one project on the caller's connection and upsert its
+    adjusted and theme-weighted scores; returns the rows written. The live
+    metrics paths use this, so a metrics change keeps the dependency factor
+    of what is already implemented, the same as /rescore and score_projects_v1.
+    Eligibility and ranks are left to the caller.
+    """
+    storage = PostgresStorage(conn, snap)
+    kernel = kernel_for(storage.load_catalogue())
+    return storage.save_scores(kernel.score_many(storage.load_states([project_id]), limit=0))
+
+
+# --- worker processes --------------------------------------------------------
+# Built once per worker in `_init_worker` (workers start fresh, see
+# `_pool_context`), never shipped with a task.
+_worker_kernel: Optional[ScoringKernel] = None
+_worker_engine: Optional[Engine] = None
+
+
+def _init_worker(url: str, version: int) -> None:
+    global _worker_kernel, _worker_engine
+    # never reuse connections inherited from the parent's pool
+    _worker_engine = create_pooled_engine(url, size=1, max_overflow=0)
+    if _worker_kernel is None or _worker_kernel.catalogue.version != version:
+        with _worker_engine.connect() as conn:
+            _worker_kernel = ScoringKernel(catalogue_service.current(conn))
+
+
+def _score_chunk(ids: List[int]) -> Tuple[int, int]:
+    """Score and write one chunk on this worker's own connection; returns (projects, rows)."""
+    with _worker_engine.begin() as conn:
+        storage = PostgresStorage(conn, _worker_kernel.catalogue)
+        written = storage.save_scores(_worker_kernel.score_many(storage.load_states(ids), limit=0))
+        eligibility.refresh(conn, ids)
+        refresh_ranks(conn, ids)
+    return len(ids), written
+
+
+def _pool_context():
+    # never plain fork: callers are threaded web workers and the job worker (whose
+    # heartbeat thread holds a pooled connection), and a forked child inherits
+    # other threads' held locks and open DB sockets
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def default_workers() -> int:
+    return int(os.environ.get("RESCORE_WORKERS") or os.cpu_count() or 1)
+
+
+def rescore_projects(
+    engine: Engine,
+    project_ids: Optional[Sequence[int]] = None,
+    after_id: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_progress: Optional[Callable[[RescoreProgress], None]] = None,
+    workers: int = 1,
+) -> RescoreProgress:
+    """
+    Recompute runtime_scores for every project (or `project_ids`) against the current catalogue.
+
+    Projects are streamed in id order, `chunk_size` at a time; each chunk is
+    loaded with three set-based reads, scored as one matrix by
+    `ScoringKernel.score_many` and written with one multi-row upsert, in its
+    own transaction. An interrupted run resumes from
+    `progress.last_project_id` via `after_id` - completed chunks are never
+    redone.
+
+    With `workers > 1` chunks are sharded across a process pool (forkserver
+    or spawn, never fork); each worker loads the catalogue and compiles the
+    kernel once and writes through its own single-connection engine. `last_project_id` only advances past chunks that finished in
+    order, so it stays a safe resume point.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    if workers <= 0:
+        raise ValueError("workers must be positive")
+    if project_ids is not None:
+        project_ids = sorted({int(p) for p in project_ids})
+
+    with engine.connect() as conn:
+        snap = catalogue_service.current(conn)
+        total = count_projects(conn, after_id, project_ids)
+    kernel = ScoringKernel(snap)
+    progress = RescoreProgress(total=total, last_project_id=after_id, catalogue_version=snap.version)
+
+    if workers > 1:
+        return _rescore_parallel(engine, kernel, progress, chunk_size, project_ids, workers, on_progress)
+
+    while True:
+        with engine.begin() as conn:
+            ids = next_chunk(conn, progress.last_project_id, chunk_size, project_ids)
+            if not ids:
+                break
+            storage = PostgresStorage(conn, snap)
+            written = storage.save_scores(kernel.score_many(storage.load_states(ids), limit=0))
+            eligibility.refresh(conn, ids)  # stages may have changed with the reference data
+            refresh_ranks(conn, ids)
+        _advance(progress, len(ids), written, ids[-1], on_progress)
+
+    return progress
+
+
+def _advance(progress: RescoreProgress, projects: int, written: int, last_id: int,
+             on_progress: Optional[Callable[[RescoreProgress], None]]) -> None:
+    progress.processed += projects
+    progress.rows_written += written
+    progress.chunks += 1
+    progress.last_project_id = max(progress.last_project_id, last_id)
+    log.info("rescored %d/%d projects (after_id=%d, %.0f/min)",
+             progress.processed, progress.total, progress.last_project_id,
+             progress.projects_per_minute)
+    if on_progress is not None:
+        on_progress(progress)
+
+
+def _rescore_parallel(engine, kernel, progress, chunk_size, project_ids, workers, on_progress):
+    url = engine.url.render_as_string(hide_password=False)
+    pending: Deque[list] = deque()   # [future, last_id] in submission (= id) order
+    with ProcessPoolExecutor(max_workers=workers, mp_context=_pool_context(),
+                             initializer=_init_worker, initargs=(url, kernel.catalogue.version)) as pool:
+        in_flight = set()
+        for ids in _pages(engine, progress.last_project_id, chunk_size, project_ids):
+            fut = pool.submit(_score_chunk, ids)
+            pending.append([fut, ids[-1]])
+            in_flight.add(fut)
+            if len(in_flight) >= 2 * workers:
+                _, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                _drain(pending, progress, on_progress)
+        wait(in_flight)
+        _drain(pending, progress, on_progress)
+    return progress
+
+
+def _drain(pending: Deque[list], progress: RescoreProgress,
+           on_progress: Optional[Callable[[RescoreProgress], None]]) -> None:
+    """Account for finished chunks at the head of the queue; re-raises a worker's error."""
+    while pending and pending[0][0].done():
+        fut, last_id = pending.popleft()
+        projects, written = fut.result()
+        _advance(progress, projects, written, last_id, on_progress)
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from .interval_index import IntervalIndex
+from .types import MetricRule
+
+
+@dataclass(frozen=True)
+class _MetricBlock:
+    """Columnar view of every rule keyed on one metric."""
+    index: IntervalIndex    # over the rules' [lower, upper] bounds
+    rule_ids: np.ndarray    # int64 metric_effects.id
+    target: np.ndarray      # int64 positions into MetricRuleEngine.intervention_ids
+    multiplier: np.ndarray  # float64
+    # same rules sorted by target, for batch evaluation (sorted_log is None if any multiplier <= 0)
+    sorted_lower: np.ndarray
+    sorted_upper: np.ndarray
+    sorted_log: Optional[np.ndarray]
+    starts: np.ndarray      # first sorted position of each distinct target
+    targets: np.ndarray     # the distinct targets
+
+    @classmethod
+    def build(cls, rules: List[MetricRule], pos: Dict[int, int]) -> "_MetricBlock":
+        index = IntervalIndex([r.lower for r in rules], [r.upper for r in rules])
+        target = np.asarray([pos[r.intervention_id] for r in rules], dtype=np.int64)
+        multiplier = np.asarray([r.multiplier for r in rules], dtype=np.float64)
+        order = np.argsort(target, kind="stable")
+        targets, starts = np.unique(target[order], return_index=True)
+        return cls(
+            index=index,
+            rule_ids=np.asarray([r.id for r in rules], dtype=np.int64),
+            target=target,
+            multiplier=multiplier,
+            sorted_lower=index.lower[order],
+            sorted_upper=index.upper[order],
+            sorted_log=np.log(multiplier[order]) if (multiplier > 0).all() else None,
+            starts=starts,
+            targets=targets,
+        )
+
+
+class MetricRuleEngine:
+    """
+    Interventions and metric rules compiled into NumPy arrays.
+
+    Build once from the reference tables, then call `evaluate()` per project;
+    no DB access happens during evaluation.
+    """
+
+    def __init__(self, base_eff: Dict[int, float], rules: Iterable[MetricRule]):
+        ids = sorted(base_eff)
+        self.intervention_ids = np.asarray(ids, dtype=np.int64)
+        self.base = np.asarray([base_eff[i] for i in ids], dtype=np.float64)
+        pos = {iid: k for k, iid in enumerate(ids)}
+
+        grouped: Dict[str, List[MetricRule]] = {}
+        for r in rules:
+            if r.intervention_id in pos:
+                grouped.setdefault(r.metric_name, []).append(r)
+
+        self._blocks: Dict[str, _MetricBlock] = {}
+        for name, rs in grouped.items():
+            self._blocks[name] = _MetricBlock.build(rs, pos)
+        self.rule_count = sum(len(b.target) for b in self._blocks.values())
+
+    @property
+    def metric_names(self) -> List[str]:
+        """Project columns the rules depend on (sorted)."""
+        return sorted(self._blocks)
+
+    def matching_rules(self, metrics: Dict[str, float]) -> Dict[str, np.ndarray]:
+        """{metric_name: positions of its rules whose bounds contain the metric value}."""
+        out: Dict[str, np.ndarray] = {}
+        for name, v in metrics.items():
+            block = self._blocks.get(name)
+            if block is None or v is None:
+                continue
+            hit = block.index.stab(v)
+            if len(hit):
+                out[name] = hit
+        return out
+
+    def matching_rule_ids(self, metrics: Dict[str, float]) -> List[int]:
+        """metric_effects ids that fire for this metric vector."""
+        return sorted(
+            int(rid)
+            for name, hit in self.matching_rules(metrics).items()
+            for rid in self._blocks[name].rule_ids[hit]
+        )
+
+    def multipliers(self, metrics: Dict[str, float]) -> np.ndarray:
+        """Per-intervention product of the multipliers of every rule whose bounds contain the metric value."""
+        mult = np.ones(len(self.intervention_ids), dtype=np.float64)
+        for name, hit in self.matching_rules(metrics).items():
+            block = self._blocks[name]
+            np.multiply.at(mult, block.target[hit], block.multiplier[hit])
+        return mult
+
+    def multipliers_matrix(self, metrics: List[Dict[str, float]], max_cells: int = 4_000_000) -> np.ndarray:
+        """
+        (projects x interventions) multiplier matrix for many metric vectors at once.
+
+        Each metric block is evaluated as one (projects x rules) bounds mask; the
+        log-multipliers are summed per target with `np.add.reduceat`. Rows are
+        processed in slices so a slice's mask stays under `max_cells` entries.
+        """
+        n_proj, n = len(metrics), len(self.intervention_ids)
+        if n_proj and any(b.sorted_log is None for b in self._blocks.values()):
+            # non-positive multipliers have no log; fall back to row-wise products
+            return np.vstack([self.multipliers(m) for m in metrics])
+        log_mult = np.zeros((n_proj, n), dtype=np.float64)
+        for name, block in self._blocks.items():
+            values = np.asarray(
+                [np.nan if m.get(name) is None else m[name] for m in metrics], dtype=np.float64
+            )
+            step = max(1, max_cells // max(1, len(block.target)))
+            for a in range(0, n_proj, step):
+                v = values[a:a + step, None]
+                hit = (block.sorted_lower <= v) & (block.sorted_upper >= v)   # NaN never hits
+                sums = np.add.reduceat(hit * block.sorted_log, block.starts, axis=1)
+                log_mult[a:a + step, block.targets] += sums
+        return np.exp(log_mult)
+
+    def evaluate(self, metrics: Dict[str, float]) -> Dict[int, float]:
+        """Return {intervention_id: adjusted_base_effectiveness} for one project's metric vector."""
+        scores = self.base * self.multipliers(metrics)
+        return dict(zip(self.intervention_ids.tolist(), scores.tolist()))
+
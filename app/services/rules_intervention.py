@@ -1,7 +1,11 @@
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
 from .types import InterventionRule
-from typing import List, Dict
+from .eligibility import counters_sql
+from typing import List, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .catalogue import Catalogue
 
 def fetch_intervention_rules(conn: Connection) -> List[InterventionRule]:
     """
@@ -43,21 +47,29 @@ def intervention_recompute(
     conn: Connection,
     project_id: int,
     cause_id: int,
+    catalogue: Optional["Catalogue"] = None,
 ) -> Dict[int, float]:
     """
     Apply all unconditional intervention_effects where cause_intervention = :cause_id.
     Multiplies current runtime scores for affected interventions and upserts them.
+    With a `catalogue` snapshot the rules come from memory instead of intervention_effects.
     Returns {effect_intervention_id: new_score}.
     """
 
-    rules = conn.execute(text("""
-        SELECT
-          id,
-          effected_intervention AS effect_id,
-          multiplier
-        FROM intervention_effects
-        WHERE cause_intervention = :cid
-    """), {"cid": cause_id}).mappings().all()
+    if catalogue is not None:
+        rules = [
+            {"id": r.id, "effect_id": r.effect_intervention_id, "multiplier": r.multiplier}
+            for r in catalogue.rules_by_cause.get(cause_id, ())
+        ]
+    else:
+        rules = conn.execute(text("""
+            SELECT
+              id,
+              effected_intervention AS effect_id,
+              multiplier
+            FROM intervention_effects
+            WHERE cause_intervention = :cid
+        """), {"cid": cause_id}).mappings().all()
 
     if not rules:
         return {}
@@ -90,11 +102,99 @@ def intervention_recompute(
         new_scores[iid] = new_val
         payload.append({"project_id": project_id, "intervention_id": iid, "score": new_val})
 
-    conn.execute(text("""
-        INSERT INTO runtime_scores (project_id, intervention_id, adjusted_base_effectiveness)
-        VALUES (:project_id, :intervention_id, :score)
+    # rows created here get their eligibility counters too; existing rows keep theirs
+    conn.execute(text(f"""
+        INSERT INTO runtime_scores
+          (project_id, intervention_id, adjusted_base_effectiveness, implemented, unmet_prereqs, mutex_hits)
+        SELECT :project_id, i.id, :score, {counters_sql(":project_id", "i.id", "i.is_stage")}
+        FROM interventions i
+        WHERE i.id = :intervention_id
         ON CONFLICT (project_id, intervention_id)
         DO UPDATE SET adjusted_base_effectiveness = EXCLUDED.adjusted_base_effectiveness
     """), payload)
 
-    return new_scores
\ No newline at end of file
+    return new_scores
+
+def implement_interventions(
+    conn: Connection,
+    project_id: int,
+    intervention_ids: List[int],
+    user_id: Optional[int],
+) -> List[int]:
+    """
+    Bulk-insert implemented_interventions rows in one statement.
+    Returns the ids that were newly implemented (already-implemented ones are skipped).
+    """
+    if not intervention_ids:
+        return []
+    return [int(i) for i in conn.execute(text("""
+        INSERT INTO implemented_interventions (project_id, impl_id, user_id)
+        SELECT :pid, x.iid, :uid
+        FROM unnest(CAST(:ids AS integer[])) AS x(iid)
+        ON CONFLICT (project_id, impl_id) DO NOTHING
+        RETURNING impl_id
+    """), {"pid": project_id, "ids": list(intervention_ids), "uid": user_id}).scalars().all()]
+
+
+def batch_intervention_recompute(
+    conn: Connection,
+    project_id: int,
+    cause_ids: List[int],
+    catalogue: Optional["Catalogue"] = None,
+) -> Dict[int, float]:
+    """
+    Set-based `intervention_recompute` for several causes at once.
+    Folds every cause's multipliers together in memory, then reads and upserts
+    the affected runtime_scores once. Returns {effect_intervention_id: new_score}.
+    """
+    if not cause_ids:
+        return {}
+
+    if catalogue is not None:
+        rules = [
+            {"effect_id": r.effect_intervention_id, "multiplier": r.multiplier}
+            for cid in cause_ids
+            for r in catalogue.rules_by_cause.get(cid, ())
+        ]
+    else:
+        rules = conn.execute(text("""
+            SELECT effected_intervention AS effect_id, multiplier
+            FROM intervention_effects
+            WHERE cause_intervention = ANY(:cids)
+        """), {"cids": list(cause_ids)}).mappings().all()
+
+    mult_by_effect: Dict[int, float] = {}
+    for r in rules:
+        effect_id = int(r["effect_id"])
+        mult_by_effect[effect_id] = mult_by_effect.get(effect_id, 1.0) * float(r["multiplier"])
+
+    if not mult_by_effect:
+        return {}
+
+    rows = conn.execute(text("""
+        SELECT i.id AS intervention_id,
+               COALESCE(rs.adjusted_base_effectiveness, COALESCE(i.base_effectiveness,0)) AS current_score
+        FROM interventions i
+        LEFT JOIN runtime_scores rs
+          ON rs.intervention_id = i.id AND rs.project_id = :pid
+        WHERE i.id = ANY(:ids)
+    """), {"pid": project_id, "ids": sorted(mult_by_effect)}).mappings().all()
+
+    new_scores = {
+        int(row["intervention_id"]): float(row["current_score"]) * mult_by_effect[int(row["intervention_id"])]
+        for row in rows
+    }
+    if not new_scores:
+        return {}
+
+    conn.execute(text(f"""
+        INSERT INTO runtime_scores
+          (project_id, intervention_id, adjusted_base_effectiveness, implemented, unmet_prereqs, mutex_hits)
+        SELECT :pid, x.iid, x.score, {counters_sql(":pid", "x.iid", "i.is_stage")}
+        FROM unnest(CAST(:ids AS integer[]), CAST(:scores AS float8[])) AS x(iid, score)
+        JOIN interventions i ON i.id = x.iid
+        ON CONFLICT (project_id, intervention_id)
+        DO UPDATE SET adjusted_base_effectiveness = EXCLUDED.adjusted_base_effectiveness
+    """), {"pid": project_id, "ids": list(new_scores), "scores": list(new_scores.values())})
+
+    return new_scores
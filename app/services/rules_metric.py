@@ -1,7 +1,8 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
-from .types import MetricRule, in_bounds
+from .types import MetricRule
+from .rule_engine import MetricRuleEngine
 
 
 def fetch_metric_rules(conn: Connection) -> List[MetricRule]:
@@ -38,23 +39,25 @@ def fetch_metric_rules(conn: Connection) -> List[MetricRule]:
     return out
 
 
-def save_project_metrics(conn: Connection, project_id: int, metrics: Dict[str, float]) -> int:
-    ALLOWED = {
-        "levels",
-        "external_wall_area",
-        "footprint_area",
-        "opening_pct",
-        "wall_to_floor_ratio",
-        "footprint_gifa",
-        "gifa_total",
-        "external_openings_area",
-        "avg_height_per_level",
-    }
+# projects columns that metric rules can key on
+PROJECT_METRIC_COLUMNS = frozenset({
+    "levels",
+    "external_wall_area",
+    "footprint_area",
+    "opening_pct",
+    "wall_to_floor_ratio",
+    "footprint_gifa",
+    "gifa_total",
+    "external_openings_area",
+    "avg_height_per_level",
+})
+
 
+def save_project_metrics(conn: Connection, project_id: int, metrics: Dict[str, float]) -> int:
     # Filter + coerce types
     updates: Dict[str, float] = {}
     for name, val in (metrics or {}).items():
-        if name in ALLOWED and val is not None:
+        if name in PROJECT_METRIC_COLUMNS and val is not None:
             try:
                 updates[name] = float(val)
             except Exception:
@@ -63,52 +66,53 @@ def save_project_metrics(conn: Connection, project_id: int, metrics: Dict[str, f
     if not updates:
         return 0
 
-    # Create row if does not exist
-    conn.execute(
-        text("""
-            INSERT INTO projects (id, name, status, created_at, updated_at)
-            VALUES (:project_id, 'Untitled', 'draft', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ON CONFLICT (id) DO NOTHING
-        """),
-        {"project_id": project_id},
-    )
-
-    set_clause = ", ".join(f"{col} = :{col}" for col in updates.keys())
+    # Create the row if it does not exist, else update it - one statement
+    cols = ", ".join(updates.keys())
+    vals = ", ".join(f":{col}" for col in updates.keys())
+    set_clause = ", ".join(f"{col} = EXCLUDED.{col}" for col in updates.keys())
     params = {**updates, "project_id": project_id}
 
-    # Insert values
     res = conn.execute(
         text(f"""
-            UPDATE projects
+            INSERT INTO projects (id, name, status, created_at, updated_at, {cols})
+            VALUES (:project_id, 'Untitled', 'draft', CURRENT_TIMESTAMP, CURRENT_TIMESTAMP, {vals})
+            ON CONFLICT (id) DO UPDATE
                SET {set_clause},
                    updated_at = CURRENT_TIMESTAMP
-             WHERE id = :project_id
         """),
         params,
     )
     return int(res.rowcount or 0)
 
-def metric_recompute(conn: Connection, project_id: int) -> Dict[int, float]:
+def metric_recompute(conn: Connection, project_id: int, engine: Optional[MetricRuleEngine] = None) -> Dict[int, float]:
     """
     Recompute runtime scores based on metric rules.
+    Pass `engine` (e.g. `catalogue.current(conn).metric_engine`) to skip re-reading
+    interventions/metric_effects; otherwise they are loaded and compiled here.
     Returns: {intervention_id: adjusted_base_effectiveness}
     """
-
-    base_rows = conn.execute(
-        text("""
-            SELECT id, COALESCE(base_effectiveness, 0) AS base_effectiveness
-            FROM interventions
-        """)
-    ).mappings().all()
-    base_eff = {int(r["id"]): float(r["base_effectiveness"]) for r in base_rows}
-    if not base_eff:
+    if engine is None:
+        base_rows = conn.execute(
+            text("""
+                SELECT id, COALESCE(base_effectiveness, 0) AS base_effectiveness
+                FROM interventions
+            """)
+        ).mappings().all()
+        base_eff = {int(r["id"]): float(r["base_effectiveness"]) for r in base_rows}
+        if not base_eff:
+            return {}
+
+        rules = fetch_metric_rules(conn)
+        if not rules:
+            return base_eff
+
+        engine = MetricRuleEngine(base_eff, rules)
+
+    if len(engine.intervention_ids) == 0:
         return {}
-
-    rules = fetch_metric_rules(conn)
-    if not rules:
-        return base_eff 
-
-    needed_cols = sorted({r.metric_name for r in rules})
+    needed_cols = engine.metric_names
+    if not needed_cols:
+        return engine.evaluate({})
 
     select_list = ", ".join(f'"{c}"' for c in needed_cols)
     proj_row = conn.execute(
@@ -127,14 +131,7 @@ def metric_recompute(conn: Connection, project_id: int) -> Dict[int, float]:
             if v is not None:
                 metrics_by_name[c] = float(v)
 
-    mult_by_intervention: Dict[int, float] = {iid: 1.0 for iid in base_eff}
-
-    for rule in rules:
-        mv = metrics_by_name.get(rule.metric_name)
-        if in_bounds(mv, rule.lower, rule.upper):
-            mult_by_intervention[rule.intervention_id] *= rule.multiplier
-
-    return {iid: base_eff[iid] * mult_by_intervention[iid] for iid in base_eff}
+    return engine.evaluate(metrics_by_name)
 
 
 
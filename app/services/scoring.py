@@ -0,0 +1,265 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional
+import numpy as np
+from .catalogue import Catalogue
+from .types import ScoreBreakdown
+
+
+@dataclass(frozen=True)
+class ProjectState:
+    """Everything project-specific the kernel needs; reference data lives in the Catalogue."""
+    project_id: int
+    metrics: Dict[str, float]
+    implemented: FrozenSet[int] = frozenset()
+    theme_weights: Dict[int, float] = field(default_factory=dict)  # theme_id -> weight_norm
+
+
+@dataclass
+class ProjectScores:
+    project_id: int
+    adjusted: Dict[int, float]      # runtime_scores.adjusted_base_effectiveness
+    weighted: Dict[int, float]      # runtime_scores.theme_weighted_effectiveness
+    eligible: List[int]             # ranked best-first, same order as recommendations
+    recommendations: List[Dict[str, Any]]
+    breakdown: Dict[int, ScoreBreakdown] = field(default_factory=dict)
+
+
+class _Groups:
+    """(target, source) pairs sorted by target, with reduceat offsets per distinct target."""
+
+    def __init__(self, target: np.ndarray, source: np.ndarray, log: Optional[np.ndarray] = None):
+        self.order = np.argsort(target, kind="stable")
+        self.sources = source[self.order]
+        self.targets, self.starts = np.unique(target[self.order], return_index=True)
+        self.log = None if log is None else log[self.order]
+
+
+class ScoringKernel:
+    """
+    Pure-Python/NumPy scoring of one or many projects against a Catalogue.
+
+    adjusted = base * metric_factor * dependency_factor
+    final    = adjusted * theme weight_norm
+
+    metric_factor multiplies every metric_effects rule whose bounds contain the
+    project's metric; dependency_factor multiplies every intervention_effects
+    rule whose cause is implemented. Eligibility mirrors
+    `stages.recommendations`: not implemented, and stage interventions need all
+    prereqs implemented and no mutex partner implemented.
+    """
+
+    def __init__(self, catalogue: Catalogue):
+        self.catalogue = catalogue
+        self.engine = catalogue.metric_engine
+        self.ids = self.engine.intervention_ids
+        self._pos = {int(iid): k for k, iid in enumerate(self.ids.tolist())}
+        n = len(self.ids)
+
+        infos = [catalogue.interventions[int(i)] for i in self.ids.tolist()]
+        self.base = self.engine.base
+        self.theme_ids = np.asarray([i.theme_id for i in infos], dtype=np.int64)
+        self.is_stage = np.asarray([i.is_stage for i in infos], dtype=bool)
+        self.names = [i.name for i in infos]
+
+        deps = [r for r in catalogue.intervention_rules
+                if r.cause_intervention_id in self._pos and r.effect_intervention_id in self._pos]
+        self._dep_cause = np.asarray([self._pos[r.cause_intervention_id] for r in deps], dtype=np.int64)
+        self._dep_effect = np.asarray([self._pos[r.effect_intervention_id] for r in deps], dtype=np.int64)
+        self._dep_mult = np.asarray([r.multiplier for r in deps], dtype=np.float64)
+        self._dep_reason = [r.reason for r in deps]
+
+        self._prereq_src, self._prereq_dst = self._pairs(catalogue.prereqs)
+        self._mutex_src, self._mutex_dst = self._pairs(catalogue.mutexes)
+        self._n = n
+
+        # batch layouts: rules/pairs grouped by the column they write to, for reduceat
+        self._dep_groups = _Groups(self._dep_effect, self._dep_cause,
+                                   np.log(self._dep_mult) if (self._dep_mult > 0).all() else None)
+        self._prereq_groups = _Groups(self._prereq_src, self._prereq_dst)
+        self._mutex_groups = _Groups(self._mutex_src, self._mutex_dst)
+        self._theme_list = sorted(set(self.theme_ids.tolist()))
+        self._theme_col = np.searchsorted(np.asarray(self._theme_list, dtype=np.int64), self.theme_ids)
+
+    def _pairs(self, adjacency):
+        src, dst = [], []
+        for s, ds in adjacency.items():
+            if s not in self._pos:
+                continue
+            for d in ds:
+                if d in self._pos:
+                    src.append(self._pos[s])
+                    dst.append(self._pos[d])
+        return np.asarray(src, dtype=np.int64), np.asarray(dst, dtype=np.int64)
+
+    # --- vector pieces -----------------------------------------------------
+    def implemented_mask(self, implemented: Iterable[int]) -> np.ndarray:
+        mask = np.zeros(self._n, dtype=bool)
+        for iid in implemented:
+            k = self._pos.get(int(iid))
+            if k is not None:
+                mask[k] = True
+        return mask
+
+    def dependency_factor(self, impl: np.ndarray) -> np.ndarray:
+        dep = np.ones(self._n, dtype=np.float64)
+        if len(self._dep_cause):
+            active = impl[self._dep_cause]
+            np.multiply.at(dep, self._dep_effect[active], self._dep_mult[active])
+        return dep
+
+    def theme_weight(self, weights: Dict[int, float]) -> np.ndarray:
+        return np.asarray([weights.get(int(t), 0.0) for t in self.theme_ids.tolist()], dtype=np.float64)
+
+    def eligible_mask(self, impl: np.ndarray) -> np.ndarray:
+        blocked = np.zeros(self._n, dtype=bool)
+        if len(self._prereq_src):
+            blocked[self._prereq_src[~impl[self._prereq_dst]]] = True
+        if len(self._mutex_src):
+            blocked[self._mutex_src[impl[self._mutex_dst]]] = True
+        return ~impl & ~(self.is_stage & blocked)
+
+    def rank(self, final: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+        """Eligible positions, best first; ties broken by intervention_id DESC."""
+        pos = np.flatnonzero(eligible)
+        order = np.lexsort((-self.ids[pos], -final[pos]))
+        return pos[order]
+
+    # --- public API --------------------------------------------------------
+    def score(self, state: ProjectState, limit: Optional[int] = 3, explain: bool = False) -> ProjectScores:
+        """Score one project. `limit=None` returns every eligible recommendation."""
+        impl = self.implemented_mask(state.implemented)
+        metric_factor = self.engine.multipliers(state.metrics)
+        dep_factor = self.dependency_factor(impl)
+        weight = self.theme_weight(state.theme_weights)
+        adjusted = self.base * metric_factor * dep_factor
+        final = adjusted * weight
+        return self._result(state, adjusted, final, impl, limit,
+                            (metric_factor, dep_factor, weight) if explain else None)
+
+    def score_many(self, states: Iterable[ProjectState], limit: Optional[int] = 3) -> List[ProjectScores]:
+        """
+        Score a batch of projects as (projects x interventions) matrices.
+
+        Same results as calling `score()` per state (up to float rounding from
+        summing log-multipliers); the cost is a handful of array passes per
+        batch instead of per project.
+        """
+        states = list(states)
+        if not states:
+            return []
+        impl = np.vstack([self.implemented_mask(s.implemented) for s in states])
+        adjusted = (self.base
+                    * self.engine.multipliers_matrix([s.metrics for s in states])
+                    * self._dependency_matrix(impl))
+        final = adjusted * self._weight_matrix(states)
+        eligible = self._eligible_matrix(impl)
+
+        # rank every row at once: ineligible -> -inf, ties -> higher intervention_id first
+        key = np.where(eligible, final, -np.inf)[:, ::-1]
+        order = (self._n - 1) - np.argsort(-key, axis=1, kind="stable")
+        counts = eligible.sum(axis=1)
+
+        ids = self.ids.tolist()
+        out: List[ProjectScores] = []
+        for row, state in enumerate(states):
+            ranked = order[row, :counts[row]].tolist()
+            top = ranked if limit is None else ranked[:limit]
+            final_row = final[row].tolist()
+            out.append(ProjectScores(
+                project_id=state.project_id,
+                adjusted=dict(zip(ids, adjusted[row].tolist())),
+                weighted=dict(zip(ids, final_row)),
+                eligible=[ids[k] for k in ranked],
+                recommendations=[
+                    {"intervention_id": ids[k], "name": self.names[k],
+                     "theme_weighted_effectiveness": final_row[k]}
+                    for k in top
+                ],
+            ))
+        return out
+
+    # --- batch pieces ------------------------------------------------------
+    def _dependency_matrix(self, impl: np.ndarray) -> np.ndarray:
+        dep = np.ones(impl.shape, dtype=np.float64)
+        g = self._dep_groups
+        if not len(g.order):
+            return dep
+        if g.log is not None:
+            dep[:, g.targets] = np.exp(np.add.reduceat(impl[:, g.sources] * g.log, g.starts, axis=1))
+        else:
+            for cause, effect, mult in zip(self._dep_cause, self._dep_effect, self._dep_mult):
+                dep[impl[:, cause], effect] *= mult
+        return dep
+
+    def _weight_matrix(self, states: List[ProjectState]) -> np.ndarray:
+        col = {t: k for k, t in enumerate(self._theme_list)}
+        w = np.zeros((len(states), len(self._theme_list)), dtype=np.float64)
+        for row, s in enumerate(states):
+            for theme_id, weight in s.theme_weights.items():
+                k = col.get(int(theme_id))
+                if k is not None:
+                    w[row, k] = weight
+        return w[:, self._theme_col]
+
+    def _eligible_matrix(self, impl: np.ndarray) -> np.ndarray:
+        blocked = np.zeros(impl.shape, dtype=bool)
+        p, m = self._prereq_groups, self._mutex_groups
+        if len(p.order):
+            blocked[:, p.targets] |= np.logical_or.reduceat(~impl[:, p.sources], p.starts, axis=1)
+        if len(m.order):
+            blocked[:, m.targets] |= np.logical_or.reduceat(impl[:, m.sources], m.starts, axis=1)
+        return ~impl & ~(self.is_stage & blocked)
+
+    def _result(self, state, adjusted, final, impl, limit, factors) -> ProjectScores:
+        ranked = self.rank(final, self.eligible_mask(impl))
+        ids = self.ids.tolist()
+        top = ranked if limit is None else ranked[:limit]
+        out = ProjectScores(
+            project_id=state.project_id,
+            adjusted=dict(zip(ids, adjusted.tolist())),
+            weighted=dict(zip(ids, final.tolist())),
+            eligible=[ids[k] for k in ranked.tolist()],
+            recommendations=[
+                {"intervention_id": ids[k], "name": self.names[k],
+                 "theme_weighted_effectiveness": float(final[k])}
+                for k in top.tolist()
+            ],
+        )
+        if factors is not None:
+            out.breakdown = self._explain(state, impl, final, *factors)
+        return out
+
+    def _explain(self, state, impl, final, metric_factor, dep_factor, weight) -> Dict[int, ScoreBreakdown]:
+        reasons: Dict[int, List[str]] = {int(i): [] for i in self.ids.tolist()}
+        fired = set(self.engine.matching_rule_ids(state.metrics))
+        for r in self.catalogue.metric_rules:
+            if r.id in fired and r.intervention_id in reasons and r.reason:
+                reasons[r.intervention_id].append(r.reason)
+        if len(self._dep_cause):
+            for k in np.flatnonzero(impl[self._dep_cause]).tolist():
+                if self._dep_reason[k]:
+                    reasons[int(self.ids[self._dep_effect[k]])].append(self._dep_reason[k])
+
+        return {
+            iid: ScoreBreakdown(
+                base=float(self.base[k]),
+                metric_factor=float(metric_factor[k]),
+                dependency_factor=float(dep_factor[k]),
+                theme_weight=float(weight[k]),
+                final=float(final[k]),
+                reasons=reasons[iid],
+            )
+            for k, iid in enumerate(self.ids.tolist())
+        }
+
+
+_kernel: Optional[ScoringKernel] = None
+
+
+def kernel_for(catalogue: Catalogue) -> ScoringKernel:
+    """The ScoringKernel of `catalogue`, compiled once per snapshot and reused by live requests."""
+    global _kernel
+    kernel = _kernel
+    if kernel is None or kernel.catalogue is not catalogue:
+        kernel = _kernel = ScoringKernel(catalogue)
+    return kernel
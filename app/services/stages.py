@@ -1,53 +1,152 @@
-from typing import Any, List, Mapping
+import base64
+import json
+from decimal import Decimal
+from typing import Any, List, Mapping, Optional, Sequence, Tuple
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
+from . import topk
+
+MAX_PAGE_SIZE = 100
 
 def recommendations(conn: Connection, project_id: int, limit: int = 3) -> List[Mapping[str, Any]]:
     """
     Return top-N eligible recommendations for a project, filtered by stage rules (mutex/prereq).
-    Each row has: intervention_id, name, adjusted_base_effectiveness.
+    Each row has: intervention_id, name, theme_weighted_effectiveness, rank.
+
+    Served from the per-process top-K cache while the project's score_version
+    is unchanged (see services/topk.py).
+    """
+    return _public(topk.cache.get(conn, project_id, limit, ranked_recommendations))
+
+def first_page(conn: Connection, project_id: int, limit: int = 3) -> Tuple[List[Mapping[str, Any]], Optional[str]]:
+    """recommendations() plus the cursor for the page after it."""
+    rows = topk.cache.get(conn, project_id, limit, ranked_recommendations)
+    return _public(rows), next_cursor(rows, limit)
+
+def ranked_recommendations(conn: Connection, project_id: int, limit: int = 3) -> List[Mapping[str, Any]]:
+    """
+    Uncached read of the ranked eligible list. Eligibility is materialised on
+    runtime_scores (see services/eligibility.py), so this is a range scan of
+    ix_runtime_scores_eligible_ranked. Rows also carry `score_key`, the exact
+    numeric score the cursor is built from.
     """
     rows = conn.execute(
         text("""
-            SELECT r.intervention_id, i.name, r.theme_weighted_effectiveness::float8 AS theme_weighted_effectiveness
+            SELECT r.intervention_id, i.name,
+                   r.theme_weighted_effectiveness::float8 AS theme_weighted_effectiveness,
+                   r.rank,
+                   r.theme_weighted_effectiveness::text AS score_key
             FROM runtime_scores r
             JOIN interventions i ON i.id = r.intervention_id
             WHERE r.project_id = :pid
-              AND NOT EXISTS (
-                SELECT 1 FROM implemented_interventions ii
-                WHERE ii.project_id = :pid
-                  AND ii.impl_id = r.intervention_id
-              )
-              AND (
-                    COALESCE(i.is_stage, FALSE) = FALSE
-                    OR (
-                      NOT EXISTS (
-                        SELECT 1 FROM stages s
-                        WHERE s.src_intervention_id = r.intervention_id
-                          AND s.relation_type = 'prereq'
-                          AND NOT EXISTS (
-                            SELECT 1 FROM implemented_interventions ii
-                            WHERE ii.impl_id = s.dst_intervention_id
-                              AND ii.project_id = :pid
-                          )
-                      )
-                      AND
-                      NOT EXISTS (
-                        SELECT 1 FROM stages s
-                        WHERE s.src_intervention_id = r.intervention_id
-                          AND s.relation_type = 'mutex'
-                          AND EXISTS (
-                            SELECT 1 FROM implemented_interventions ii
-                            WHERE ii.impl_id = s.dst_intervention_id
-                              AND ii.project_id = :pid
-                          )
-                      )
-                    )
-                )
-            ORDER BY r.theme_weighted_effectiveness DESC
+              AND r.eligible
+              AND r.theme_weighted_effectiveness IS NOT NULL
+            ORDER BY r.theme_weighted_effectiveness DESC, r.intervention_id DESC
             LIMIT :lim
         """),
         {"pid": project_id, "lim": limit},
     ).mappings().all()
     return rows
 
+# --- pagination ----------------------------------------------------------------
+def encode_cursor(row: Mapping[str, Any]) -> str:
+    """Opaque cursor for the position just after `row`: its exact score and id, the ranked list's sort key."""
+    raw = json.dumps({"score": str(row["score_key"]), "after": int(row["intervention_id"])}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Inverse of encode_cursor (returns (score, intervention id)); ValueError if malformed."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        score = str(raw["score"])
+        if not Decimal(score).is_finite():
+            raise ValueError(score)
+        return score, int(raw["after"])
+    except Exception as e:
+        raise ValueError("invalid cursor") from e
+
+def next_cursor(rows: Sequence[Mapping[str, Any]], limit: int) -> Optional[str]:
+    """Cursor for the following page, or None when `rows` was the last page."""
+    return encode_cursor(rows[-1]) if rows and len(rows) >= limit else None
+
+def _public(rows: Sequence[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """Rows as returned to callers (score_key only feeds the cursor)."""
+    return [{k: v for k, v in r.items() if k != "score_key"} for r in rows]
+
+def recommendations_page(conn: Connection, project_id: int, limit: int = 3,
+                         cursor: Optional[str] = None,
+                         from_rank: Optional[int] = None) -> Tuple[List[Mapping[str, Any]], Optional[str]]:
+    """
+    One page of the ranked eligible list plus the cursor for the next page.
+
+    `cursor` continues after a previous page with a keyset comparison on
+    (theme_weighted_effectiveness, intervention_id), the order of
+    ix_runtime_scores_eligible_ranked. The cursor carries that key exactly,
+    so page N costs the same as page 1, the boundary row is never looked
+    up, and interventions implemented between page reads do not shift the
+    rows after them. `from_rank` jumps to the rows ranked after that
+    position using the maintained `rank` column; positions move as the list
+    changes, so use it to jump and the cursor to walk.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    params = {"pid": project_id, "lim": limit}
+    where, order = "", "r.theme_weighted_effectiveness DESC, r.intervention_id DESC"
+    if from_rank is not None:
+        where, order = "AND r.rank > :from_rank", "r.rank"
+        params["from_rank"] = int(from_rank)
+    elif cursor is not None:
+        where = "AND (r.theme_weighted_effectiveness, r.intervention_id) < (CAST(:score AS numeric), :after)"
+        params["score"], params["after"] = decode_cursor(cursor)
+
+    rows = conn.execute(
+        text(f"""
+            SELECT r.intervention_id, i.name,
+                   r.theme_weighted_effectiveness::float8 AS theme_weighted_effectiveness,
+                   r.rank,
+                   r.theme_weighted_effectiveness::text AS score_key
+            FROM runtime_scores r
+            JOIN interventions i ON i.id = r.intervention_id
+            WHERE r.project_id = :pid
+              AND r.eligible
+              AND r.theme_weighted_effectiveness IS NOT NULL
+              {where}
+            ORDER BY {order}
+            LIMIT :lim
+        """),
+        params,
+    ).mappings().all()
+    return _public(rows), next_cursor(rows, limit)
+
+def refresh_ranks(conn: Connection, project_ids: Sequence[int]) -> None:
+    """
+    Write 1-based positions in the ranked eligible list into runtime_scores.rank
+    (NULL for rows that are not recommendable). Only changed ranks are written.
+    """
+    ids = [int(p) for p in project_ids]
+    if not ids:
+        return
+    conn.execute(
+        text("""
+            UPDATE runtime_scores r
+            SET rank = x.rn
+            FROM (
+              SELECT project_id, intervention_id,
+                     CASE WHEN ranked THEN
+                       ROW_NUMBER() OVER (
+                         PARTITION BY project_id, ranked
+                         ORDER BY theme_weighted_effectiveness DESC, intervention_id DESC
+                       )
+                     END AS rn
+              FROM (
+                SELECT project_id, intervention_id, theme_weighted_effectiveness,
+                       (eligible AND theme_weighted_effectiveness IS NOT NULL) AS ranked
+                FROM runtime_scores
+                WHERE project_id = ANY(:ids)
+              ) s
+            ) x
+            WHERE r.project_id = x.project_id
+              AND r.intervention_id = x.intervention_id
+              AND r.rank IS DISTINCT FROM x.rn
+        """),
+        {"ids": ids},
+    )
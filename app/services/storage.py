@@ -0,0 +1,123 @@
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from . import catalogue as catalogue_service
+from .catalogue import Catalogue
+from .rules_metric import PROJECT_METRIC_COLUMNS
+from .scoring import ProjectScores, ProjectState
+
+
+class ScoringStorage(Protocol):
+    """Where the ScoringKernel reads reference data / project state from and writes scores to."""
+
+    def load_catalogue(self) -> Catalogue: ...
+
+    def load_states(self, project_ids: Sequence[int]) -> List[ProjectState]: ...
+
+    def save_scores(self, results: Iterable[ProjectScores]) -> int: ...
+
+
+class PostgresStorage:
+    """Reads/writes the live tables through an open connection (caller owns the transaction)."""
+
+    def __init__(self, conn: Connection, catalogue: Optional[Catalogue] = None):
+        self.conn = conn
+        self._catalogue = catalogue
+
+    def load_catalogue(self) -> Catalogue:
+        if self._catalogue is None:
+            self._catalogue = catalogue_service.current(self.conn)
+        return self._catalogue
+
+    def load_states(self, project_ids: Sequence[int]) -> List[ProjectState]:
+        """Three set-based reads for any number of projects: metrics, implemented, weights."""
+        ids = [int(p) for p in project_ids]
+        if not ids:
+            return []
+        cols = [c for c in self.load_catalogue().metric_engine.metric_names if c in PROJECT_METRIC_COLUMNS]
+        select_list = "".join(f', "{c}"' for c in cols)
+        metric_rows = self.conn.execute(
+            text(f"SELECT id{select_list} FROM projects WHERE id = ANY(:ids)"),
+            {"ids": ids},
+        ).mappings().all()
+
+        implemented: Dict[int, set] = {}
+        for r in self.conn.execute(
+            text("SELECT project_id, impl_id FROM implemented_interventions WHERE project_id = ANY(:ids)"),
+            {"ids": ids},
+        ).mappings().all():
+            implemented.setdefault(int(r["project_id"]), set()).add(int(r["impl_id"]))
+
+        weights: Dict[int, Dict[int, float]] = {}
+        for r in self.conn.execute(
+            text("""
+                SELECT project_id, theme_id, weight_norm
+                FROM project_theme_weightings
+                WHERE project_id = ANY(:ids)
+            """),
+            {"ids": ids},
+        ).mappings().all():
+            weights.setdefault(int(r["project_id"]), {})[int(r["theme_id"])] = float(r["weight_norm"] or 0)
+
+        return [
+            ProjectState(
+                project_id=int(r["id"]),
+                metrics={c: float(r[c]) for c in cols if r[c] is not None},
+                implemented=frozenset(implemented.get(int(r["id"]), ())),
+                theme_weights=weights.get(int(r["id"]), {}),
+            )
+            for r in metric_rows
+        ]
+
+    def save_scores(self, results: Iterable[ProjectScores]) -> int:
+        """One multi-row upsert of adjusted + theme-weighted scores for every result."""
+        pids: List[int] = []
+        iids: List[int] = []
+        adjusted: List[float] = []
+        weighted: List[float] = []
+        for res in results:
+            for iid, score in res.adjusted.items():
+                pids.append(res.project_id)
+                iids.append(iid)
+                adjusted.append(score)
+                weighted.append(res.weighted[iid])
+        if not pids:
+            return 0
+        self.conn.execute(
+            text("""
+                INSERT INTO runtime_scores
+                  (project_id, intervention_id, adjusted_base_effectiveness, theme_weighted_effectiveness)
+                SELECT x.pid, x.iid, x.adj, x.tw
+                FROM unnest(
+                  CAST(:pids AS integer[]), CAST(:iids AS integer[]),
+                  CAST(:adj AS float8[]), CAST(:tw AS float8[])
+                ) AS x(pid, iid, adj, tw)
+                ON CONFLICT (project_id, intervention_id)
+                DO UPDATE SET adjusted_base_effectiveness  = EXCLUDED.adjusted_base_effectiveness,
+                              theme_weighted_effectiveness = EXCLUDED.theme_weighted_effectiveness
+            """),
+            {"pids": pids, "iids": iids, "adj": adjusted, "tw": weighted},
+        )
+        return len(pids)
+
+
+class InMemoryStorage:
+    """Dict-backed storage for tests and offline batch runs."""
+
+    def __init__(self, catalogue: Catalogue, states: Iterable[ProjectState] = ()):
+        self.catalogue = catalogue
+        self.states: Dict[int, ProjectState] = {s.project_id: s for s in states}
+        self.scores: Dict[int, ProjectScores] = {}
+
+    def load_catalogue(self) -> Catalogue:
+        return self.catalogue
+
+    def load_states(self, project_ids: Sequence[int]) -> List[ProjectState]:
+        return [self.states[int(p)] for p in project_ids if int(p) in self.states]
+
+    def save_scores(self, results: Iterable[ProjectScores]) -> int:
+        n = 0
+        for res in results:
+            self.scores[res.project_id] = res
+            n += len(res.adjusted)
+        return n
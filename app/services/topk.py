@@ -0,0 +1,106 @@
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+Loader = Callable[[Connection, int, int], List[Any]]
+Stamp = Tuple[int, int]   # (projects.score_version, reference_version.version)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    version: Stamp
+    rows: tuple      # best-first, at most `k` rows
+    complete: bool   # fewer than `k` eligible rows exist, so `rows` is the whole list
+
+
+# pg_current_xact_id_if_assigned() is NULL until the transaction writes (PostgreSQL 13+)
+STAMP_SQL = text("""
+    SELECT
+      (SELECT score_version FROM projects WHERE id = :pid)          AS score_version,
+      COALESCE((SELECT version FROM reference_version WHERE id = 1), 0) AS reference_version,
+      pg_current_xact_id_if_assigned() IS NOT NULL                    AS wrote
+""")
+
+
+def fetch_stamp(conn: Connection, project_id: int) -> Optional[Tuple[Stamp, bool]]:
+    """((score_version, reference_version), whether this transaction has written), None for an unknown project."""
+    r = conn.execute(STAMP_SQL, {"pid": project_id}).mappings().one()
+    if r["score_version"] is None:
+        return None
+    return (int(r["score_version"]), int(r["reference_version"])), bool(r["wrote"])
+
+
+class TopKCache:
+    """
+    Per-project best-K recommendations, LRU-bounded to `max_projects`.
+
+    Entries are stamped with `projects.score_version`, which a trigger bumps on
+    every runtime_scores write (apply_weights, decay_by_intervention,
+    intervention_recompute, rescoring ...), and with `reference_version`,
+    which ingest bumps when names or rules change. A read costs one small
+    query; the ranked list is only re-read when either version moved or more
+    than `k` rows are asked for.
+
+    Only reads from a transaction that has not written are stored: rows read
+    after the caller's own writes (apply-batch) carry a version that may
+    never commit, and a later commit reaching the same number would
+    otherwise be served the rolled-back rows.
+    """
+
+    def __init__(self, max_projects: int = 1024, k: int = 10):
+        self.max_projects = max_projects
+        self.k = k
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, conn: Connection, project_id: int, limit: int, loader: Loader) -> List[Dict[str, Any]]:
+        if self.max_projects <= 0:
+            return [dict(r) for r in loader(conn, project_id, limit)]
+
+        # version first: rows read afterwards are at least this fresh
+        stamp = fetch_stamp(conn, project_id)
+        if stamp is None:
+            return []
+        version, wrote = stamp
+        with self._lock:
+            entry = self._entries.get(project_id)
+            if entry is not None and entry.version == version and (limit <= self.k or entry.complete):
+                self._entries.move_to_end(project_id)
+                self.hits += 1
+                return [dict(r) for r in entry.rows[:limit]]
+            self.misses += 1
+
+        if limit > self.k or wrote:
+            return [dict(r) for r in loader(conn, project_id, limit)]
+
+        rows = tuple(dict(r) for r in loader(conn, project_id, self.k))
+        with self._lock:
+            current = self._entries.get(project_id)
+            if current is None or current.version <= version:
+                self._entries[project_id] = _Entry(version, rows, len(rows) < self.k)
+                self._entries.move_to_end(project_id)
+                while len(self._entries) > self.max_projects:
+                    self._entries.popitem(last=False)
+        return [dict(r) for r in rows[:limit]]
+
+    def invalidate(self, project_id: Optional[int] = None) -> None:
+        with self._lock:
+            if project_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(project_id, None)
+
+
+cache = TopKCache(
+    max_projects=int(os.environ.get("TOPK_CACHE_PROJECTS", "1024")),
+    k=int(os.environ.get("TOPK_CACHE_K", "10")),
+)
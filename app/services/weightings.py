@@ -1,9 +1,7 @@
 from sqlalchemy import text
 from sqlalchemy.engine import Connection
-
-def _begin_tx(conn: Connection):
-    """Open a root tx, or a savepoint if a tx is already active (guards/read SELECTs cause autobegin)."""
-    return conn.begin() if not conn.in_transaction() else conn.begin_nested()
+from app.db.tx import begin_tx as _begin_tx  # root tx, or a savepoint inside the request's unit of work
+from .stages import refresh_ranks
 
 def normalise_weights(project_id: int, weightings: dict[int, float], conn: Connection) -> int:
     if not weightings:
@@ -13,6 +11,7 @@ def normalise_weights(project_id: int, weightings: dict[int, float], conn: Conne
                 text("UPDATE runtime_scores SET theme_weighted_effectiveness = 0 WHERE project_id = :pid"),
                 {"pid": project_id},
             )
+            refresh_ranks(conn, [project_id])
             return int(res.rowcount or 0)
 
     # Normalise
@@ -58,6 +57,7 @@ def apply_weights(project_id: int, conn: Connection) -> int:
             """),
             {"pid": project_id},
         )
+        refresh_ranks(conn, [project_id])
         return int(res.rowcount or 0)
 
 def renormalise_weights(project_id: int, conn: Connection) -> int:
@@ -120,4 +120,5 @@ def decay_by_intervention(project_id: int, intervention_id: int, conn: Connectio
             text(sql),
             {"pid": project_id, "iid": intervention_id, "alpha": float(alpha), "floor": float(floor)},
         )
+        refresh_ranks(conn, [project_id])
         return 1
\ No newline at end of file
@@ -22,7 +22,7 @@ def mock_db_conn():
     
     mock_conn.begin.return_value = mock_tx
     mock_conn.begin_nested.return_value = mock_tx
-    mock_conn.in_transaction = False
+    mock_conn.in_transaction = Mock(return_value=False)  # Connection.in_transaction is a method
     
     return mock_conn
 
@@ -0,0 +1,200 @@
+# tests/test_asgi.py
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, Response, request
+from sqlalchemy.util import await_only
+from app.asgi import create_asgi_app
+from app.services import catalogue, graph_cache
+
+
+def _scope(method, path, query=b'', headers=()):
+    return {'type': 'http', 'method': method, 'path': path, 'query_string': query,
+            'headers': list(headers), 'server': ('testserver', 80), 'client': ('127.0.0.1', 5000)}
+
+
+def _run_with_deadline(coro, seconds):
+    """asyncio.run(coro) on a side thread; a deadlocked loop fails the test instead of hanging it."""
+    out = {}
+    worker = threading.Thread(target=lambda: out.setdefault('result', asyncio.run(coro)), daemon=True)
+    worker.start()
+    worker.join(seconds)
+    if worker.is_alive():
+        raise AssertionError(f"event loop still blocked after {seconds}s")
+    return out['result']
+
+
+async def _call(app, scope, body=b'', parts=None):
+    chunks = parts if parts is not None else [body]
+    messages = [{'type': 'http.request', 'body': c, 'more_body': i < len(chunks) - 1}
+                for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status'], dict(sent[0]['headers']), b''.join(m['body'] for m in sent[1:])
+
+
+class TestAsgiApp(unittest.TestCase):
+
+    def setUp(self):
+        self.flask_app = Flask(__name__)
+        self.engine = MagicMock()
+        self.engine.dispose = AsyncMock()
+        self.app = create_asgi_app(self.flask_app, self.engine)
+
+        @self.flask_app.post('/api/echo/<int:n>')
+        def echo(n):
+            return {'n': n, 'q': request.args.get('q'), 'auth': request.headers.get('Authorization'),
+                    'body': request.get_json()}, 201
+
+        @self.flask_app.get('/api/slow')
+        def slow():
+            # stands in for a query awaited on the async driver
+            await_only(asyncio.sleep(0.1))
+            return {'ok': True}
+
+    def test_rebinds_engine(self):
+        self.assertIs(self.flask_app.config['PG_ENGINE'], self.engine.sync_engine)
+
+    def test_request_round_trip(self):
+        scope = _scope('POST', '/api/echo/7', b'q=x',
+                       [(b'authorization', b'Bearer t'), (b'content-type', b'application/json')])
+        status, headers, body = asyncio.run(_call(self.app, scope, b'{"a": 1}'))
+
+        self.assertEqual(status, 201)
+        self.assertEqual(headers[b'content-type'], b'application/json')
+        self.assertEqual(body, b'{"auth":"Bearer t","body":{"a":1},"n":7,"q":"x"}\n')
+
+    def test_unknown_route_is_404(self):
+        status, _, _ = asyncio.run(_call(self.app, _scope('GET', '/api/nope')))
+        self.assertEqual(status, 404)
+
+    def test_waiting_requests_do_not_block_each_other(self):
+        async def many():
+            return await asyncio.gather(*(_call(self.app, _scope('GET', '/api/slow')) for _ in range(50)))
+
+        started = time.perf_counter()
+        results = asyncio.run(many())
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual({status for status, _, _ in results}, {200})
+        self.assertLess(elapsed, 2.5)  # serialised would be 5s
+
+    def test_concurrent_stale_catalogue_does_not_deadlock(self):
+        def slow_load(conn, version):
+            await_only(asyncio.sleep(0.2))  # stands in for the reference-table reads
+            return catalogue.Catalogue(
+                version=version, interventions={}, themes={}, prereqs={}, mutexes={},
+                metric_rules=(), intervention_rules=(), rules_by_cause={}, step_size=None, metric_engine=None)
+
+        @self.flask_app.get('/api/catalogue')
+        def current_catalogue():
+            return {'version': catalogue.current(None).version}
+
+        async def many():
+            return await asyncio.gather(*(_call(self.app, _scope('GET', '/api/catalogue')) for _ in range(20)))
+
+        with patch.object(catalogue, '_current', None), \
+                patch('app.services.catalogue.fetch_version', return_value=4), \
+                patch('app.services.catalogue.load_catalogue', side_effect=slow_load):
+            results = _run_with_deadline(many(), 5)
+
+        self.assertEqual({status for status, _, _ in results}, {200})
+        self.assertEqual({body for _, _, body in results}, {b'{"version":4}\n'})
+
+    def test_render_wait_does_not_block_other_requests(self):
+        @self.flask_app.get('/api/render')
+        def render():
+            return graph_cache.get_or_render('asgi-test', lambda: time.sleep(0.5) or b'<svg/>', timeout=5)
+
+        async def both():
+            started = time.perf_counter()
+            slow = asyncio.ensure_future(_call(self.app, _scope('GET', '/api/render')))
+            await asyncio.sleep(0.05)
+            await _call(self.app, _scope('POST', '/api/echo/1'))
+            fast = time.perf_counter() - started
+            return fast, await slow
+
+        with patch.object(graph_cache, 'cache', graph_cache.SvgCache('/nonexistent', max_bytes=0)):
+            fast, (status, _, body) = _run_with_deadline(both(), 5)
+
+        self.assertEqual((status, body), (200, b'<svg/>'))
+        self.assertLess(fast, 0.3)  # a blocking .result() holds the loop for the whole 0.5s render
+
+    def test_body_is_streamed_in_parts(self):
+        scope = _scope('POST', '/api/echo/1', headers=[(b'content-type', b'application/json')])
+        status, _, body = asyncio.run(_call(self.app, scope, parts=[b'{"a"', b': [1, ', b'2]}']))
+
+        self.assertEqual(status, 201)
+        self.assertIn(b'"body":{"a":[1,2]}', body)
+
+    def test_response_is_streamed_chunk_by_chunk(self):
+        produced = []
+
+        @self.flask_app.get('/api/stream')
+        def stream():
+            def parts():
+                for part in (b'%PDF-', b'page', b'%%EOF'):
+                    produced.append(part)
+                    yield part
+            return Response(parts(), mimetype='application/pdf')
+
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append((message, list(produced)))
+
+        asyncio.run(self.app(_scope('GET', '/api/stream'), receive, send))
+
+        self.assertEqual(sent[0][0]['type'], 'http.response.start')
+        self.assertEqual(sent[0][0]['status'], 200)
+        bodies = [(m['body'], m['more_body'], seen) for m, seen in sent[1:]]
+        self.assertEqual(bodies, [
+            (b'%PDF-', True, [b'%PDF-']),        # sent before the next part is produced
+            (b'page', True, [b'%PDF-', b'page']),
+            (b'%%EOF', True, [b'%PDF-', b'page', b'%%EOF']),
+            (b'', False, [b'%PDF-', b'page', b'%%EOF']),
+        ])
+
+    def test_empty_response_still_sends_headers(self):
+        @self.flask_app.get('/api/empty')
+        def empty():
+            return '', 204
+
+        status, _, body = asyncio.run(_call(self.app, _scope('GET', '/api/empty')))
+        self.assertEqual((status, body), (204, b''))
+
+    def test_lifespan_shutdown_disposes_engine(self):
+        messages = [{'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(self.app({'type': 'lifespan'}, receive, send))
+
+        self.assertEqual(sent, ['lifespan.startup.complete', 'lifespan.shutdown.complete'])
+        self.engine.dispose.assert_awaited_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
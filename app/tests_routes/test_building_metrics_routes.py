@@ -48,15 +48,19 @@ class TestBuildingMetricsRoutes(unittest.TestCase):
         return mock_conn, mock_result
     
     @patch('app.routes.building_metrics.get_conn')
+    @patch('app.routes.building_metrics.catalogue')
+    @patch('app.routes.building_metrics.eligibility')
+    @patch('app.routes.building_metrics.rescoring')
     @patch('app.routes.building_metrics.rules_metric')
     @patch('app.routes.building_metrics.apply_weights')
-    def test_send_metrics_success(self, mock_apply_weights, mock_rules_metric, mock_get_conn):
+    def test_send_metrics_success(self, mock_apply_weights, mock_rules_metric, mock_rescoring,
+                                  mock_eligibility, mock_catalogue, mock_get_conn):
         """Test successful metrics submission"""
         mock_conn, mock_result = self._create_mock_connection()
         mock_get_conn.return_value.__enter__.return_value = mock_conn
         
         mock_rules_metric.save_project_metrics.return_value = 5
-        mock_rules_metric.metric_recompute.return_value = {1: 0.8, 2: 0.9}
+        mock_rescoring.rescore_project.return_value = 2
         mock_apply_weights.return_value = 10
         
         token = self._create_token()
@@ -78,10 +82,35 @@ class TestBuildingMetricsRoutes(unittest.TestCase):
         
         # Verify service calls
         mock_rules_metric.save_project_metrics.assert_called_once()
-        mock_rules_metric.metric_recompute.assert_called_once()
-        mock_rules_metric.upsert_runtime_scores.assert_called_once()
+        # scored by the kernel, like /rescore, so implemented dependencies are kept
+        mock_rescoring.rescore_project.assert_called_once_with(mock_conn, 123, mock_catalogue.current.return_value)
+        mock_eligibility.refresh.assert_called_once_with(mock_conn, [123])
         mock_apply_weights.assert_called_once()
     
+    @patch('app.routes.building_metrics.get_conn')
+    @patch('app.routes.building_metrics.pg_scoring')
+    @patch('app.routes.building_metrics.rules_metric')
+    @patch('app.routes.building_metrics.apply_weights')
+    def test_send_metrics_sql_backend(self, mock_apply_weights, mock_rules_metric, mock_pg_scoring, mock_get_conn):
+        """SCORING_BACKEND=sql recomputes with one server-side call"""
+        mock_conn, _ = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        mock_pg_scoring.score_projects.return_value = 40
+        self.app.config['SCORING_BACKEND'] = 'sql'
+
+        response = self.client.post(
+            '/projects/123/metrics',
+            json={'levels': 5},
+            headers={'Authorization': f'Bearer {self._create_token()}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['updated'], 40)
+        mock_rules_metric.save_project_metrics.assert_called_once()
+        mock_pg_scoring.score_projects.assert_called_once_with(mock_conn, [123])
+        mock_rules_metric.metric_recompute.assert_not_called()
+        mock_apply_weights.assert_not_called()
+
     @patch('app.routes.building_metrics.get_conn')
     @patch('app.routes.building_metrics.rules_metric')
     @patch('app.routes.building_metrics.apply_weights')
@@ -154,7 +183,7 @@ class TestBuildingMetricsRoutes(unittest.TestCase):
             {'id': 1, 'name': 'Intervention 1', 'score': 0.9},
             {'id': 2, 'name': 'Intervention 2', 'score': 0.8}
         ]
-        mock_stages.recommendations.return_value = mock_recommendations
+        mock_stages.first_page.return_value = (mock_recommendations, None)
         
         token = self._create_token()
         
@@ -168,6 +197,79 @@ class TestBuildingMetricsRoutes(unittest.TestCase):
         self.assertIn('recommendations', data)
         self.assertEqual(len(data['recommendations']), 2)
     
+    @patch('app.routes.building_metrics.get_conn')
+    @patch('app.routes.building_metrics.stages')
+    def test_get_recommendations_next_page(self, mock_stages, mock_get_conn):
+        """A cursor switches to the keyset page read"""
+        mock_conn, _ = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        mock_stages.recommendations_page.return_value = ([{'intervention_id': 7}], None)
+
+        token = self._create_token()
+        response = self.client.get(
+            '/projects/123/recommendations?limit=5&cursor=abc',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json(), {'recommendations': [{'intervention_id': 7}], 'next_cursor': None})
+        mock_stages.recommendations_page.assert_called_once_with(
+            mock_conn, 123, limit=5, cursor='abc', from_rank=None
+        )
+        mock_stages.first_page.assert_not_called()
+
+    @patch('app.routes.building_metrics.get_conn')
+    def test_get_recommendations_bad_cursor(self, mock_get_conn):
+        """A malformed (or old id-only) cursor is a 400, not an empty page"""
+        mock_conn, _ = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+
+        token = self._create_token()
+        response = self.client.get(
+            '/projects/123/recommendations?cursor=eyJhZnRlciI6IDQyfQ',
+            headers={'Authorization': f'Bearer {token}'}
+        )
+
+        self.assertEqual(response.status_code, 400)
+        mock_conn.execute.assert_not_called()
+
+    @patch('app.routes.building_metrics.get_conn')
+    @patch('app.routes.building_metrics.stages')
+    def test_get_recommendations_as_arrow(self, mock_stages, mock_get_conn):
+        """Accept: application/vnd.apache.arrow.stream returns parallel arrays"""
+        import pyarrow as pa
+        mock_conn, _ = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        mock_stages.first_page.return_value = ([
+            {'intervention_id': 7, 'name': 'LED', 'theme_weighted_effectiveness': 0.9},
+            {'intervention_id': 3, 'name': 'PV', 'theme_weighted_effectiveness': 0.4},
+        ], None)
+
+        token = self._create_token()
+        response = self.client.get(
+            '/projects/123/recommendations?limit=5',
+            headers={'Authorization': f'Bearer {token}', 'Accept': 'application/vnd.apache.arrow.stream'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, 'application/vnd.apache.arrow.stream')
+        table = pa.ipc.open_stream(response.data).read_all()
+        self.assertEqual(table['recommendations.intervention_id'][0].as_py(), [7, 3])
+        self.assertEqual(table['recommendations.theme_weighted_effectiveness'][0].as_py(), [0.9, 0.4])
+        self.assertIsNone(table['next_cursor'][0].as_py())
+
+    @patch('app.routes.building_metrics.get_conn')
+    def test_get_recommendations_bad_limit(self, mock_get_conn):
+        """limit must be an int within the page-size cap"""
+        token = self._create_token()
+        for q in ('limit=0', 'limit=1000', 'limit=x', 'from_rank=y'):
+            response = self.client.get(
+                f'/projects/123/recommendations?{q}',
+                headers={'Authorization': f'Bearer {token}'}
+            )
+            self.assertEqual(response.status_code, 400, q)
+        mock_get_conn.assert_not_called()
+
     @patch('app.routes.building_metrics.get_conn')
     def test_list_user_projects(self, mock_get_conn):
         """Test listing user projects"""
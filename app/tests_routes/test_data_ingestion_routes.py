@@ -0,0 +1,144 @@
+# tests/test_data_ingestion_routes.py
+import io
+import tempfile
+import unittest
+from unittest.mock import patch
+import jwt
+from flask import Flask
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import jobs
+from app.services.data_ingestion import parallel
+from app.routes.data_ingestion import ingest_job
+
+
+class TestDataIngestionRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.app.config['JWT_SECRET'] = 'test-secret-key'
+        self.client = self.app.test_client()
+
+        from app.routes.data_ingestion import ingestion_bp
+        from app.routes.jobs import jobs_bp
+        self.app.register_blueprint(ingestion_bp, url_prefix="/api")
+        self.app.register_blueprint(jobs_bp, url_prefix="/api")
+
+    def _headers(self, role="Admin"):
+        token = jwt.encode({"sub": "1", "role": role}, self.app.config['JWT_SECRET'], algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    @patch('app.routes.data_ingestion.actions.ingest_files')
+    def test_ingest_uploaded_files(self, mock_ingest_files):
+        details = {"themes": {"success": "themes: inserted 1 new rows by name", "rows": 1}}
+        changes = {"inserted": {"themes": 1}, "updated": {}, "deleted": {}, "theme_ids": [7],
+                   "intervention_ids": [], "all_projects": False, "project_ids": []}
+        mock_ingest_files.return_value = ({"details": details, "changes": changes}, 200)
+
+        response = self.client.post(
+            '/api/ingest?sync=1&chunk_rows=100&workers=1',
+            headers=self._headers(),
+            data={"file": (io.BytesIO(b"name\nEnergy\n"), "catalogue.csv"), "sheet": "themes"},
+            content_type="multipart/form-data",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"ok": True, "details": details, "changes": changes})
+        (files,), kwargs = mock_ingest_files.call_args
+        self.assertEqual([name for name, _ in files], ["catalogue.csv"])
+        self.assertEqual(kwargs, {"sheet": "themes", "chunk_rows": 100, "workers": 1})
+
+    @patch('app.routes.data_ingestion.actions.ingest_workbook')
+    def test_ingest_without_files_uses_server_workbook(self, mock_ingest_workbook):
+        mock_ingest_workbook.return_value = ({"error": "missing columns in 'stages': ['relation_type']"}, 400)
+
+        response = self.client.post('/api/ingest?sync=1', headers=self._headers())
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("missing columns", response.json["error"])
+        # no process pool inside a web request unless asked for
+        mock_ingest_workbook.assert_called_once_with(chunk_rows=5000, workers=1)
+
+    @patch('app.routes.data_ingestion.get_conn')
+    @patch('app.routes.data_ingestion.jobs.enqueue', return_value=11)
+    def test_ingest_queues_job_by_default(self, mock_enqueue, mock_get_conn):
+        with tempfile.TemporaryDirectory() as spool, patch.dict(os.environ, {"JOB_SPOOL_DIR": spool}):
+            response = self.client.post(
+                '/api/ingest?chunk_rows=100&workers=1',
+                headers=self._headers(),
+                data={"file": (io.BytesIO(b"name\nEnergy\n"), "themes.csv")},
+                content_type="multipart/form-data",
+            )
+
+            self.assertEqual(response.status_code, 202)
+            self.assertEqual(response.json["job_id"], 11)
+            self.assertEqual(response.json["status_url"], "/api/jobs/11")
+            self.assertEqual(response.headers["Location"], "/api/jobs/11")
+            (_, kind, payload), kwargs = mock_enqueue.call_args
+            self.assertEqual(kind, "ingest")
+            self.assertEqual(kwargs, {"created_by": "1"})
+            [[name, path]] = payload["files"]
+            self.assertEqual(name, "themes.csv")
+            self.assertEqual(payload["cleanup"], [path])
+            with open(path, "rb") as fh:
+                self.assertEqual(fh.read(), b"name\nEnergy\n")
+
+    @patch('app.routes.data_ingestion.jobs.enqueue')
+    def test_ingest_rejects_unsupported_upload_before_queueing(self, mock_enqueue):
+        response = self.client.post(
+            '/api/ingest',
+            headers=self._headers(),
+            data={"file": (io.BytesIO(b"x"), "notes.txt")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(response.status_code, 400)
+        mock_enqueue.assert_not_called()
+
+    @patch('app.routes.data_ingestion.actions.ingest_files')
+    def test_ingest_job_fails_permanently_on_bad_input(self, mock_ingest_files):
+        mock_ingest_files.return_value = ({"error": "unknown sheet 'x'"}, 400)
+        with self.assertRaises(jobs.PermanentJobError):
+            ingest_job({"files": [["x.csv", "/tmp/x.csv"]], "chunk_rows": 10, "workers": 1})
+
+        mock_ingest_files.return_value = ({"error": "failed to update DB: timeout"}, 500)
+        with self.assertRaises(RuntimeError):
+            ingest_job({"files": [["x.csv", "/tmp/x.csv"]], "chunk_rows": 10, "workers": 1})
+
+    @patch('app.routes.data_ingestion.actions.ingest_files', return_value=({"details": {}}, 200))
+    def test_ingest_job_parses_in_parallel_by_default(self, mock_ingest_files):
+        with patch.object(parallel, 'default_workers', return_value=64):
+            ingest_job({"files": [["x.csv", "/tmp/x.csv"]], "chunk_rows": 10, "workers": None})
+        self.assertEqual(mock_ingest_files.call_args.kwargs["workers"], os.cpu_count() or 1)
+
+    @patch('app.routes.data_ingestion.get_conn')
+    @patch('app.routes.data_ingestion.jobs.enqueue', return_value=12)
+    def test_rescore_queues_job_by_default(self, mock_enqueue, mock_get_conn):
+        response = self.client.post('/api/rescore', headers=self._headers(), json={"project_ids": [3, 4]})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json["job_id"], 12)
+        (_, kind, payload), _ = mock_enqueue.call_args
+        self.assertEqual(kind, "rescore")
+        self.assertEqual(payload["project_ids"], [3, 4])
+
+    def test_ingest_rejects_bad_chunk_rows(self):
+        response = self.client.post('/api/ingest?chunk_rows=0', headers=self._headers())
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/ingest?chunk_rows=lots', headers=self._headers())
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/ingest?workers=0', headers=self._headers())
+        self.assertEqual(response.status_code, 400)
+
+    def test_ingest_requires_admin(self):
+        response = self.client.post('/api/ingest', headers=self._headers(role="Client"))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.post('/api/ingest')
+        self.assertEqual(response.status_code, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,160 @@
+# tests/test_graph_routes.py
+import unittest
+from concurrent.futures import TimeoutError
+from unittest.mock import MagicMock, patch
+from flask import Flask
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class TestGraphSvgRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        from app.routes.graph import graphs_bp
+        self.app.register_blueprint(graphs_bp, url_prefix="/api")
+
+        self.conn = MagicMock()
+        self.versions = {"score_version": 4, "reference_version": 2}
+        self.conn.execute.return_value.mappings.return_value.one.side_effect = lambda: self.versions
+        p = patch('app.routes.graph.get_conn')
+        get_conn = p.start()
+        get_conn.return_value.__enter__.return_value = self.conn
+        self.addCleanup(p.stop)
+        p = patch('app.routes.graph.load_graph', return_value=([{"id": 1, "label": "LED", "score": 0.9}], []))
+        self.load_graph = p.start()
+        self.addCleanup(p.stop)
+
+    @patch('app.routes.graph.graph_cache.get_or_render', return_value=b"<svg/>")
+    def test_svg_carries_etag_and_revalidates(self, mock_render):
+        response = self.client.get('/api/projects/3/graph.svg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "image/svg+xml")
+        self.assertEqual(response.data, b"<svg/>")
+        etag = response.headers["ETag"]
+
+        response = self.client.get('/api/projects/3/graph.svg', headers={"If-None-Match": etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(mock_render.call_count, 1)
+        self.assertEqual(self.load_graph.call_count, 1)
+
+    @patch('app.routes.graph.graph_cache.get_or_render', return_value=b"<svg/>")
+    def test_etag_moves_with_scores_and_top_n(self, mock_render):
+        etag = self.client.get('/api/projects/3/graph.svg').headers["ETag"]
+        self.assertNotEqual(self.client.get('/api/projects/3/graph.svg?top_n=10').headers["ETag"], etag)
+        self.versions = {"score_version": 5, "reference_version": 2}
+        response = self.client.get('/api/projects/3/graph.svg', headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    @patch('app.routes.graph.graph_cache.get_or_render', return_value=b"<svg/>")
+    def test_etag_covers_focus_and_themes(self, mock_render):
+        etag = self.client.get('/api/projects/3/graph.svg').headers["ETag"]
+        focused = self.client.get('/api/projects/3/graph.svg?focus=7&depth=2').headers["ETag"]
+        themed = self.client.get('/api/projects/3/graph.svg?theme_ids=2,1').headers["ETag"]
+        self.assertEqual(len({etag, focused, themed}), 3)
+        self.assertEqual(self.client.get('/api/projects/3/graph.svg?theme_ids=1,2').headers["ETag"], themed)
+
+    @patch('app.routes.graph.graph_cache.get_or_render', side_effect=TimeoutError)
+    def test_slow_render_answers_503(self, mock_render):
+        response = self.client.get('/api/projects/3/graph.svg')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "2")
+
+
+class TestGraphJsonRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.client = self.app.test_client()
+
+        from app.routes.graph import graphs_bp
+        self.app.register_blueprint(graphs_bp, url_prefix="/api")
+
+        p = patch('app.routes.graph.get_conn')
+        p.start()
+        self.addCleanup(p.stop)
+
+    @patch('app.routes.graph.load_graph')
+    def test_params_are_parsed_and_echoed(self, mock_load):
+        nodes = [{"id": 7, "label": "LED", "score": None}, {"id": 2, "label": "PV", "score": 0.4}]
+        edges = [{"src": 7, "dst": 2, "weight": 0.2, "multiplier": 1.2}]
+        mock_load.return_value = (nodes, edges)
+
+        response = self.client.get('/api/projects/3/graph?top_n=50&epsilon=0.1&theme_ids=4,1&focus=7&depth=2')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["params"],
+                         {"top_n": 50, "epsilon": 0.1, "theme_ids": [1, 4], "focus": 7, "depth": 2})
+        self.assertEqual(response.json["nodes"], nodes)
+        self.assertEqual(response.json["edges"], edges)
+        (_, project_id, params), _ = mock_load.call_args
+        self.assertEqual(project_id, 3)
+        self.assertEqual(params.theme_ids, (1, 4))
+
+    @patch('app.routes.graph.load_graph')
+    def test_arrow_encoding(self, mock_load):
+        import pyarrow as pa
+        mock_load.return_value = ([{"id": 7, "label": "LED", "score": 0.5}], [])
+
+        response = self.client.get('/api/projects/3/graph', headers={"Accept": "application/vnd.apache.arrow.stream"})
+
+        self.assertEqual(response.mimetype, "application/vnd.apache.arrow.stream")
+        table = pa.ipc.open_stream(response.data).read_all()
+        self.assertEqual(table["nodes.id"][0].as_py(), [7])
+        self.assertEqual(table["edges.src"][0].as_py(), [])   # declared columns survive an empty edge list
+        self.assertEqual(table["params.top_n"][0].as_py(), 30)
+
+    @patch('app.routes.graph.load_graph', return_value=([], []))
+    def test_defaults(self, mock_load):
+        response = self.client.get('/api/projects/3/graph')
+        self.assertEqual(response.json["params"],
+                         {"top_n": 30, "epsilon": 0.05, "theme_ids": [], "focus": None, "depth": None})
+
+    @patch('app.routes.graph.load_graph', side_effect=ValueError("unknown focus intervention 99"))
+    def test_bad_params(self, mock_load):
+        for query in ("top_n=0", "top_n=lots", "epsilon=-1", "depth=9", "theme_ids=a,b"):
+            self.assertEqual(self.client.get(f'/api/projects/3/graph?{query}').status_code, 400, query)
+        response = self.client.get('/api/projects/3/graph?focus=99')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json["error"], "unknown focus intervention 99")
+
+
+class TestSvgBackends(unittest.TestCase):
+
+    @patch('app.routes.graph._graphviz_svg', return_value=b"<svg>dot</svg>")
+    def test_python_backend_draws_in_process(self, mock_dot):
+        from app.routes.graph import _svg_from_nodes_edges
+        svg = _svg_from_nodes_edges([{"id": 1, "label": "LED"}], [], "Project 1")
+        self.assertIn(b"LED", svg)
+        mock_dot.assert_not_called()
+        self.assertEqual(_svg_from_nodes_edges([], [], "Project 1", backend="graphviz"), b"<svg>dot</svg>")
+
+    @patch('app.routes.graph._graphviz_svg', return_value=b"<svg>dot</svg>")
+    @patch('app.routes.graph.graph_layout.render_svg', side_effect=RuntimeError("bad layout"))
+    def test_falls_back_to_graphviz(self, mock_layout, mock_dot):
+        from app.routes.graph import _svg_from_nodes_edges
+        self.assertEqual(_svg_from_nodes_edges([], [], "Project 1"), b"<svg>dot</svg>")
+
+    def test_render_svg_needs_no_request(self):
+        """The PDF report renders the graph from a job's app context, without an HTTP request."""
+        from app.routes.graph import render_svg
+        app = Flask(__name__)
+        with app.app_context(), patch('app.routes.graph.graph_cache.get_or_render',
+                                      side_effect=lambda key, render, timeout=None: render()) as mock_cache:
+            svg = render_svg(5, [{"id": 1, "label": "LED"}], [])
+        self.assertIn(b"LED", svg)
+        self.assertIn(b"Project 5", svg)
+        self.assertEqual(len(mock_cache.call_args.args[0]), 64)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -46,18 +46,25 @@ class TestInterventionsRoutes(unittest.TestCase):
         mock_conn.exec_driver_sql = MagicMock()  # Add missing method
         
         return mock_conn, mock_result
+
+    def _mock_catalogue(self, mock_catalogue, intervention_ids=(101, 102, 103)):
+        """Reference snapshot containing the given interventions"""
+        mock_catalogue.current.return_value.interventions = {iid: Mock() for iid in intervention_ids}
+        mock_catalogue.current.return_value.rules_by_cause = {}
     
+    @patch('app.routes.interventions.catalogue')
     @patch('app.routes.interventions.get_conn')
     @patch('app.routes.interventions.intervention_recompute')
     @patch('app.routes.interventions.apply_weights')
     @patch('app.routes.interventions.decay_by_intervention')
-    def test_apply_intervention_success(self, mock_decay, mock_apply_weights, mock_recompute, mock_get_conn):
+    def test_apply_intervention_success(self, mock_decay, mock_apply_weights, mock_recompute, mock_get_conn, mock_catalogue):
         """Test successful intervention application"""
         mock_conn, mock_result = self._create_mock_connection()
         mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue)
         
-        # Mock project and intervention existence
-        mock_result.scalar_one_or_none.side_effect = [True, True, None]  # project exists, intervention exists, no existing implementation
+        # Mock project existence (interventions come from the catalogue snapshot)
+        mock_result.scalar_one_or_none.side_effect = [True, 123]  # project exists, INSERT returned a row (newly implemented)
         
         # Mock intervention recompute
         mock_recompute.return_value = {201: 0.8, 202: 0.9}
@@ -81,16 +88,19 @@ class TestInterventionsRoutes(unittest.TestCase):
         mock_recompute.assert_called_once()
         mock_apply_weights.assert_called_once()
     
+    @patch('app.routes.interventions.catalogue')
     @patch('app.routes.interventions.get_conn')
     @patch('app.routes.interventions.intervention_recompute')
     @patch('app.routes.interventions.apply_weights')
-    def test_apply_intervention_dry_run(self, mock_apply_weights, mock_recompute, mock_get_conn):
+    def test_apply_intervention_dry_run(self, mock_apply_weights, mock_recompute, mock_get_conn, mock_catalogue):
         """Test intervention application with dry run"""
         mock_conn, mock_result = self._create_mock_connection()
         mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue)
         
-        # Mock project and intervention existence
-        mock_result.scalar_one_or_none.side_effect = [True, True]
+        # Mock project existence
+        mock_result.scalar_one_or_none.side_effect = [True]
+        mock_result.first.return_value = None  # not implemented yet: the preview folds its effects in
         
         # Mock intervention recompute
         mock_recompute.return_value = {201: 0.8, 202: 0.9}
@@ -106,14 +116,58 @@ class TestInterventionsRoutes(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         data = response.get_json()
         self.assertTrue(data['dry_run'])
+        self.assertEqual(data['updated'], 2)
+        mock_recompute.assert_called_once()
+
+    @patch('app.routes.interventions.catalogue')
+    @patch('app.routes.interventions.get_conn')
+    @patch('app.routes.interventions.intervention_recompute')
+    @patch('app.routes.interventions.apply_weights')
+    def test_reapplying_does_not_compound_effects_twice(self, mock_apply_weights, mock_recompute,
+                                                        mock_get_conn, mock_catalogue):
+        """An already-implemented intervention's effects are already in the scores"""
+        mock_conn, mock_result = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue)
+        mock_result.scalar_one_or_none.side_effect = [True, None]  # project exists, INSERT hit the conflict
+
+        response = self.client.post(
+            '/projects/123/apply',
+            json={'intervention_id': 101},
+            headers={'Authorization': f'Bearer {self._create_token()}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['updated'], 0)
+        self.assertFalse(response.get_json()['insert_returned_row'])
+        mock_recompute.assert_not_called()
+
+    @patch('app.routes.interventions.catalogue')
+    @patch('app.routes.interventions.get_conn')
+    def test_apply_intervention_unknown_intervention(self, mock_get_conn, mock_catalogue):
+        """Test applying an intervention missing from the catalogue snapshot"""
+        mock_conn, mock_result = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue, intervention_ids=(101,))
+        mock_result.scalar_one_or_none.side_effect = [True]
+
+        response = self.client.post(
+            '/projects/123/apply',
+            json={'intervention_id': 999},
+            headers={'Authorization': f'Bearer {self._create_token()}'}
+        )
+
+        self.assertEqual(response.status_code, 404)
     
+    @patch('app.routes.interventions.catalogue')
     @patch('app.routes.interventions.get_conn')
     @patch('app.routes.interventions.intervention_recompute')
     @patch('app.routes.interventions.apply_weights')
-    def test_apply_interventions_batch(self, mock_apply_weights, mock_recompute, mock_get_conn):
+    def test_apply_interventions_batch(self, mock_apply_weights, mock_recompute, mock_get_conn, mock_catalogue):
         """Test batch intervention application"""
         mock_conn, mock_result = self._create_mock_connection()
         mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue)
         
         # Mock project and interventions exist
         mock_result.scalar_one_or_none.side_effect = [True, True, True, True]  # project + 3 interventions
@@ -134,6 +188,62 @@ class TestInterventionsRoutes(unittest.TestCase):
         # For now, just check if it doesn't crash with 500
         # The batch endpoint might work partially even without stages
         self.assertNotEqual(response.status_code, 500)
+
+
+    @patch('app.routes.interventions.catalogue')
+    @patch('app.routes.interventions.get_conn')
+    @patch('app.routes.interventions.recommendations')
+    @patch('app.routes.interventions.batch_intervention_recompute')
+    @patch('app.routes.interventions.implement_interventions')
+    @patch('app.routes.interventions.apply_weights')
+    def test_apply_interventions_batch_single_pass(self, mock_apply_weights, mock_implement,
+                                                    mock_batch_recompute, mock_recs,
+                                                    mock_get_conn, mock_catalogue):
+        """Batch apply inserts, recomputes and reweights once for the whole batch"""
+        mock_conn, mock_result = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue)
+        mock_result.scalar_one_or_none.return_value = True
+        mock_implement.return_value = [101, 103]  # 102 was already implemented
+        mock_recs.return_value = [{'intervention_id': 104, 'name': 'Next', 'theme_weighted_effectiveness': 0.4}]
+
+        response = self.client.post(
+            '/projects/123/apply-batch',
+            json={'intervention_ids': [101, 102, 103, 101]},
+            headers={'Authorization': f'Bearer {self._create_token()}'}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(data['applied_count'], 2)
+        self.assertEqual(len(data['next_recommendations']), 1)
+
+        mock_implement.assert_called_once()
+        self.assertEqual(mock_implement.call_args[0][2], [101, 102, 103])
+        mock_batch_recompute.assert_called_once()
+        self.assertEqual(mock_batch_recompute.call_args[0][2], [101, 103])
+        mock_apply_weights.assert_called_once()
+        self.assertEqual(mock_get_conn.call_count, 1)
+
+    @patch('app.routes.interventions.catalogue')
+    @patch('app.routes.interventions.get_conn')
+    @patch('app.routes.interventions.implement_interventions')
+    def test_apply_interventions_batch_unknown_id(self, mock_implement, mock_get_conn, mock_catalogue):
+        """An unknown id rejects the whole batch before anything is written"""
+        mock_conn, mock_result = self._create_mock_connection()
+        mock_get_conn.return_value.__enter__.return_value = mock_conn
+        self._mock_catalogue(mock_catalogue, intervention_ids=(101,))
+        mock_result.scalar_one_or_none.return_value = True
+
+        response = self.client.post(
+            '/projects/123/apply-batch',
+            json={'intervention_ids': [101, 555]},
+            headers={'Authorization': f'Bearer {self._create_token()}'}
+        )
+
+        self.assertEqual(response.status_code, 404)
+        self.assertIn('555', response.get_json()['message'])
+        mock_implement.assert_not_called()
     
     @patch('app.routes.interventions.get_conn')
     def test_get_implemented_interventions(self, mock_get_conn):
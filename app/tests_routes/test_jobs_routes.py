@@ -0,0 +1,114 @@
+# tests/test_jobs_routes.py
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+import jwt
+from flask import Flask
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _job(**overrides):
+    job = {
+        "id": 7, "kind": "report_pdf", "status": "succeeded", "attempts": 1, "max_attempts": 3,
+        "result": {"project_id": 3, "bytes": 4}, "error": None, "result_mimetype": "application/pdf",
+        "has_blob": True, "created_by": "1",
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "updated_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "finished_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    }
+    job.update(overrides)
+    return job
+
+
+class TestJobsRoutes(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['TESTING'] = True
+        self.app.config['JWT_SECRET'] = 'test-secret-key'
+        self.client = self.app.test_client()
+
+        from app.routes.jobs import jobs_bp
+        self.app.register_blueprint(jobs_bp, url_prefix="/api")
+
+        p = patch('app.routes.jobs.get_conn')
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _headers(self, sub="1", role="Client"):
+        token = jwt.encode({"sub": sub, "role": role}, self.app.config['JWT_SECRET'], algorithm="HS256")
+        return {"Authorization": f"Bearer {token}"}
+
+    @patch('app.routes.jobs.jobs.get')
+    def test_status_of_finished_job(self, mock_get):
+        mock_get.return_value = _job()
+
+        response = self.client.get('/api/jobs/7', headers=self._headers())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json["status"], "succeeded")
+        self.assertEqual(response.json["result_url"], "/api/jobs/7/result")
+        self.assertEqual(response.json["finished_at"], "2024-01-01T00:00:00+00:00")
+
+    @patch('app.routes.jobs.jobs.get')
+    def test_status_is_private_to_owner_and_admins(self, mock_get):
+        mock_get.return_value = _job()
+
+        self.assertEqual(self.client.get('/api/jobs/7').status_code, 401)
+        self.assertEqual(self.client.get('/api/jobs/7', headers=self._headers(sub="2")).status_code, 403)
+        self.assertEqual(self.client.get('/api/jobs/7', headers=self._headers(sub="2", role="Admin")).status_code, 200)
+
+    @patch('app.routes.jobs.jobs.get')
+    def test_ownerless_job_is_admin_only(self, mock_get):
+        mock_get.return_value = _job(created_by=None)
+
+        self.assertEqual(self.client.get('/api/jobs/7').status_code, 401)
+        self.assertEqual(self.client.get('/api/jobs/7', headers=self._headers(sub="1")).status_code, 403)
+        self.assertEqual(self.client.get('/api/jobs/7', headers=self._headers(role="Admin")).status_code, 200)
+
+    @patch('app.routes.jobs.jobs.get', return_value=None)
+    def test_unknown_job(self, mock_get):
+        self.assertEqual(self.client.get('/api/jobs/99', headers=self._headers()).status_code, 404)
+
+    @patch('app.routes.jobs.jobs.get', return_value=None)
+    def test_anonymous_caller_cannot_probe_job_ids(self, mock_get):
+        # a missing id answers like an existing one: 401, before any lookup
+        self.assertEqual(self.client.get('/api/jobs/99').status_code, 401)
+        self.assertEqual(self.client.get('/api/jobs/99/result').status_code, 401)
+        mock_get.assert_not_called()
+
+    @patch('app.routes.jobs.jobs.get_blob', return_value=(b"%PDF", "application/pdf"))
+    @patch('app.routes.jobs.jobs.get')
+    def test_result_streams_stored_file(self, mock_get, mock_blob):
+        mock_get.return_value = _job()
+
+        response = self.client.get('/api/jobs/7/result', headers=self._headers())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/pdf")
+        self.assertEqual(response.data, b"%PDF")
+
+    @patch('app.routes.jobs.jobs.get')
+    def test_result_of_json_job(self, mock_get):
+        mock_get.return_value = _job(kind="rescore", has_blob=False, result={"ok": True})
+
+        response = self.client.get('/api/jobs/7/result', headers=self._headers())
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, {"ok": True})
+
+    @patch('app.routes.jobs.jobs.get')
+    def test_result_of_unfinished_job(self, mock_get):
+        mock_get.return_value = _job(status="running", has_blob=False, result=None, finished_at=None)
+
+        response = self.client.get('/api/jobs/7/result', headers=self._headers())
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json["status"], "running")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -33,7 +33,7 @@ class TestProjectsRoutes(unittest.TestCase):
         
         self.mock_conn.begin.return_value = self.mock_tx
         self.mock_conn.begin_nested.return_value = self.mock_tx
-        self.mock_conn.in_transaction = False
+        self.mock_conn.in_transaction = Mock(return_value=False)  # Connection.in_transaction is a method
         self.mock_conn.exec_driver_sql = MagicMock()  # Add missing method
         
     def _create_token(self, user_id="1"):
@@ -59,6 +59,35 @@ class TestProjectsRoutes(unittest.TestCase):
         
         self.assertEqual(response.status_code, 400)
     
+    @patch('app.routes.projects.apply_weights')
+    @patch('app.routes.projects.eligibility')
+    @patch('app.routes.projects.rules_metric')
+    @patch('app.routes.projects.catalogue')
+    @patch('app.routes.projects.pipeline')
+    @patch('app.routes.projects.get_conn')
+    def test_create_project_weighting_failure_is_not_fatal(self, mock_get_conn, mock_pipeline, mock_catalogue,
+                                                           mock_rules_metric, mock_eligibility, mock_apply):
+        """apply_weights runs after the pipeline has flushed, so its failure is caught where it happens"""
+        mock_get_conn.return_value.__enter__.return_value = self.mock_conn
+        self.mock_result.mappings.return_value.one.return_value = {'id': 5, 'name': 'P', 'levels': 3}
+        events = []
+        mock_pipeline.return_value.__enter__.side_effect = lambda: events.append('pipeline')
+        mock_pipeline.return_value.__exit__.side_effect = lambda *a: events.append('flushed')
+
+        def failing_weights(*args):
+            events.append('weights')
+            raise RuntimeError("weights broke")
+        mock_apply.side_effect = failing_weights
+
+        token = self._create_token()
+        response = self.client.post('/projects', json={'name': 'P', 'levels': 3},
+                                    headers={'Authorization': f'Bearer {token}'})
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(events, ['pipeline', 'flushed', 'weights'])
+        self.assertEqual(self.mock_tx.commit.call_count, 2)  # project insert, then the recompute
+        self.mock_tx.rollback.assert_not_called()
+
     @patch('app.routes.projects.get_conn')
     def test_get_project(self, mock_get_conn):
         """Test getting a project"""
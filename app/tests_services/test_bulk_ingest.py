@@ -0,0 +1,363 @@
+# tests/test_bulk_ingest.py
+import io
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+import psycopg
+from app.services.data_ingestion import actions, bulk, parallel, readers
+from app.services.data_ingestion.changeset import ChangeSet, resolve_projects
+
+
+def _sheets(**overrides):
+    sheets = {
+        "themes": pd.DataFrame({"name": ["Energy", " Water ", None]}),
+        "interventions": pd.DataFrame({
+            "name": ["Solar", "Rainwater", "", "Heat pump"],
+            "theme_name": ["Energy", "Water", "Energy", None],
+            "base_effectiveness": [1.5, "2", 3, 4],
+            "is_stage": ["yes", 0, True, None],
+        }),
+        "stages": pd.DataFrame({
+            "src_intervention_name": ["Solar", "Solar", None],
+            "dst_intervention_name": ["Rainwater", "Rainwater", "Solar"],
+            "relation_type": ["prereq", " ", "mutex"],
+        }),
+        "metric_effects": pd.DataFrame({
+            "cause_name": ["gia", "gia", "gia", None],
+            "effected_intervention_name": ["Solar", "Solar", "Solar", "Solar"],
+            "metric_type": ["ratio", "ratio", None, "ratio"],
+            "lower_bound": [0, 10, None, None],
+            "upper_bound": [100, 5, None, None],
+            "multiplier": ["sp", "sp", "Unknown", "wn"],
+        }),
+        "intervention_effects": pd.DataFrame({
+            "cause_intervention_name": ["Solar"],
+            "effected_intervention_name": ["Rainwater"],
+            "metric_type": [None],
+            "lower_bound": [None],
+            "upper_bound": [None],
+            "multiplier": ["Moderate  negative"],
+            "reasoning": ["  shares roof area "],
+        }),
+    }
+    sheets.update(overrides)
+    return {k: v.astype(object).where(pd.notnull(v), None) for k, v in sheets.items()}
+
+
+class TestSheetRows(unittest.TestCase):
+
+    def test_theme_rows_from_both_sheets(self):
+        self.assertEqual(bulk.theme_rows(_sheets()["themes"]), [(0, 0, "Energy"), (0, 1, "Water")])
+        self.assertEqual(bulk.theme_rows(_sheets()["interventions"], "interventions"),
+                         [(1, 0, "Energy"), (1, 1, "Water"), (1, 2, "Energy")])
+
+    def test_intervention_rows(self):
+        rows = bulk.intervention_rows(_sheets()["interventions"])
+        self.assertEqual(rows, [(0, "Solar", "Energy", 1.5, True), (1, "Rainwater", "Water", 2.0, False)])
+
+    def test_stage_rows_count_skips(self):
+        rows, skipped = bulk.stage_rows(_sheets()["stages"])
+        self.assertEqual(rows, [(0, "Solar", "Rainwater", "prereq")])
+        self.assertEqual(skipped, {"skipped_blank_rel": 1, "skipped_missing": 1})
+
+    def test_effect_rows_validate_bounds_and_multiplier(self):
+        rows, skipped = bulk.effect_rows(_sheets()["metric_effects"], "metric_effects")
+        self.assertEqual(rows, [(0, "gia", "Solar", "ratio", 0.0, 100.0, 1.5, None)])
+        self.assertEqual(skipped, {"skipped_invalid": 2, "skipped_missing": 1})
+
+        rows, _ = bulk.effect_rows(_sheets()["intervention_effects"], "intervention_effects")
+        self.assertEqual(rows, [(0, "Solar", "Rainwater", None, None, None, 0.7, "shares roof area")])
+
+    def test_missing_columns(self):
+        with self.assertRaisesRegex(ValueError, "missing columns in 'stages'"):
+            bulk.stage_rows(pd.DataFrame({"src_intervention_name": ["a"]}))
+        with self.assertRaisesRegex(ValueError, "unknown sheet 'notes'"):
+            bulk.require_columns(pd.DataFrame(), "notes")
+
+
+class TestStaging(unittest.TestCase):
+
+    def _conn(self, raw):
+        conn = MagicMock()
+        conn.connection.driver_connection = raw
+        return conn
+
+    def test_create_staging(self):
+        conn = self._conn(MagicMock())
+        bulk.create_staging(conn)
+        ddl = [str(c[0][0]) for c in conn.execute.call_args_list]
+        self.assertEqual(len(ddl), 10)
+        self.assertIn("DROP TABLE IF EXISTS stg_stages", ddl[4])
+        self.assertIn("CREATE TEMP TABLE stg_stages", ddl[5])
+        self.assertIn("ON COMMIT DROP", ddl[5])
+
+    def test_psycopg_uses_copy(self):
+        raw = MagicMock(spec=psycopg.Connection)
+        conn = self._conn(raw)
+
+        table = bulk.stage(conn, "stages", [(0, "Solar", "Rainwater", "prereq")])
+
+        self.assertEqual(table, "stg_stages")
+        cur = raw.cursor.return_value.__enter__.return_value
+        cur.copy.assert_called_once_with("COPY stg_stages (n, src_name, dst_name, relation_type) FROM STDIN")
+        cur.copy.return_value.__enter__.return_value.write_row.assert_called_once_with(
+            (0, "Solar", "Rainwater", "prereq")
+        )
+        conn.execute.assert_not_called()  # no INSERT fallback
+
+    def test_other_drivers_fall_back_to_executemany(self):
+        conn = self._conn(MagicMock())
+        bulk.copy_rows(conn, "stg_themes", ["n", "name"], [(0, "Energy"), (1, "Water")])
+        stmt, params = conn.execute.call_args[0]
+        self.assertIn("INSERT INTO stg_themes (n, name) VALUES (:n, :name)", str(stmt))
+        self.assertEqual(params, [{"n": 0, "name": "Energy"}, {"n": 1, "name": "Water"}])
+
+        conn.reset_mock()
+        bulk.copy_rows(conn, "stg_themes", ["n", "name"], [])
+        conn.execute.assert_not_called()
+
+
+class TestIngest(unittest.TestCase):
+
+    def _conn(self):
+        conn = MagicMock()
+        conn.connection.driver_connection = MagicMock()
+        return conn
+
+    def test_ingest_diff_merges_every_sheet_in_order(self):
+        conn = self._conn()
+        conn.execute.return_value.scalar.return_value = [11, 12]
+        conn.execute.return_value.mappings.return_value.one.side_effect = [
+            {"inserted_ids": [], "updated_ids": [5], "unresolved": 0},
+            {"inserted": 1, "deleted": 1, "changed": [[1, 2, "prereq"], [3, 4, "mutex"]], "unresolved": 0},
+            {"inserted": 1, "deleted": 0, "changed": [["gia", 1, 0.0, 100.0]], "unresolved": 0},
+            {"inserted": 0, "deleted": 2, "changed": [[1, 2, None, None], [1, 2, None, None]], "unresolved": 1},
+        ]
+
+        sheets = _sheets()
+        chunks = [("interventions", sheets["interventions"].iloc[:2]),
+                  ("interventions", sheets["interventions"].iloc[2:])]
+        chunks += [(name, df) for name, df in sheets.items() if name != "interventions"]
+
+        results, changes = bulk.ingest(conn, bulk.clean_chunks(chunks))
+
+        self.assertEqual(list(results), list(bulk.REQUIRED))
+        self.assertEqual(results["themes"]["success"], "themes: inserted 2 new rows by name")
+        self.assertEqual(results["interventions"]["success"], "interventions: processed 4 rows (inserted 0, updated 1)")
+        self.assertEqual(results["interventions"]["rows"], 4)
+        self.assertEqual(results["interventions"]["chunks"], 2)
+        self.assertIn("rows_per_second", results["stages"])
+        self.assertEqual(
+            results["stages"]["success"],
+            "stages: processed 3 rows (inserted 1, deleted 1) "
+            "(skipped 1 (missing name/id), skipped 1 (blank relation_type))",
+        )
+        self.assertEqual(
+            results["metric_effects"]["success"],
+            "metric_effects: processed 4 rows (inserted 1, deleted 0); skipped 1 missing ID/name; "
+            "skipped 2 invalid bounds/multiplier",
+        )
+        self.assertIn("skipped 1 missing ID/name", results["intervention_effects"]["success"])
+
+        self.assertEqual(changes.inserted, {"themes": 2, "stages": 1, "metric_effects": 1})
+        self.assertEqual(changes.updated, {"interventions": 1})
+        self.assertEqual(changes.deleted, {"stages": 1, "intervention_effects": 2})
+        self.assertEqual(changes.theme_ids, {11, 12})
+        self.assertEqual(changes.intervention_ids, {1, 2, 3, 5})
+        self.assertEqual(changes.stage_rules, [(2, "prereq"), (4, "mutex")])
+        self.assertEqual(changes.metric_rules, [("gia", 0.0, 100.0)])
+        self.assertEqual(changes.cause_interventions, {1})
+
+        merges = [str(c[0][0]) for c in conn.execute.call_args_list if "stg_" in str(c[0][0])
+                  and "INSERT INTO stg_" not in str(c[0][0]) and "TABLE" not in str(c[0][0])]
+        self.assertEqual(len(merges), 5)
+        self.assertIn("INSERT INTO themes", merges[0])
+        self.assertIn("INSERT INTO interventions", merges[1])
+        self.assertIn("WHERE md5(ROW(interventions.theme_id", merges[1])
+        self.assertIn("DELETE FROM stages", merges[2])
+        self.assertIn("DELETE FROM metric_effects", merges[3])
+        self.assertIn("cur.k > 1", merges[4])
+
+    def test_unsent_sheets_are_left_alone(self):
+        conn = self._conn()
+        conn.execute.return_value.mappings.return_value.one.return_value = {
+            "inserted": 0, "deleted": 0, "changed": [], "unresolved": 0}
+
+        results, changes = bulk.ingest(conn, bulk.clean_chunks([("stages", _sheets()["stages"])]))
+
+        self.assertEqual(list(results), ["stages"])
+        self.assertTrue(changes.empty)
+        sql = " ".join(str(c[0][0]) for c in conn.execute.call_args_list)
+        self.assertNotIn("DELETE FROM metric_effects", sql)
+        self.assertNotIn("INSERT INTO themes", sql)
+
+    @patch("app.services.data_ingestion.actions.catalogue")
+    @patch("app.services.data_ingestion.actions.resolve_projects")
+    @patch("app.services.data_ingestion.actions.bulk.ingest")
+    @patch("app.services.data_ingestion.actions.get_conn")
+    def test_ingest_files_bumps_version_only_on_change(self, mock_get_conn, mock_ingest, mock_resolve, mock_catalogue):
+        conn = MagicMock()
+        mock_get_conn.return_value.__enter__.return_value = conn
+
+        mock_ingest.return_value = ({"stages": {"success": "..."}}, ChangeSet())
+        resp, status = actions.ingest_files([("stages.csv", io.BytesIO(b""))])
+        self.assertEqual(status, 200)
+        self.assertEqual(resp["changes"]["inserted"], {})
+        mock_catalogue.bump_version.assert_not_called()
+        mock_catalogue.invalidate.assert_not_called()
+
+        changed = ChangeSet()
+        changed.count("stages", deleted=1)
+        mock_ingest.return_value = ({"stages": {"success": "..."}}, changed)
+        resp, status = actions.ingest_files([("stages.csv", io.BytesIO(b""))])
+        self.assertEqual(resp["changes"]["deleted"], {"stages": 1})
+        mock_resolve.assert_called_once_with(conn, changed)
+        mock_catalogue.bump_version.assert_called_once_with(conn)
+        mock_catalogue.invalidate.assert_called_once()
+
+
+class TestChangeSet(unittest.TestCase):
+
+    def test_intervention_changes_affect_every_project(self):
+        changes = ChangeSet()
+        changes.count("interventions", updated=1)
+        conn = MagicMock()
+        resolve_projects(conn, changes)
+        self.assertTrue(changes.all_projects)
+        self.assertIsNone(changes.to_dict()["project_ids"])
+        conn.execute.assert_not_called()
+
+    def test_no_rule_changes_affect_no_projects(self):
+        changes = ChangeSet()
+        changes.count("themes", inserted=1)
+        resolve_projects(MagicMock(), changes)
+        self.assertEqual(changes.to_dict()["project_ids"], [])
+        self.assertFalse(changes.all_projects)
+
+    def test_rule_changes_narrow_projects(self):
+        changes = ChangeSet()
+        changes.count("metric_effects", inserted=1)
+        changes.metric_rules.append(("gia", None, 500.0))
+        changes.cause_interventions.add(3)
+        changes.stage_rules.append((4, "mutex"))
+        conn = MagicMock()
+        conn.execute.return_value.scalars.return_value.all.return_value = [9, 2]
+
+        resolve_projects(conn, changes)
+
+        self.assertEqual(changes.to_dict()["project_ids"], [2, 9])
+        params = conn.execute.call_args[0][1]
+        self.assertEqual(params["causes"], [3])
+        self.assertEqual((params["metrics"], params["lbs"], params["ubs"]), (["gia"], [None], [500.0]))
+        self.assertEqual((params["dsts"], params["rels"]), ([4], ["mutex"]))
+        self.assertIn("implemented_interventions", str(conn.execute.call_args[0][0]))
+
+    @patch("app.services.data_ingestion.actions.get_conn")
+    def test_ingest_files_rejects_bad_upload(self, mock_get_conn):
+        mock_get_conn.return_value.__enter__.return_value = MagicMock()
+
+        resp, status = actions.ingest_files([("notes.csv", io.BytesIO(b"a,b\n1,2\n"))])
+        self.assertEqual(status, 400)
+        self.assertIn("unknown sheet 'notes'", resp["error"])
+
+        resp, status = actions.ingest_files([("stages.json", io.BytesIO(b"{}"))])
+        self.assertEqual(status, 400)
+        self.assertIn("unsupported file type", resp["error"])
+
+
+class TestReaders(unittest.TestCase):
+
+    def test_xlsx_read_only_chunks(self):
+        from openpyxl import Workbook
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Stages"
+        ws.append(["Src_Intervention_Name", "dst_intervention_name", "relation_type"])
+        for i in range(5):
+            ws.append([f"a{i}", f"b{i}", "prereq"])
+        ws.append([None, None, None])
+        wb.create_sheet("notes").append(["ignored"])
+        buf = io.BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+
+        chunks = list(readers.iter_upload("catalogue.xlsx", buf, chunk_rows=2))
+
+        self.assertEqual([(s, len(df)) for s, df in chunks], [("stages", 2), ("stages", 2), ("stages", 1)])
+        self.assertEqual(list(chunks[0][1].columns), bulk.REQUIRED["stages"])
+        self.assertEqual(list(chunks[2][1].index), [4])
+
+    def test_csv_chunks_named_by_file_stem(self):
+        data = b"name\nEnergy\n\nWater\nHeat\n"
+        chunks = list(readers.iter_upload("Themes.csv", io.BytesIO(data), chunk_rows=2))
+        self.assertEqual([s for s, _ in chunks], ["themes", "themes"])
+        self.assertEqual(list(chunks[1][1].index), [2])
+        self.assertEqual(bulk.theme_rows(chunks[1][1]), [(0, 2, "Heat")])
+
+    def test_parquet_batches(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        buf = io.BytesIO()
+        pq.write_table(pa.table({"name": ["Energy", None, "Water"]}), buf)
+        buf.seek(0)
+
+        chunks = list(readers.iter_upload("upload.parquet", buf, sheet="themes", chunk_rows=2))
+
+        self.assertEqual([len(df) for _, df in chunks], [2, 1])
+        self.assertIsNone(chunks[0][1]["name"][1])
+        self.assertEqual(list(chunks[1][1].index), [2])
+
+
+
+class TestParallelParsing(unittest.TestCase):
+
+    def _workbook(self):
+        from openpyxl import Workbook
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "themes"
+        for row in (["name"], ["Energy"], ["Water"]):
+            ws.append(row)
+        ws = wb.create_sheet("interventions")
+        ws.append(bulk.REQUIRED["interventions"])
+        for i in range(7):
+            ws.append([f"i{i}", "Energy", i, "no"])
+        buf = io.BytesIO()
+        wb.save(buf)
+        buf.seek(0)
+        return buf
+
+    def _files(self):
+        return [
+            ("catalogue.xlsx", self._workbook()),
+            ("stages.csv", io.BytesIO(b"src_intervention_name,dst_intervention_name,relation_type\n"
+                                      b"i0,i1,prereq\ni2,i3,mutex\ni4,i5,prereq\n")),
+        ]
+
+    def test_pool_matches_serial_in_input_order(self):
+        serial = list(parallel.parse_uploads(self._files(), chunk_rows=3, workers=1))
+        pooled = list(parallel.parse_uploads(self._files(), chunk_rows=3, workers=3))
+
+        self.assertEqual([(c.sheet, c.size) for c in pooled],
+                         [("themes", 2), ("interventions", 3), ("interventions", 3), ("interventions", 1),
+                          ("stages", 3)])
+        self.assertEqual([(c.sheet, c.rows, c.skipped) for c in pooled],
+                         [(c.sheet, c.rows, c.skipped) for c in serial])
+
+    def test_worker_validation_errors_propagate(self):
+        files = self._files() + [("metric_effects.csv", io.BytesIO(b"cause_name\ngia\n"))]
+        with self.assertRaisesRegex(ValueError, "missing columns in 'metric_effects'"):
+            list(parallel.parse_uploads(files, workers=2))
+
+    def test_names_are_validated_before_any_parsing(self):
+        with self.assertRaisesRegex(ValueError, "unknown sheet 'notes'"):
+            list(parallel.parse_uploads([("notes.csv", io.BytesIO(b"a\n1\n"))], workers=2))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+# tests/test_catalogue.py
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import catalogue
+from app.services.costing import calc_cost_level
+from app.services.types import InterventionRule
+
+
+def _snapshot(version, **overrides):
+    fields = dict(
+        version=version, interventions={}, themes={}, prereqs={}, mutexes={},
+        metric_rules=(), intervention_rules=(), rules_by_cause={},
+        step_size=None, metric_engine=None,
+    )
+    fields.update(overrides)
+    return catalogue.Catalogue(**fields)
+
+
+class TestCatalogueSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        catalogue.invalidate()
+
+    def tearDown(self):
+        catalogue.invalidate()
+
+    @patch('app.services.catalogue.load_catalogue')
+    @patch('app.services.catalogue.fetch_version')
+    def test_current_reuses_snapshot_while_version_unchanged(self, mock_version, mock_load):
+        mock_version.return_value = 4
+        mock_load.side_effect = lambda conn, v: _snapshot(v)
+        conn = MagicMock()
+
+        first = catalogue.current(conn)
+        self.assertIs(catalogue.current(conn), first)
+        self.assertEqual(mock_load.call_count, 1)
+        self.assertEqual(mock_version.call_count, 2)
+
+    @patch('app.services.catalogue.load_catalogue')
+    @patch('app.services.catalogue.fetch_version')
+    def test_current_rebuilds_when_version_bumped(self, mock_version, mock_load):
+        mock_load.side_effect = lambda conn, v: _snapshot(v)
+        conn = MagicMock()
+
+        mock_version.return_value = 1
+        first = catalogue.current(conn)
+        mock_version.return_value = 2
+        second = catalogue.current(conn)
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.version, 2)
+
+    @patch('app.services.catalogue.load_catalogue')
+    @patch('app.services.catalogue.fetch_version')
+    def test_invalidate_forces_rebuild(self, mock_version, mock_load):
+        mock_version.return_value = 1
+        mock_load.side_effect = lambda conn, v: _snapshot(v)
+        conn = MagicMock()
+
+        catalogue.current(conn)
+        catalogue.invalidate()
+        catalogue.current(conn)
+        self.assertEqual(mock_load.call_count, 2)
+
+    @patch('app.services.catalogue.load_catalogue')
+    @patch('app.services.catalogue.fetch_version')
+    def test_current_at_known_version_skips_the_probe(self, mock_version, mock_load):
+        mock_load.side_effect = lambda conn, v: _snapshot(v)
+        conn = MagicMock()
+
+        first = catalogue.current(conn, 3)
+        self.assertIs(catalogue.current(conn, 3), first)
+        self.assertEqual(catalogue.current(conn, 4).version, 4)
+        mock_version.assert_not_called()
+
+    def test_fetch_version_defaults_to_zero(self):
+        conn = MagicMock()
+        conn.execute.return_value.scalar.return_value = None
+        self.assertEqual(catalogue.fetch_version(conn), 0)
+
+    def test_bump_version_returns_new_version(self):
+        conn = MagicMock()
+        conn.execute.return_value.scalar_one.return_value = 8
+        self.assertEqual(catalogue.bump_version(conn), 8)
+        self.assertIn('reference_version.version + 1', str(conn.execute.call_args[0][0]))
+
+    @patch('app.services.catalogue.fetch_intervention_rules')
+    @patch('app.services.catalogue.fetch_metric_rules')
+    def test_load_catalogue_builds_adjacency(self, mock_metric_rules, mock_intervention_rules):
+        mock_metric_rules.return_value = []
+        rules = [
+            InterventionRule(1, 2, 1, 'none', None, None, 1.2, 'x'),
+            InterventionRule(2, 1, 2, 'none', None, None, 0.8, 'y'),
+            InterventionRule(3, 2, 3, 'none', None, None, 1.1, 'z'),
+        ]
+        mock_intervention_rules.return_value = rules
+        conn = MagicMock()
+        conn.execute.return_value.mappings.return_value.all.side_effect = [
+            [
+                {'id': 1, 'name': 'A', 'theme_id': 10, 'base_effectiveness': 0.5, 'cost_weight': 2.0, 'is_stage': False},
+                {'id': 2, 'name': 'B', 'theme_id': 10, 'base_effectiveness': 0.7, 'cost_weight': 1.0, 'is_stage': True},
+            ],
+            [{'id': 10, 'name': 'Energy', 'description': None}],
+            [
+                {'src_intervention_id': 2, 'dst_intervention_id': 1, 'relation_type': 'prereq'},
+                {'src_intervention_id': 2, 'dst_intervention_id': 3, 'relation_type': 'mutex'},
+            ],
+        ]
+        conn.execute.return_value.scalar.return_value = 5
+
+        snap = catalogue.load_catalogue(conn, 3)
+
+        self.assertEqual(snap.version, 3)
+        self.assertEqual(set(snap.interventions), {1, 2})
+        self.assertTrue(snap.interventions[2].is_stage)
+        self.assertEqual(snap.prereqs[2], (1,))
+        self.assertEqual(snap.mutexes[2], (3,))
+        self.assertEqual(snap.rules_by_cause[2], (rules[0], rules[2]))
+        self.assertEqual(snap.rules_by_cause[1], (rules[1],))
+        self.assertEqual(snap.step_size, 5.0)
+        self.assertEqual(snap.metric_engine.evaluate({}), {1: 0.5, 2: 0.7})
+        with self.assertRaises(TypeError):
+            snap.interventions[3] = None
+
+
+class TestCostLevel(unittest.TestCase):
+
+    @patch('app.services.costing.catalogue')
+    def test_cost_tokens_from_snapshot(self, mock_catalogue):
+        infos = {1: MagicMock(cost_weight=2.5), 2: MagicMock(cost_weight=1.0)}
+        mock_catalogue.current.return_value = _snapshot(1, interventions=infos, step_size=1.5)
+        conn = MagicMock()
+        conn.execute.return_value.scalars.return_value.all.return_value = [1, 2]
+
+        self.assertEqual(calc_cost_level(conn, 7), 2)  # floor(3.5 / 1.5)
+        conn.execute.assert_called_once()
+
+    @patch('app.services.costing.catalogue')
+    def test_missing_step_size_raises(self, mock_catalogue):
+        mock_catalogue.current.return_value = _snapshot(1, step_size=None)
+        with self.assertRaises(LookupError):
+            calc_cost_level(MagicMock(), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+# tests/test_columnar.py
+import os
+import sys
+import unittest
+from decimal import Decimal
+
+import pyarrow as pa
+from flask import Flask
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import columnar
+
+GRAPH = {
+    "project_id": 3,
+    "params": {"top_n": 30, "epsilon": 0.05, "theme_ids": [1, 4], "focus": None},
+    "nodes": [{"id": 1, "label": "LED", "score": Decimal("0.9")}, {"id": 2, "label": "PV", "score": None}],
+    "edges": [{"src": 1, "dst": 2, "weight": 0.2, "multiplier": 1.2}],
+}
+
+
+def _read(body: bytes) -> pa.Table:
+    return pa.ipc.open_stream(body).read_all()
+
+
+class TestColumns(unittest.TestCase):
+
+    def test_lists_of_objects_become_parallel_arrays(self):
+        cols = columnar.columns(GRAPH)
+        self.assertEqual(cols["nodes.id"], [1, 2])
+        self.assertEqual(cols["nodes.score"], [0.9, None])
+        self.assertEqual(cols["edges.src"], [1])
+        self.assertEqual(cols["params.top_n"], 30)
+        self.assertEqual(cols["params.theme_ids"], [1, 4])
+        self.assertEqual(cols["project_id"], 3)
+
+    def test_declared_fields_keep_columns_for_empty_lists(self):
+        cols = columnar.columns({"nodes": []}, fields={"nodes": ("id", "score")})
+        self.assertEqual(cols, {"nodes.id": [], "nodes.score": []})
+
+
+class TestArrow(unittest.TestCase):
+
+    def test_round_trip(self):
+        table = _read(columnar.to_arrow(GRAPH))
+
+        self.assertEqual(table.num_rows, 1)
+        self.assertEqual(table["nodes.id"][0].as_py(), [1, 2])
+        self.assertEqual(table["nodes.label"][0].as_py(), ["LED", "PV"])
+        self.assertEqual(table["nodes.score"][0].as_py(), [0.9, None])
+        self.assertEqual(table["edges.multiplier"][0].as_py(), [1.2])
+        self.assertEqual(table["params.focus"][0].as_py(), None)
+        self.assertEqual(table.schema.field("nodes.id").type, pa.list_(pa.int64()))
+
+
+class TestRespond(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_json_by_default(self):
+        for headers in ({}, {"Accept": "*/*"}, {"Accept": "application/json"}):
+            with self.app.test_request_context(headers=headers):
+                resp = columnar.respond({"rows": [{"a": 1}]})
+                self.assertEqual(resp.mimetype, "application/json")
+                self.assertIn("Accept", resp.vary)
+
+    def test_arrow_when_asked(self):
+        with self.app.test_request_context(headers={"Accept": columnar.ARROW_STREAM}):
+            resp = columnar.respond({"rows": [{"a": 1}, {"a": 2}]}, status=201)
+        self.assertEqual(resp.status_code, 201)
+        self.assertEqual(resp.mimetype, columnar.ARROW_STREAM)
+        self.assertEqual(_read(resp.get_data())["rows.a"][0].as_py(), [1, 2])
+
+
+if __name__ == '__main__':
+    unittest.main()
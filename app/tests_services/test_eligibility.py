@@ -0,0 +1,73 @@
+# tests/test_eligibility.py
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import eligibility
+from app.services.stages import ranked_recommendations
+from app.tests_services.test_scoring import make_catalogue
+
+
+class TestImplementedDeltas(unittest.TestCase):
+    """make_catalogue(): 4 is a stage with prereq 1 and mutex 3"""
+
+    def setUp(self):
+        self.snap = make_catalogue()
+
+    def test_prereq_unblocks_dependent_stage(self):
+        self.assertEqual(eligibility.implemented_deltas(self.snap, [1]), {1: (True, 0, 0), 4: (False, -1, 0)})
+
+    def test_mutex_blocks_dependent_stage(self):
+        self.assertEqual(eligibility.implemented_deltas(self.snap, [3]), {3: (True, 0, 0), 4: (False, 0, 1)})
+
+    def test_combined_and_leaf(self):
+        self.assertEqual(
+            eligibility.implemented_deltas(self.snap, [1, 3, 2]),
+            {1: (True, 0, 0), 2: (True, 0, 0), 3: (True, 0, 0), 4: (False, -1, 1)},
+        )
+
+    def test_dependents_ignore_non_stage_sources(self):
+        self.assertEqual(dict(self.snap.prereq_dependents), {1: (4,)})
+        self.assertEqual(dict(self.snap.mutex_dependents), {3: (4,)})
+
+
+class TestEligibilityWrites(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+
+    def test_mark_implemented_is_one_update(self):
+        n = eligibility.mark_implemented(self.conn, 9, [1], make_catalogue())
+
+        self.assertEqual(n, 2)
+        self.conn.execute.assert_called_once()
+        params = self.conn.execute.call_args[0][1]
+        self.assertEqual(params['pid'], 9)
+        self.assertEqual(dict(zip(params['iids'], zip(params['impl'], params['du'], params['dm']))),
+                         {1: (True, 0, 0), 4: (False, -1, 0)})
+
+    def test_noops(self):
+        self.assertEqual(eligibility.mark_implemented(self.conn, 9, [], make_catalogue()), 0)
+        eligibility.refresh(self.conn, [])
+        self.conn.execute.assert_not_called()
+
+    def test_refresh_scopes_to_projects(self):
+        eligibility.refresh(self.conn, [3, '4'])
+        self.assertEqual(self.conn.execute.call_args[0][1], {'ids': [3, 4]})
+
+    def test_recommendations_reads_materialised_flag(self):
+        self.conn.execute.return_value.mappings.return_value.all.return_value = [{'intervention_id': 2}]
+
+        rows = ranked_recommendations(self.conn, 5, limit=3)
+
+        sql = str(self.conn.execute.call_args[0][0])
+        self.assertIn('r.eligible', sql)
+        self.assertNotIn('stages', sql)
+        self.assertEqual(rows, [{'intervention_id': 2}])
+
+
+if __name__ == '__main__':
+    unittest.main()
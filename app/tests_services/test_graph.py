@@ -0,0 +1,133 @@
+# tests/test_graph.py
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import graph
+from app.services.edge_index import EdgeIndex
+from app.services.graph import GraphParams, load_graph
+from app.services.types import InterventionRule
+from app.tests_services.test_scoring import make_catalogue
+
+
+def _rule(i, cause, effect, multiplier):
+    return InterventionRule(i, cause, effect, 'ratio', None, None, multiplier, '')
+
+
+class TestEdgeIndex(unittest.TestCase):
+
+    def setUp(self):
+        # 1 -> 2 strong, 1 -> 3 weak, 2 -> 4, 4 -> 5, 6 -> 1
+        self.index = EdgeIndex([
+            _rule(1, 1, 3, 1.02), _rule(2, 1, 2, 0.5), _rule(3, 2, 4, 1.3),
+            _rule(4, 4, 5, 1.2), _rule(5, 6, 1, 1.1),
+        ])
+
+    def test_edges_are_strongest_first_and_pruned_by_epsilon(self):
+        self.assertEqual([e.dst for e in self.index.outgoing(1)], [2, 3])
+        self.assertEqual([e.dst for e in self.index.outgoing(1, 0.05)], [2])
+        self.assertEqual([e.dst for e in self.index.outgoing(1, 0.5)], [2])   # |0.5 - 1| >= 0.5
+        self.assertEqual(self.index.outgoing(1, 0.6), ())
+        self.assertEqual([e.src for e in self.index.incoming(1)], [6])
+        self.assertEqual(self.index.outgoing(99), ())
+
+    def test_signed_weight(self):
+        strong, weak = self.index.outgoing(1)
+        self.assertAlmostEqual(strong.weight, -0.5)
+        self.assertAlmostEqual(weak.weight, 0.02)
+        self.assertEqual(strong.to_dict(), {"src": 1, "dst": 2, "weight": -0.5, "multiplier": 0.5})
+
+    def test_edges_between(self):
+        edges = self.index.edges_between([1, 2, 3, 4], epsilon=0.05)
+        self.assertEqual([(e.src, e.dst) for e in edges], [(1, 2), (2, 4)])
+
+    def test_neighbourhood_follows_both_directions(self):
+        self.assertEqual(self.index.neighbourhood(2, 0), {2: 0})
+        self.assertEqual(self.index.neighbourhood(2, 1, 0.05), {2: 0, 1: 1, 4: 1})
+        self.assertEqual(self.index.neighbourhood(2, 2, 0.05), {2: 0, 1: 1, 4: 1, 6: 2, 5: 2})
+        self.assertEqual(self.index.neighbourhood(2, 2, 0.0)[3], 2)
+
+
+class TestGraphParams(unittest.TestCase):
+
+    def test_parse(self):
+        p = GraphParams.from_args({"top_n": "10", "epsilon": "0.2", "theme_ids": "3, 1,3", "focus": "4", "depth": "2"})
+        self.assertEqual(p, GraphParams(10, 0.2, (1, 3), 4, 2))
+        self.assertEqual(GraphParams.from_args({}), GraphParams())
+
+    def test_rejects_bad_values(self):
+        for args in ({"top_n": "0"}, {"top_n": "501"}, {"epsilon": "nan"}, {"epsilon": "-0.1"},
+                     {"depth": "5"}, {"focus": "x"}, {"theme_ids": "1,x"}):
+            with self.assertRaises(ValueError, msg=args):
+                GraphParams.from_args(args)
+
+    def test_cache_key_ignores_depth_without_focus(self):
+        self.assertEqual(GraphParams(depth=1).cache_key(), GraphParams(depth=3).cache_key())
+        self.assertNotEqual(GraphParams(focus=1, depth=1).cache_key(), GraphParams(focus=1, depth=3).cache_key())
+
+
+class TestLoadGraph(unittest.TestCase):
+    """make_catalogue: 1 -> 3 (x0.5), 1 -> 2 (x1.1); themes 10 = {1, 3, 4}, 20 = {2}"""
+
+    def setUp(self):
+        self.conn = MagicMock()
+        p = patch('app.services.graph.catalogue_service.current', return_value=make_catalogue())
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _scores(self, *rows):
+        self.conn.execute.return_value.mappings.return_value.all.return_value = [
+            {"id": i, "score": s} for i, s in rows
+        ]
+
+    def test_top_n_with_edges_from_the_index(self):
+        self._scores((2, 0.9), (1, 0.8), (3, 0.1))
+
+        nodes, edges = load_graph(self.conn, 5, GraphParams(top_n=3))
+
+        self.assertEqual([(n["id"], n["label"]) for n in nodes],
+                         [(2, "Solar PV"), (1, "Low carbon concrete"), (3, "Remove basement")])
+        self.assertEqual([(e["src"], e["dst"]) for e in edges], [(1, 3), (1, 2)])
+        sql, bind = self.conn.execute.call_args.args
+        self.assertIs(sql, graph.NODES_SQL)
+        self.assertEqual(bind, {"project_id": 5, "top_n": 3, "pinned": None})
+
+    def test_epsilon_prunes_weak_edges(self):
+        self._scores((2, 0.9), (1, 0.8), (3, 0.1))
+        _, edges = load_graph(self.conn, 5, GraphParams(epsilon=0.2))
+        self.assertEqual([(e["src"], e["dst"]) for e in edges], [(1, 3)])
+
+    def test_theme_filter(self):
+        self._scores((1, 0.8))
+        load_graph(self.conn, 5, GraphParams(theme_ids=(10,)))
+        sql, bind = self.conn.execute.call_args.args
+        self.assertIs(sql, graph.NODES_IN_SQL)
+        self.assertEqual(bind["ids"], [1, 3, 4])
+
+    def test_focus_neighbourhood_keeps_focus_first(self):
+        self._scores((2, 0.9))   # 3 has no score row for this project
+
+        nodes, edges = load_graph(self.conn, 5, GraphParams(top_n=2, focus=3, depth=2))
+
+        _, bind = self.conn.execute.call_args.args
+        self.assertEqual(bind["ids"], [1, 2, 3])
+        self.assertEqual(bind["pinned"], 3)
+        self.assertEqual([n["id"] for n in nodes], [3, 2])
+        self.assertIsNone(nodes[0]["score"])
+        self.assertEqual(edges, [])
+
+    def test_unknown_focus(self):
+        with self.assertRaises(ValueError):
+            load_graph(self.conn, 5, GraphParams(focus=99))
+
+    def test_no_candidates_skips_the_query(self):
+        nodes, edges = load_graph(self.conn, 5, GraphParams(theme_ids=(99,)))
+        self.assertEqual((nodes, edges), ([], []))
+        self.conn.execute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+# tests/test_graph_cache.py
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import TimeoutError
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import graph_cache
+from app.services.graph_cache import RenderPool, SvgCache, content_key
+
+NODES = [{"id": 1, "label": "LED", "score": 0.9}, {"id": 2, "label": "PV", "score": 0.5}]
+EDGES = [{"src": 1, "dst": 2, "weight": 0.2, "multiplier": 1.2}]
+
+
+class TestContentKey(unittest.TestCase):
+
+    def test_ignores_scores_but_not_order_labels_or_edges(self):
+        base = content_key(NODES, EDGES, "Project 1")
+        rescored = [dict(n, score=n["score"] / 2) for n in NODES]
+        self.assertEqual(content_key(rescored, EDGES, "Project 1"), base)
+        self.assertNotEqual(content_key(NODES[::-1], EDGES, "Project 1"), base)
+        self.assertNotEqual(content_key([dict(NODES[0], label="LEDs"), NODES[1]], EDGES, "Project 1"), base)
+        self.assertNotEqual(content_key(NODES, [], "Project 1"), base)
+        self.assertNotEqual(content_key(NODES, EDGES, "Project 1", style="2"), base)
+
+
+class TestSvgCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+
+    def test_round_trip(self):
+        cache = SvgCache(self.dir.name, max_bytes=1024)
+        self.assertIsNone(cache.get("a"))
+        cache.put("a", b"<svg/>")
+        self.assertEqual(cache.get("a"), b"<svg/>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        cache = SvgCache(self.dir.name, max_bytes=250)
+        for i, key in enumerate("abc"):
+            cache.put(key, b"x" * 100)
+            os.utime(os.path.join(self.dir.name, f"{key}.svg"), (1000 + i, 1000 + i))
+        # "a" was evicted by the third write; reading "b" makes "c" the oldest
+        self.assertIsNone(cache.get("a"))
+        cache.get("b")
+        cache.put("d", b"x" * 100)
+
+        self.assertIsNotNone(cache.get("b"))
+        self.assertIsNone(cache.get("c"))
+        self.assertIsNotNone(cache.get("d"))
+
+
+class TestRenderPool(unittest.TestCase):
+
+    def test_concurrent_requests_share_one_render(self):
+        pool = RenderPool(workers=2)
+        release = threading.Event()
+        calls = []
+
+        def render():
+            calls.append(1)
+            release.wait(5)
+            return b"<svg/>"
+
+        first = pool.submit("k", render)
+        second = pool.submit("k", render)
+        release.set()
+
+        self.assertIs(first, second)
+        self.assertEqual(first.result(5), b"<svg/>")
+        self.assertEqual(len(calls), 1)
+
+    def test_finished_render_is_forgotten(self):
+        pool = RenderPool(workers=1)
+        pool.submit("k", lambda: b"1").result(5)
+        time.sleep(0.01)
+        self.assertEqual(pool.submit("k", lambda: b"2").result(5), b"2")
+
+
+class TestGetOrRender(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.dir.cleanup)
+        for name, value in (("cache", SvgCache(self.dir.name, 1 << 20)), ("pool", RenderPool(1))):
+            p = patch.object(graph_cache, name, value)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_renders_once_then_serves_from_disk(self):
+        calls = []
+
+        def render():
+            calls.append(1)
+            return b"<svg/>"
+
+        self.assertEqual(graph_cache.get_or_render("k", render, timeout=5), b"<svg/>")
+        self.assertEqual(graph_cache.get_or_render("k", render, timeout=5), b"<svg/>")
+        self.assertEqual(len(calls), 1)
+
+    def test_slow_render_times_out_and_still_lands_in_cache(self):
+        release = threading.Event()
+
+        def render():
+            release.wait(5)
+            return b"<svg/>"
+
+        with self.assertRaises(TimeoutError):
+            graph_cache.get_or_render("slow", render, timeout=0.05)
+        release.set()
+        graph_cache.pool.submit("slow", render).result(5)
+        self.assertEqual(graph_cache.cache.get("slow"), b"<svg/>")
+
+
+if __name__ == '__main__':
+    unittest.main()
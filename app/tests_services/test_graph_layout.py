@@ -0,0 +1,96 @@
+# tests/test_graph_layout.py
+import os
+import random
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import graph_layout
+from app.services.graph_layout import layout, render_svg
+
+
+def _nodes(n):
+    return [{"id": i, "label": f"Intervention {i}", "score": 1.0 - i / 10} for i in range(n)]
+
+
+def _edge(src, dst, multiplier=1.2):
+    return {"src": src, "dst": dst, "weight": multiplier - 1.0, "multiplier": multiplier}
+
+
+def _boxes(lay):
+    return {int(b[0]): b for b in lay.boxes}
+
+
+class TestLayout(unittest.TestCase):
+
+    def test_edges_point_left_to_right(self):
+        lay = layout(_nodes(3), [_edge(0, 1), _edge(1, 2)])
+        boxes = _boxes(lay)
+        self.assertLess(boxes[0][2], boxes[1][2])
+        self.assertLess(boxes[1][2], boxes[2][2])
+
+    def test_long_edge_routes_through_dummy_points(self):
+        lay = layout(_nodes(3), [_edge(0, 1), _edge(1, 2), _edge(0, 2)])
+        long_edge = [pts for e, pts in lay.paths if (e["src"], e["dst"]) == (0, 2)][0]
+        self.assertEqual(len(long_edge), 3)
+        self.assertEqual(len(lay.boxes), 3)
+
+    def test_cycles_are_drawn_from_source_to_target(self):
+        lay = layout(_nodes(2), [_edge(0, 1), _edge(1, 0, 0.8)])
+        boxes = _boxes(lay)
+        for e, pts in lay.paths:
+            src, dst = boxes[e["src"]], boxes[e["dst"]]
+            self.assertAlmostEqual(abs(pts[0][0] - src[2]), src[4] / 2)
+            self.assertAlmostEqual(abs(pts[-1][0] - dst[2]), dst[4] / 2)
+
+    def test_edges_to_unknown_nodes_and_self_loops_are_skipped(self):
+        lay = layout(_nodes(2), [_edge(0, 1), _edge(0, 9), _edge(1, 1)])
+        self.assertEqual([(e["src"], e["dst"]) for e, _ in lay.paths], [(0, 1)])
+
+    def test_ordering_removes_avoidable_crossings(self):
+        # 0->3 and 1->2 cross in input order; swapping one column fixes it
+        lay = layout(_nodes(4), [_edge(0, 3), _edge(1, 2)])
+        boxes = _boxes(lay)
+        self.assertEqual(boxes[0][3] < boxes[1][3], boxes[3][3] < boxes[2][3])
+
+    def test_boxes_in_a_column_do_not_overlap(self):
+        rng = random.Random(3)
+        edges = [_edge(*rng.sample(range(40), 2)) for _ in range(70)]
+        lay = layout(_nodes(40), edges)
+        columns = {}
+        for _, _, cx, cy, w, h in lay.boxes:
+            columns.setdefault(round(cx, 3), []).append((cy, h))
+        for column in columns.values():
+            column.sort()
+            for (y0, h0), (y1, h1) in zip(column, column[1:]):
+                self.assertGreaterEqual(y1 - y0, (h0 + h1) / 2 + graph_layout.NODE_GAP - 1e-6)
+        for _, _, cx, cy, w, h in lay.boxes:
+            self.assertGreaterEqual(cx - w / 2, 0)
+            self.assertGreaterEqual(cy - h / 2, 0)
+            self.assertLessEqual(cx + w / 2, lay.width)
+            self.assertLessEqual(cy + h / 2, lay.height)
+
+
+class TestRenderSvg(unittest.TestCase):
+
+    def test_well_formed_and_escaped(self):
+        nodes = [{"id": 1, "label": "Heat <pump> & PV"}, {"id": 2, "label": "LED"}]
+        svg = render_svg(nodes, [_edge(1, 2, 0.7)], title="Project 1")
+
+        root = ET.fromstring(svg)
+        texts = [t.text for t in root.iter("{http://www.w3.org/2000/svg}text")]
+        self.assertIn("Heat <pump> & PV", texts)
+        self.assertIn("0.70", texts)
+        self.assertIn("Project 1", texts)
+        paths = [p for p in root.iter("{http://www.w3.org/2000/svg}path") if p.get("stroke")]
+        self.assertEqual(paths[0].get("stroke"), graph_layout.NEG_COLOR)
+
+    def test_empty_graph(self):
+        root = ET.fromstring(render_svg([], [], title="Project 1"))
+        self.assertGreater(float(root.get("viewBox").split()[3]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+# tests/test_interval_index.py
+import random
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.interval_index import IntervalIndex
+from app.services.types import in_bounds
+
+
+class TestIntervalIndex(unittest.TestCase):
+
+    def test_stab_inclusive_and_open_bounds(self):
+        idx = IntervalIndex([1.0, None, 5.0, None], [3.0, 2.0, None, None])
+        self.assertEqual(sorted(idx.stab(1.0).tolist()), [0, 1, 3])
+        self.assertEqual(sorted(idx.stab(3.0).tolist()), [0, 3])
+        self.assertEqual(sorted(idx.stab(5.0).tolist()), [2, 3])
+        self.assertEqual(sorted(idx.stab(-100.0).tolist()), [1, 3])
+
+    def test_stab_none_and_nan(self):
+        idx = IntervalIndex([None], [None])
+        self.assertEqual(len(idx.stab(None)), 0)
+        self.assertEqual(len(idx.stab(float('nan'))), 0)
+
+    def test_empty_index(self):
+        idx = IntervalIndex([], [])
+        self.assertEqual(len(idx), 0)
+        self.assertEqual(len(idx.stab(1.0)), 0)
+
+    def test_matches_linear_scan(self):
+        rng = random.Random(7)
+        lower, upper = [], []
+        for _ in range(500):
+            lo = rng.choice([None, round(rng.uniform(0, 100), 1)])
+            hi = rng.choice([None, round(rng.uniform(0, 100), 1)])
+            if lo is not None and hi is not None and hi < lo:
+                lo, hi = hi, lo
+            lower.append(lo)
+            upper.append(hi)
+        idx = IntervalIndex(lower, upper)
+
+        for v in [rng.uniform(-10, 110) for _ in range(200)] + [0.0, 50.0, 100.0] + [l for l in lower if l][:20]:
+            expected = [i for i in range(len(lower)) if in_bounds(v, lower[i], upper[i])]
+            got = sorted(idx.stab(v).tolist())
+            self.assertEqual(got, expected, f"value={v}")
+            self.assertEqual(len(got), len(set(got)))
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            IntervalIndex([1.0], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,7 +9,9 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from app.services.rules_intervention import (
     fetch_intervention_rules, 
-    intervention_recompute
+    intervention_recompute,
+    batch_intervention_recompute,
+    implement_interventions,
 )
 from app.services.types import InterventionRule
 
@@ -517,5 +519,112 @@ class TestEdgeCases(unittest.TestCase):
         self.assertDictAlmostEqual(result, expected)
 
 
+class TestInterventionRecomputeWithCatalogue(unittest.TestCase):
+
+    def test_rules_read_from_snapshot(self):
+        """With a catalogue snapshot, intervention_effects is not queried"""
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.mappings.return_value.all.return_value = [
+            {'intervention_id': 201, 'current_score': 0.5},
+        ]
+        snap = Mock()
+        snap.rules_by_cause = {
+            101: (InterventionRule(id=1, cause_intervention_id=101, effect_intervention_id=201,
+                                   metric_type='ratio', lower=None, upper=None,
+                                   multiplier=1.2, reason=''),),
+        }
+
+        result = intervention_recompute(mock_conn, 123, 101, snap)
+
+        self.assertAlmostEqual(result[201], 0.6)
+        # scores read + upsert only
+        self.assertEqual(mock_conn.execute.call_count, 2)
+        self.assertNotIn('FROM intervention_effects', str(mock_conn.execute.call_args_list[0][0][0]))
+
+    def test_cause_without_rules(self):
+        snap = Mock()
+        snap.rules_by_cause = {}
+        mock_conn = MagicMock()
+        self.assertEqual(intervention_recompute(mock_conn, 123, 101, snap), {})
+        mock_conn.execute.assert_not_called()
+
+
+class TestRecomputeCreatesRowsWithEligibility(unittest.TestCase):
+    """
+    A project with no runtime_scores yet (no metrics posted): the recompute's
+    upsert creates the effect rows, and they must not come out `eligible` from
+    the column defaults - mark_implemented only updates rows that exist.
+    """
+
+    def setUp(self):
+        from app.tests_services.test_scoring import make_catalogue
+        self.snap = make_catalogue()  # 1 affects 2 and 3
+        self.conn = MagicMock()
+        self.conn.execute.return_value.mappings.return_value.all.return_value = [
+            {'intervention_id': 2, 'current_score': 0.8},  # base: no runtime_scores row
+            {'intervention_id': 3, 'current_score': 1.0},
+        ]
+
+    def _assert_upsert_fills_counters(self, sql):
+        insert, _, on_conflict = sql.partition('ON CONFLICT')
+        self.assertIn('implemented, unmet_prereqs, mutex_hits', insert)
+        self.assertIn('FROM implemented_interventions', insert)
+        self.assertIn("s.relation_type = 'prereq'", insert)
+        self.assertIn("s.relation_type = 'mutex'", insert)
+        # an existing row keeps the counters mark_implemented maintains
+        self.assertNotIn('implemented', on_conflict)
+        self.assertNotIn('unmet_prereqs', on_conflict)
+
+    def test_single_apply(self):
+        result = intervention_recompute(self.conn, 7, 1, self.snap)
+
+        self.assertEqual(set(result), {2, 3})
+        sql, params = self.conn.execute.call_args_list[-1][0]
+        self._assert_upsert_fills_counters(str(sql))
+        self.assertEqual({p['intervention_id'] for p in params}, {2, 3})
+
+    def test_batch_apply(self):
+        result = batch_intervention_recompute(self.conn, 7, [1], self.snap)
+
+        self.assertEqual(set(result), {2, 3})
+        sql, params = self.conn.execute.call_args_list[-1][0]
+        self._assert_upsert_fills_counters(str(sql))
+        self.assertIn('JOIN interventions i ON i.id = x.iid', str(sql))
+        self.assertEqual(params['pid'], 7)
+
+
+class TestBatchInterventionRecompute(unittest.TestCase):
+
+    def test_folds_multipliers_across_causes(self):
+        """Rules from every cause are multiplied together before one read + one upsert"""
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.mappings.return_value.all.side_effect = [
+            [{'effect_id': 201, 'multiplier': 1.2}, {'effect_id': 201, 'multiplier': 1.5},
+             {'effect_id': 202, 'multiplier': 0.5}],
+            [{'intervention_id': 201, 'current_score': 1.0}, {'intervention_id': 202, 'current_score': 0.8}],
+        ]
+
+        result = batch_intervention_recompute(mock_conn, 123, [101, 102])
+
+        self.assertAlmostEqual(result[201], 1.8)
+        self.assertAlmostEqual(result[202], 0.4)
+        self.assertEqual(mock_conn.execute.call_count, 3)
+        self.assertIn('ANY(:cids)', str(mock_conn.execute.call_args_list[0][0][0]))
+        upsert_params = mock_conn.execute.call_args_list[2][0][1]
+        self.assertEqual(upsert_params['ids'], [201, 202])
+
+    def test_no_causes(self):
+        mock_conn = MagicMock()
+        self.assertEqual(batch_intervention_recompute(mock_conn, 123, []), {})
+        mock_conn.execute.assert_not_called()
+
+    def test_implement_interventions_returns_new_ids(self):
+        mock_conn = MagicMock()
+        mock_conn.execute.return_value.scalars.return_value.all.return_value = [101]
+        self.assertEqual(implement_interventions(mock_conn, 123, [101, 102], 5), [101])
+        mock_conn.execute.assert_called_once()
+        self.assertEqual(mock_conn.execute.call_args[0][1]['ids'], [101, 102])
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
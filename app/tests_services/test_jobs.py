@@ -0,0 +1,183 @@
+# tests/test_jobs.py
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, current_app
+from app.services import jobs
+
+
+class _FakeEngine:
+    """engine.begin() hands out the same mock connection every time."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.begins = 0
+
+    def begin(self):
+        self.begins += 1
+        cm = MagicMock()
+        cm.__enter__.return_value = self.conn
+        return cm
+
+
+def _sql(conn):
+    return [str(c.args[0]) for c in conn.execute.call_args_list]
+
+
+class TestJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        p = patch.dict(jobs.HANDLERS, {"echo": lambda payload: payload}, clear=False)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def test_enqueue_inserts_payload_as_jsonb(self):
+        self.conn.execute.return_value.scalar_one.return_value = 42
+
+        job_id = jobs.enqueue(self.conn, "echo", {"a": 1}, created_by=7)
+
+        self.assertEqual(job_id, 42)
+        sql, params = self.conn.execute.call_args.args
+        self.assertIn("INSERT INTO jobs", str(sql))
+        self.assertEqual(params, {"kind": "echo", "payload": '{"a": 1}', "max_attempts": 3, "created_by": "7"})
+
+    def test_enqueue_rejects_unknown_kind(self):
+        with self.assertRaises(ValueError):
+            jobs.enqueue(self.conn, "nope", {})
+        self.conn.execute.assert_not_called()
+
+    def test_claim_skips_locked_rows(self):
+        self.conn.execute.return_value.mappings.return_value.first.return_value = {
+            "id": 5, "kind": "echo", "payload": {"x": 1}, "attempts": 1, "max_attempts": 3,
+        }
+
+        job = jobs.claim(self.conn, "w1")
+
+        self.assertEqual(job, jobs.ClaimedJob(5, "echo", {"x": 1}, 1, 3))
+        sql = _sql(self.conn)[0]
+        self.assertIn("FOR UPDATE SKIP LOCKED", sql)
+        self.assertIn("status = 'queued' AND run_after <= now()", sql)
+
+    def test_claim_empty_queue(self):
+        self.conn.execute.return_value.mappings.return_value.first.return_value = None
+        self.assertIsNone(jobs.claim(self.conn, "w1"))
+
+    def test_fail_requeues_with_backoff_until_attempts_run_out(self):
+        status = jobs.fail(self.conn, jobs.ClaimedJob(1, "echo", {}, 2, 3), "boom")
+        self.assertEqual(status, jobs.QUEUED)
+        self.assertEqual(self.conn.execute.call_args.args[1]["delay"], 10.0)
+
+        status = jobs.fail(self.conn, jobs.ClaimedJob(1, "echo", {}, 3, 3), "boom")
+        self.assertEqual(status, jobs.FAILED)
+
+        status = jobs.fail(self.conn, jobs.ClaimedJob(1, "echo", {}, 1, 3), "bad input", retry=False)
+        self.assertEqual(status, jobs.FAILED)
+
+    def test_heartbeat_only_touches_own_running_job(self):
+        self.conn.execute.return_value.rowcount = 0
+        self.assertFalse(jobs.heartbeat(self.conn, 9, "w1"))
+        sql = _sql(self.conn)[0]
+        self.assertIn("locked_at = now()", sql)
+        self.assertIn("locked_by = :worker", sql)
+        self.assertEqual(self.conn.execute.call_args.args[1], {"id": 9, "worker": "w1"})
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual([jobs.retry_delay(n) for n in (1, 2, 3)], [5.0, 10.0, 20.0])
+        self.assertEqual(jobs.retry_delay(20), jobs.RETRY_MAX_SECONDS)
+
+
+class TestRunOne(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.app = Flask(__name__)
+        self.app.config["PG_ENGINE"] = _FakeEngine(self.conn)
+
+    def _claim(self, kind, payload=None, attempts=1):
+        job = jobs.ClaimedJob(9, kind, payload or {}, attempts, 3)
+        p = patch('app.services.jobs.claim', return_value=job)
+        p.start()
+        self.addCleanup(p.stop)
+        return job
+
+    def test_empty_queue(self):
+        with patch('app.services.jobs.claim', return_value=None):
+            self.assertFalse(jobs.run_one(self.app, "w1"))
+
+    def test_success_stores_result_and_cleans_up(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self._claim("echo", {"cleanup": [path]})
+        seen = {}
+
+        def echo(payload):
+            seen["app"] = current_app._get_current_object()
+            return {"done": True}
+
+        with patch.dict(jobs.HANDLERS, {"echo": echo}), \
+                patch('app.services.jobs.complete') as complete:
+            self.assertTrue(jobs.run_one(self.app, "w1"))
+
+        complete.assert_called_once_with(self.conn, 9, jobs.JobOutput(result={"done": True}))
+        self.assertIs(seen["app"], self.app)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.app.config["PG_ENGINE"].begins, 2)  # claim and outcome commit separately
+
+    def test_error_is_retried_and_keeps_files(self):
+        fd, path = tempfile.mkstemp()
+        os.close(fd)
+        self.addCleanup(os.unlink, path)
+        job = self._claim("boom", {"cleanup": [path]})
+
+        def boom(payload):
+            raise RuntimeError("db went away")
+
+        with patch.dict(jobs.HANDLERS, {"boom": boom}), \
+                patch('app.services.jobs.fail', return_value=jobs.QUEUED) as fail:
+            jobs.run_one(self.app, "w1")
+
+        fail.assert_called_once_with(self.conn, job, "RuntimeError: db went away", retry=True)
+        self.assertTrue(os.path.exists(path))
+
+    def test_long_job_keeps_its_lock_alive(self):
+        self._claim("slow")
+        beats = []
+
+        def slow(payload):
+            time.sleep(0.25)
+            return {}
+
+        with patch.dict(jobs.HANDLERS, {"slow": slow}), \
+                patch('app.services.jobs.heartbeat', side_effect=lambda conn, job_id, worker: beats.append(job_id) or True), \
+                patch('app.services.jobs.heartbeat_seconds', return_value=0.05), \
+                patch('app.services.jobs.complete'):
+            jobs.run_one(self.app, "w1")
+            after = len(beats)
+            time.sleep(0.15)
+
+        self.assertGreaterEqual(after, 2)
+        self.assertEqual(set(beats), {9})
+        self.assertEqual(len(beats), after)  # stops with the job
+
+    def test_permanent_error_is_not_retried(self):
+        job = self._claim("bad")
+
+        def bad(payload):
+            raise jobs.PermanentJobError("missing columns")
+
+        with patch.dict(jobs.HANDLERS, {"bad": bad}), \
+                patch('app.services.jobs.fail', return_value=jobs.FAILED) as fail:
+            jobs.run_one(self.app, "w1")
+
+        fail.assert_called_once_with(self.conn, job, "missing columns", retry=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -95,16 +95,12 @@ class TestMetricsFunctions(unittest.TestCase):
         
         result = save_project_metrics(self.mock_conn, 123, metrics)
         
-        # Should call execute multiple times (insert + update)
-        self.assertEqual(self.mock_conn.execute.call_count, 2)
-        
-        # First call should be the INSERT with ON CONFLICT
-        first_call_args = self.mock_conn.execute.call_args_list[0]
-        self.assertIn('INSERT INTO projects', str(first_call_args[0][0]))
-        
-        # Second call should be the UPDATE
-        second_call_args = self.mock_conn.execute.call_args_list[1]
-        self.assertIn('UPDATE projects', str(second_call_args[0][0]))
+        # One upsert: INSERT ... ON CONFLICT DO UPDATE
+        self.assertEqual(self.mock_conn.execute.call_count, 1)
+        sql = str(self.mock_conn.execute.call_args_list[0][0][0])
+        self.assertIn('INSERT INTO projects', sql)
+        self.assertIn('ON CONFLICT (id) DO UPDATE', sql)
+        self.assertNotIn('invalid_metric', sql)
         
         # Should return rowcount
         self.assertEqual(result, 3)
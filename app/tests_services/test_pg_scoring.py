@@ -0,0 +1,41 @@
+# tests/test_pg_scoring.py
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import pg_scoring
+from app.services.rules_metric import PROJECT_METRIC_COLUMNS
+
+
+class TestPgScoring(unittest.TestCase):
+
+    def test_score_projects_is_one_call(self):
+        conn = MagicMock()
+        conn.execute.return_value.scalar.return_value = 12
+
+        self.assertEqual(pg_scoring.score_projects(conn, ['3', 4]), 12)
+
+        conn.execute.assert_called_once()
+        sql, params = conn.execute.call_args[0]
+        self.assertIn('SELECT score_projects_v1(CAST(:ids AS integer[]))', str(sql))
+        self.assertEqual(params, {'ids': [3, 4]})
+
+    def test_no_projects_no_query(self):
+        conn = MagicMock()
+        self.assertEqual(pg_scoring.score_projects(conn, []), 0)
+        conn.execute.assert_not_called()
+
+    def test_function_reads_every_metric_column_and_writes_ranks(self):
+        aggregate, function = pg_scoring.install_statements()
+        self.assertIn('float8_product', aggregate)
+        self.assertIn('CREATE OR REPLACE FUNCTION score_projects_v1(project_ids integer[])', function)
+        for col in PROJECT_METRIC_COLUMNS:
+            self.assertIn(f"('{col}', p.{col}::float8)", function)
+        self.assertIn('rank                         = EXCLUDED.rank', function)
+
+
+if __name__ == '__main__':
+    unittest.main()
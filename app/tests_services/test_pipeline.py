@@ -0,0 +1,63 @@
+# tests/test_pipeline.py
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import psycopg
+from app.db.pipeline import _sync_before_rows, pipeline
+
+
+def _conn(raw):
+    conn = MagicMock()
+    conn.connection.driver_connection = raw
+    conn.info = {}
+    return conn
+
+
+class TestPipeline(unittest.TestCase):
+
+    def test_psycopg_connection_enters_pipeline_mode(self):
+        raw = MagicMock(spec=psycopg.Connection)
+        conn = _conn(raw)
+
+        with pipeline(conn) as p:
+            self.assertIs(p, raw.pipeline.return_value.__enter__.return_value)
+            self.assertIs(conn.info['psycopg_pipeline'], p)
+            with pipeline(conn) as inner:  # nested blocks reuse the outer pipeline
+                self.assertIsNone(inner)
+        self.assertEqual(conn.info, {})
+        raw.pipeline.assert_called_once()
+
+    def test_other_drivers_are_a_no_op(self):
+        conn = _conn(MagicMock())
+        with pipeline(conn) as p:
+            self.assertIsNone(p)
+        self.assertEqual(conn.info, {})
+
+    def test_only_row_returning_statements_sync(self):
+        p = MagicMock()
+        conn = _conn(None)
+        conn.info['psycopg_pipeline'] = p
+
+        for sql in ("UPDATE runtime_scores SET rank = 1",
+                    "INSERT INTO projects (id) VALUES (1) ON CONFLICT (id) DO NOTHING",
+                    "SAVEPOINT sa_savepoint_1"):
+            _sync_before_rows(conn, None, sql, {}, None, False)
+        p.sync.assert_not_called()
+
+        for sql in ("SELECT version FROM reference_version WHERE id = 1",
+                    "\n  WITH x AS (SELECT 1) SELECT * FROM x",
+                    "INSERT INTO reference_version (id) VALUES (1) RETURNING version"):
+            _sync_before_rows(conn, None, sql, {}, None, False)
+        self.assertEqual(p.sync.call_count, 3)
+
+    def test_outside_pipeline_never_syncs(self):
+        conn = _conn(None)
+        _sync_before_rows(conn, None, "SELECT 1", {}, None, False)  # no error, nothing to sync
+
+
+if __name__ == '__main__':
+    unittest.main()
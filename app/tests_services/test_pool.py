@@ -0,0 +1,141 @@
+# tests/test_pool.py
+import tempfile
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy import event, text
+from app.db.tx import begin_tx, get_conn, init_request_tx
+from app.db import pool
+
+
+class TestPoolSettings(unittest.TestCase):
+
+    def test_env_overrides(self):
+        env = {'DB_POOL_SIZE': '3', 'DB_MAX_OVERFLOW': '0', 'DB_POOL_RECYCLE': '60',
+               'DB_POOL_TIMEOUT': '2.5', 'DB_POOL_LIFO': 'false'}
+        with patch.dict(os.environ, env):
+            s = pool.PoolSettings.from_env('postgresql+psycopg://u:p@db:5432/x')
+        self.assertEqual((s.size, s.max_overflow, s.recycle, s.timeout, s.lifo), (3, 0, 60, 2.5, False))
+        self.assertFalse(s.transaction_pooling)
+
+    def test_transaction_pooler_port_detected(self):
+        dsn = 'postgresql+psycopg://u:p@pooler.supabase.com:6543/postgres'
+        s = pool.PoolSettings.from_env(dsn)
+        self.assertTrue(s.transaction_pooling)
+        kwargs = pool.engine_kwargs(dsn, s)
+        self.assertEqual(kwargs['connect_args'], {'prepare_threshold': None})
+        self.assertTrue(kwargs['pool_use_lifo'])
+
+        with patch.dict(os.environ, {'DB_TRANSACTION_POOLING': '0'}):
+            self.assertFalse(pool.PoolSettings.from_env(dsn).transaction_pooling)
+
+    def test_session_mode_has_no_connect_args(self):
+        dsn = 'postgresql+psycopg://u:p@db:5432/x'
+        self.assertNotIn('connect_args', pool.engine_kwargs(dsn, pool.PoolSettings()))
+
+    def test_shared_engine_is_per_dsn(self):
+        a = pool.shared_engine('sqlite:///shared-a.db')
+        self.assertIs(pool.shared_engine('sqlite:///shared-a.db'), a)
+        self.assertIsNot(pool.shared_engine('sqlite:///shared-b.db'), a)
+
+    def test_metrics_count_checkouts_and_waits(self):
+        engine = pool.create_pooled_engine('sqlite://')
+        for _ in range(3):
+            pool.connect(engine).close()
+        snap = pool.metrics_for(engine).snapshot(engine)
+        self.assertEqual(snap['checkouts'], 3)
+        self.assertEqual(snap['checkins'], 3)
+        self.assertGreaterEqual(snap['wait_max_ms'], 0.0)
+
+    def test_async_engine_shares_settings_and_metrics(self):
+        engine = pool.create_pooled_async_engine('postgresql+psycopg://u:p@db:5432/x', size=3)
+        self.assertEqual(engine.sync_engine.pool.size(), 3)
+        self.assertTrue(engine.sync_engine.dialect.is_async)
+        self.assertEqual(pool.metrics_for(engine.sync_engine).snapshot()['checkouts'], 0)
+
+
+class TestRequestConnection(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # file-backed so the engine uses a real QueuePool
+        self.engine = pool.create_pooled_engine(f"sqlite:///{os.path.join(tmp.name, 'pool.db')}")
+        self.addCleanup(self.engine.dispose)
+        self.app.config['PG_ENGINE'] = self.engine
+        # let SQLAlchemy emit BEGIN itself so SAVEPOINTs nest like on Postgres
+        event.listen(self.engine, 'connect', lambda dbapi_conn, _: setattr(dbapi_conn, 'isolation_level', None))
+        event.listen(self.engine, 'begin', lambda conn: conn.exec_driver_sql('BEGIN'))
+        init_request_tx(self.app)
+        with self.engine.begin() as conn:
+            conn.execute(text('CREATE TABLE t (v INTEGER)'))
+
+        @self.app.post('/write/<int:v>/<int:status>')
+        def write(v, status):
+            with get_conn() as conn:
+                with begin_tx(conn):
+                    conn.execute(text('INSERT INTO t VALUES (:v)'), {'v': v})
+            with get_conn() as conn:
+                seen = conn.execute(text('SELECT COUNT(*) FROM t WHERE v = :v'), {'v': v}).scalar()
+            return {'seen': seen}, status
+
+    def _count(self, v):
+        with self.engine.connect() as conn:
+            return conn.execute(text('SELECT COUNT(*) FROM t WHERE v = :v'), {'v': v}).scalar()
+
+    def _checkouts(self):
+        return pool.metrics_for(self.engine).checkouts
+
+    def test_blocks_in_one_request_share_a_connection(self):
+        with self.app.test_request_context('/'):
+            with get_conn() as a:
+                a.execute(text('SELECT 1'))
+            with get_conn() as b:
+                b.execute(text('SELECT 1'))
+            self.assertIs(a, b)
+            self.assertEqual(self._checkouts(), 2)
+        self.assertEqual(pool.metrics_for(self.engine).checkins, 2)
+
+    def test_nested_block_gets_its_own_connection(self):
+        with self.app.test_request_context('/'):
+            with get_conn() as outer:
+                with get_conn() as inner:
+                    self.assertIsNot(outer, inner)
+            self.assertEqual(self._checkouts(), 3)
+
+    def test_one_transaction_spans_blocks_and_commits_on_success(self):
+        response = self.app.test_client().post('/write/1/200')
+
+        self.assertEqual(response.get_json(), {'seen': 1})
+        self.assertEqual(self._checkouts(), 2)  # setUp's DDL + the request
+        self.assertEqual(self._count(1), 1)
+
+    def test_error_response_rolls_back(self):
+        response = self.app.test_client().post('/write/2/409')
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.get_json(), {'seen': 1})
+        self.assertEqual(self._count(2), 0)
+
+    def test_begin_tx_is_savepoint_inside_request(self):
+        with self.app.test_request_context('/'):
+            with get_conn() as conn:
+                self.assertTrue(conn.in_transaction())
+                tx = begin_tx(conn)
+                self.assertTrue(conn.in_nested_transaction())
+                tx.rollback()
+
+    def test_plain_call_behaves_like_a_connection(self):
+        with self.app.test_request_context('/'):
+            conn = get_conn()
+            self.assertEqual(conn.execute(text('SELECT 1')).scalar(), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+# tests/test_report.py
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import report
+from app.services.graph import GraphParams
+from app.tests_services.test_scoring import make_catalogue
+
+
+class TestLoadReport(unittest.TestCase):
+    """make_catalogue: 1 -> 3 (x0.5), 1 -> 2 (x1.1)"""
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.conn.execute.return_value.mappings.return_value.one.return_value = {
+            "reference_version": 6,
+            "implemented": [{"intervention_id": 1, "name": "Low carbon concrete", "score": 0.8}],
+            "nodes": [{"id": 2, "score": 0.9}, {"id": 3, "score": None}],
+        }
+        p = patch('app.services.report.catalogue_service.current', return_value=make_catalogue())
+        self.current = p.start()
+        self.addCleanup(p.stop)
+
+    def test_one_read_for_list_and_graph(self):
+        implemented, nodes, edges = report.load_report(self.conn, 5, GraphParams(top_n=4))
+
+        self.conn.execute.assert_called_once()
+        sql, bind = self.conn.execute.call_args.args
+        self.assertIs(sql, report.REPORT_SQL)
+        self.assertEqual(bind, {"project_id": 5, "top_n": 4, "pinned": None})
+        # the snapshot is taken at the version read above: no separate probe
+        self.current.assert_called_once_with(self.conn, 6)
+
+        self.assertEqual(implemented, [{"intervention_id": 1, "name": "Low carbon concrete", "score": 0.8}])
+        self.assertEqual([(n["id"], n["label"], n["score"]) for n in nodes],
+                         [(2, "Solar PV", 0.9), (3, "Remove basement", None)])
+        self.assertEqual(edges, [])  # both edges start at 1, which is not drawn
+
+    def test_statement_reads_implemented_graph_and_version(self):
+        sql = report.REPORT_SQL.text
+        self.assertIn('FROM reference_version', sql)
+        self.assertIn('FROM implemented_interventions', sql)
+        self.assertIn('LIMIT :top_n', sql)
+
+
+if __name__ == '__main__':
+    unittest.main()
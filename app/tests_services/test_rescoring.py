@@ -0,0 +1,171 @@
+# tests/test_rescoring.py
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import rescoring
+from app.services.scoring import ProjectState
+from app.tests_services.test_scoring import make_catalogue
+
+
+class _FakeEngine:
+    """engine.connect()/engine.begin() both hand out the same mock connection."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.begins = 0
+        self.url = MagicMock()
+
+    def connect(self):
+        cm = MagicMock()
+        cm.__enter__.return_value = self.conn
+        return cm
+
+    def begin(self):
+        self.begins += 1
+        return self.connect()
+
+
+class TestRescoreProjects(unittest.TestCase):
+
+    def setUp(self):
+        self.snap = make_catalogue()
+        self.conn = MagicMock()
+        self.engine = _FakeEngine(self.conn)
+        p = patch('app.services.rescoring.catalogue_service.current', return_value=self.snap)
+        p.start()
+        self.addCleanup(p.stop)
+
+    def _run(self, chunks, **kwargs):
+        self.conn.execute.return_value.scalar.return_value = sum(len(c) for c in chunks)
+        self.conn.execute.return_value.scalars.return_value.all.side_effect = chunks + [[]]
+        with patch('app.services.rescoring.PostgresStorage') as storage_cls:
+            storage = storage_cls.return_value
+            storage.load_states.side_effect = lambda ids: [
+                ProjectState(p, {'levels': 7.0}, frozenset(), {10: 1.0}) for p in ids
+            ]
+            storage.save_scores.side_effect = lambda results: 4 * len(list(results))
+            progress = rescoring.rescore_projects(self.engine, **kwargs)
+        return progress, storage
+
+    def test_rescore_project_scores_one_project_with_its_dependencies(self):
+        with patch('app.services.rescoring.PostgresStorage') as storage_cls:
+            storage = storage_cls.return_value
+            storage.load_catalogue.return_value = self.snap
+            storage.load_states.return_value = [ProjectState(4, {'levels': 7.0}, frozenset({1}), {10: 1.0})]
+            storage.save_scores.side_effect = lambda results: list(results)
+
+            [res] = rescoring.rescore_project(self.conn, 4, self.snap)
+
+        storage_cls.assert_called_once_with(self.conn, self.snap)
+        storage.load_states.assert_called_once_with([4])
+        self.assertAlmostEqual(res.adjusted[3], 1.0 * 0.5)  # implemented 1 halves 3
+
+    def test_streams_chunks_one_transaction_each(self):
+        seen = []
+        progress, storage = self._run([[1, 2], [5]], chunk_size=2,
+                                      on_progress=lambda p: seen.append(p.last_project_id))
+
+        self.assertEqual(progress.total, 3)
+        self.assertEqual(progress.processed, 3)
+        self.assertEqual(progress.rows_written, 12)
+        self.assertEqual(progress.chunks, 2)
+        self.assertEqual(progress.last_project_id, 5)
+        self.assertTrue(progress.done)
+        self.assertEqual(seen, [2, 5])
+        self.assertEqual(self.engine.begins, 3)  # two chunks + the empty terminating page
+        self.assertEqual([c.args[0] for c in storage.load_states.call_args_list], [[1, 2], [5]])
+
+    def test_keyset_resumes_from_after_id(self):
+        progress, _ = self._run([[8, 9]], after_id=7, project_ids=[9, 8, 1])
+
+        page_params = [c.args[1] for c in self.conn.execute.call_args_list if 'ORDER BY id' in str(c.args[0])]
+        self.assertEqual(page_params[0]['after'], 7)
+        self.assertEqual(page_params[0]['ids'], [1, 8, 9])
+        self.assertEqual(page_params[1]['after'], 9)
+        self.assertEqual(progress.last_project_id, 9)
+
+    def test_scores_are_written_for_each_chunk(self):
+        _, storage = self._run([[3]])
+        results = storage.save_scores.call_args.args[0]
+        self.assertAlmostEqual(results[0].adjusted[1], 0.75)
+        self.assertEqual(results[0].recommendations, [])
+
+    def test_rejects_bad_chunk_size(self):
+        with self.assertRaises(ValueError):
+            rescoring.rescore_projects(self.engine, chunk_size=0)
+
+
+class _ThreadPool(ThreadPoolExecutor):
+    """Stands in for ProcessPoolExecutor: same initializer contract, no processes."""
+
+    contexts = []
+
+    def __init__(self, max_workers, mp_context=None, initializer=None, initargs=()):
+        _ThreadPool.contexts.append(mp_context)
+        super().__init__(max_workers=max_workers, initializer=initializer, initargs=initargs)
+
+
+class TestParallelRescore(unittest.TestCase):
+
+    def setUp(self):
+        self.snap = make_catalogue()
+        self.conn = MagicMock()
+        self.engine = _FakeEngine(self.conn)
+        for target, kwargs in [
+            ('app.services.rescoring.catalogue_service.current', {'return_value': self.snap}),
+            ('app.services.rescoring.ProcessPoolExecutor', {'new': _ThreadPool}),
+            ('app.services.rescoring.create_pooled_engine', {'return_value': self.engine}),
+        ]:
+            p = patch(target, **kwargs)
+            p.start()
+            self.addCleanup(p.stop)
+
+    def test_chunks_are_sharded_and_checkpoint_is_contiguous(self):
+        chunks = [[1, 2], [3, 4], [5, 6], [7]]
+        self.conn.execute.return_value.scalar.return_value = 7
+        self.conn.execute.return_value.scalars.return_value.all.side_effect = chunks + [[]]
+        seen = []
+        with patch('app.services.rescoring.PostgresStorage') as storage_cls:
+            storage = storage_cls.return_value
+            storage.load_states.side_effect = lambda ids: [ProjectState(p, {}, frozenset(), {}) for p in ids]
+            storage.save_scores.side_effect = lambda results: 4 * len(list(results))
+            progress = rescoring.rescore_projects(self.engine, chunk_size=2, workers=3,
+                                                  on_progress=lambda p: seen.append(p.last_project_id))
+
+        self.assertEqual(progress.processed, 7)
+        self.assertEqual(progress.rows_written, 28)
+        self.assertEqual(progress.chunks, 4)
+        self.assertEqual(seen, [2, 4, 6, 7])  # accounted in id order even if workers finish out of order
+        self.assertEqual(sorted(c.args[0][0] for c in storage.load_states.call_args_list), [1, 3, 5, 7])
+
+    def test_workers_are_never_forked(self):
+        # the caller may be a threaded web worker or the job worker with its heartbeat thread
+        self.conn.execute.return_value.scalar.return_value = 1
+        self.conn.execute.return_value.scalars.return_value.all.side_effect = [[1], []]
+        _ThreadPool.contexts.clear()
+        with patch('app.services.rescoring.PostgresStorage'):
+            rescoring.rescore_projects(self.engine, workers=2)
+
+        [ctx] = _ThreadPool.contexts
+        self.assertIn(ctx.get_start_method(), ('forkserver', 'spawn'))
+
+    def test_worker_error_propagates(self):
+        self.conn.execute.return_value.scalar.return_value = 1
+        self.conn.execute.return_value.scalars.return_value.all.side_effect = [[1], []]
+        with patch('app.services.rescoring.PostgresStorage') as storage_cls:
+            storage_cls.return_value.load_states.side_effect = RuntimeError('boom')
+            with self.assertRaises(RuntimeError):
+                rescoring.rescore_projects(self.engine, workers=2)
+
+    def test_rejects_bad_worker_count(self):
+        with self.assertRaises(ValueError):
+            rescoring.rescore_projects(self.engine, workers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
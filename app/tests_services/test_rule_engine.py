@@ -0,0 +1,68 @@
+# tests/test_rule_engine.py
+import unittest
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.rule_engine import MetricRuleEngine
+from app.services.rules_metric import metric_recompute
+from app.services.types import MetricRule
+
+
+def _rule(rid, metric, iid, lower, upper, mult):
+    return MetricRule(id=rid, metric_name=metric, intervention_id=iid,
+                      lower=lower, upper=upper, multiplier=mult, reason="")
+
+
+class TestMetricRuleEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.base = {101: 0.5, 102: 0.8, 103: 1.0}
+        self.rules = [
+            _rule(1, 'levels', 101, 5.0, 10.0, 1.5),
+            _rule(2, 'external_wall_area', 101, None, 1000.0, 0.8),
+            _rule(3, 'footprint_area', 102, 200.0, None, 2.0),
+            _rule(4, 'levels', 102, None, None, 1.1),
+        ]
+
+    def test_evaluate_matches_rule_bounds(self):
+        engine = MetricRuleEngine(self.base, self.rules)
+        result = engine.evaluate({'levels': 7.0, 'external_wall_area': 1200.0, 'footprint_area': 250.0})
+        self.assertAlmostEqual(result[101], 0.75)
+        self.assertAlmostEqual(result[102], 0.8 * 2.0 * 1.1)
+        self.assertAlmostEqual(result[103], 1.0)
+
+    def test_bounds_are_inclusive(self):
+        engine = MetricRuleEngine(self.base, self.rules)
+        self.assertAlmostEqual(engine.evaluate({'levels': 5.0})[101], 0.75)
+        self.assertAlmostEqual(engine.evaluate({'levels': 10.0})[101], 0.75)
+        self.assertAlmostEqual(engine.evaluate({'levels': 10.5})[101], 0.5)
+
+    def test_missing_metric_leaves_base(self):
+        engine = MetricRuleEngine(self.base, self.rules)
+        self.assertEqual(engine.evaluate({}), self.base)
+
+    def test_rules_for_unknown_interventions_are_ignored(self):
+        engine = MetricRuleEngine({101: 1.0}, [_rule(1, 'levels', 999, None, None, 3.0)])
+        self.assertEqual(engine.evaluate({'levels': 1.0}), {101: 1.0})
+        self.assertEqual(engine.metric_names, [])
+
+    def test_metric_recompute_with_engine_skips_reference_queries(self):
+        engine = MetricRuleEngine(self.base, self.rules)
+        conn = MagicMock()
+        conn.execute.return_value.mappings.return_value.one_or_none.return_value = {
+            'external_wall_area': 800.0, 'footprint_area': None, 'levels': 7.0,
+        }
+        result = metric_recompute(conn, 123, engine=engine)
+
+        # only the project row is read
+        conn.execute.assert_called_once()
+        self.assertIn('FROM projects', str(conn.execute.call_args[0][0]))
+        self.assertAlmostEqual(result[101], 0.5 * 1.5 * 0.8)
+        self.assertAlmostEqual(result[102], 0.8 * 1.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
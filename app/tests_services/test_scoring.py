@@ -0,0 +1,251 @@
+# tests/test_scoring.py
+import unittest
+from dataclasses import replace
+from types import MappingProxyType
+from unittest.mock import MagicMock
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.catalogue import Catalogue, InterventionInfo, ThemeInfo
+from app.services.rule_engine import MetricRuleEngine
+from app.services.rules_intervention import batch_intervention_recompute, intervention_recompute
+from app.services.scoring import ProjectState, ScoringKernel, kernel_for
+from app.services.storage import InMemoryStorage, PostgresStorage
+from app.services.types import InterventionRule, MetricRule, ScoreBreakdown
+
+
+def make_catalogue():
+    """4 interventions over 2 themes; 4 is a stage needing 1 and excluded by 3"""
+    interventions = {
+        1: InterventionInfo(1, 'Low carbon concrete', 10, 0.5, 1.0, False),
+        2: InterventionInfo(2, 'Solar PV', 20, 0.8, 2.0, False),
+        3: InterventionInfo(3, 'Remove basement', 10, 1.0, 1.0, False),
+        4: InterventionInfo(4, 'Timber frame', 10, 0.6, 3.0, True),
+    }
+    metric_rules = (
+        MetricRule(1, 'levels', 1, 5.0, 10.0, 1.5, 'mid-rise'),
+        MetricRule(2, 'footprint_area', 2, 200.0, None, 2.0, 'large roof'),
+    )
+    intervention_rules = (
+        InterventionRule(1, 1, 3, 'ratio', None, None, 0.5, 'concrete vs basement'),
+        InterventionRule(2, 1, 2, 'ratio', None, None, 1.1, 'synergy'),
+    )
+    return Catalogue(
+        version=1,
+        interventions=MappingProxyType(interventions),
+        themes=MappingProxyType({10: ThemeInfo(10, 'Embodied', None), 20: ThemeInfo(20, 'Energy', None)}),
+        prereqs=MappingProxyType({4: (1,)}),
+        mutexes=MappingProxyType({4: (3,)}),
+        metric_rules=metric_rules,
+        intervention_rules=intervention_rules,
+        rules_by_cause=MappingProxyType({1: intervention_rules}),
+        step_size=1.0,
+        metric_engine=MetricRuleEngine({i.id: i.base_effectiveness for i in interventions.values()}, metric_rules),
+    )
+
+
+class TestScoringKernel(unittest.TestCase):
+
+    def setUp(self):
+        self.kernel = ScoringKernel(make_catalogue())
+
+    def test_metric_dependency_and_theme_weights(self):
+        state = ProjectState(
+            project_id=7,
+            metrics={'levels': 7.0, 'footprint_area': 250.0},
+            implemented=frozenset({1}),
+            theme_weights={10: 0.25, 20: 0.75},
+        )
+        res = self.kernel.score(state)
+
+        self.assertAlmostEqual(res.adjusted[1], 0.5 * 1.5)
+        self.assertAlmostEqual(res.adjusted[2], 0.8 * 2.0 * 1.1)
+        self.assertAlmostEqual(res.adjusted[3], 1.0 * 0.5)
+        self.assertAlmostEqual(res.weighted[2], 0.8 * 2.0 * 1.1 * 0.75)
+        self.assertAlmostEqual(res.weighted[3], 0.5 * 0.25)
+
+    def test_eligibility_follows_stage_rules(self):
+        weights = {10: 0.5, 20: 0.5}
+        # nothing implemented: 4 lacks its prereq
+        res = self.kernel.score(ProjectState(1, {}, frozenset(), weights), limit=None)
+        self.assertEqual(sorted(res.eligible), [1, 2, 3])
+
+        # prereq implemented: 4 becomes eligible
+        res = self.kernel.score(ProjectState(1, {}, frozenset({1}), weights), limit=None)
+        self.assertEqual(sorted(res.eligible), [2, 3, 4])
+
+        # mutex partner implemented: 4 blocked again
+        res = self.kernel.score(ProjectState(1, {}, frozenset({1, 3}), weights), limit=None)
+        self.assertEqual(sorted(res.eligible), [2])
+
+    def test_recommendations_ranked_and_limited(self):
+        res = self.kernel.score(ProjectState(1, {}, frozenset(), {10: 1.0, 20: 1.0}), limit=2)
+        self.assertEqual([r['intervention_id'] for r in res.recommendations], [3, 2])
+        self.assertEqual(res.recommendations[0]['name'], 'Remove basement')
+        self.assertEqual(res.eligible, [3, 2, 1])
+
+    def test_ties_broken_by_intervention_id_desc(self):
+        res = self.kernel.score(ProjectState(1, {}, frozenset(), {}), limit=None)
+        self.assertEqual(res.eligible, [3, 2, 1])
+
+    def test_explain_populates_breakdown(self):
+        state = ProjectState(1, {'levels': 6.0}, frozenset({1}), {10: 0.4})
+        res = self.kernel.score(state, explain=True)
+
+        b = res.breakdown[3]
+        self.assertIsInstance(b, ScoreBreakdown)
+        self.assertEqual(b.base, 1.0)
+        self.assertEqual(b.metric_factor, 1.0)
+        self.assertAlmostEqual(b.dependency_factor, 0.5)
+        self.assertAlmostEqual(b.final, 0.5 * 0.4)
+        self.assertEqual(b.reasons, ['concrete vs basement'])
+        self.assertEqual(res.breakdown[1].reasons, ['mid-rise'])
+        self.assertEqual(self.kernel.score(state).breakdown, {})
+
+    def test_score_many_matches_score(self):
+        states = [
+            ProjectState(1, {'levels': 7.0, 'footprint_area': 250.0}, frozenset({1}), {10: 0.25, 20: 0.75}),
+            ProjectState(2, {'levels': 12.0}, frozenset(), {10: 1.0}),
+            ProjectState(3, {}, frozenset({1, 3}), {20: 0.5}),
+            ProjectState(4, {'footprint_area': 100.0}, frozenset({1}), {10: 0.5, 20: 0.5}),
+            ProjectState(5, {}, frozenset(), {}),
+        ]
+        batch = self.kernel.score_many(states, limit=None)
+        for state, got in zip(states, batch):
+            want = self.kernel.score(state, limit=None)
+            self.assertEqual(got.project_id, want.project_id)
+            for iid in want.adjusted:
+                self.assertAlmostEqual(got.adjusted[iid], want.adjusted[iid])
+                self.assertAlmostEqual(got.weighted[iid], want.weighted[iid])
+            self.assertEqual(got.eligible, want.eligible)
+            self.assertEqual([r['intervention_id'] for r in got.recommendations],
+                             [r['intervention_id'] for r in want.recommendations])
+
+    def test_score_many_handles_non_positive_multipliers(self):
+        snap = make_catalogue()
+        rules = snap.metric_rules + (MetricRule(3, 'levels', 2, 0.0, 3.0, 0.0, 'zeroed'),)
+        kernel = ScoringKernel(replace(snap, metric_rules=rules, metric_engine=MetricRuleEngine(
+            {i.id: i.base_effectiveness for i in snap.interventions.values()}, rules)))
+
+        res = kernel.score_many([ProjectState(1, {'levels': 2.0}, frozenset(), {20: 1.0})])[0]
+
+        self.assertEqual(res.adjusted[2], 0.0)
+        self.assertEqual(kernel.score_many([]), [])
+
+    def test_in_memory_storage_round_trip(self):
+        states = [ProjectState(p, {'levels': float(p)}, frozenset(), {10: 1.0}) for p in range(1, 12)]
+        storage = InMemoryStorage(make_catalogue(), states)
+        kernel = ScoringKernel(storage.load_catalogue())
+
+        written = storage.save_scores(kernel.score_many(storage.load_states([5, 6, 99])))
+
+        self.assertEqual(written, 8)
+        self.assertEqual(set(storage.scores), {5, 6})
+        self.assertAlmostEqual(storage.scores[6].adjusted[1], 0.75)
+        self.assertAlmostEqual(storage.scores[5].adjusted[1], 0.75)
+
+
+class _ScoresConn:
+    """runtime_scores.adjusted_base_effectiveness of one project, behind the two statements the incremental path runs."""
+
+    def __init__(self, scores, base):
+        self.scores = dict(scores)
+        self.base = base
+
+    def execute(self, stmt, params):
+        res = MagicMock()
+        if str(stmt).lstrip().startswith("SELECT"):
+            res.mappings.return_value.all.return_value = [
+                {"intervention_id": i, "current_score": self.scores.get(i, self.base[i])} for i in params["ids"]
+            ]
+        elif isinstance(params, list):
+            self.scores.update({p["intervention_id"]: p["score"] for p in params})
+        else:
+            self.scores.update(zip(params["ids"], params["scores"]))
+        return res
+
+
+class TestLivePathParity(unittest.TestCase):
+    """
+    The intended semantics are the kernel's (and score_projects_v1's):
+    adjusted = base * metric_factor * product of the rules of every
+    implemented cause. The live routes must land on the same numbers: the
+    metrics path scores with the kernel, and /apply, /apply-batch fold a
+    newly implemented cause's rules into the stored scores.
+    """
+
+    def setUp(self):
+        self.snap = make_catalogue()
+        self.kernel = ScoringKernel(self.snap)
+        self.metrics = {'levels': 7.0, 'footprint_area': 250.0}
+        self.base = {i.id: i.base_effectiveness for i in self.snap.interventions.values()}
+
+    def _assert_scores(self, got, implemented):
+        want = self.kernel.score(ProjectState(7, self.metrics, frozenset(implemented))).adjusted
+        self.assertEqual(set(got), set(want))
+        for iid in want:
+            self.assertAlmostEqual(got[iid], want[iid])
+
+    def test_metrics_then_apply_matches_kernel(self):
+        conn = _ScoresConn(self.kernel.score(ProjectState(7, self.metrics)).adjusted, self.base)
+        intervention_recompute(conn, 7, 1, self.snap)
+        self._assert_scores(conn.scores, {1})
+
+    def test_metrics_then_apply_batch_matches_kernel(self):
+        conn = _ScoresConn(self.kernel.score(ProjectState(7, self.metrics)).adjusted, self.base)
+        batch_intervention_recompute(conn, 7, [1, 3], self.snap)
+        self._assert_scores(conn.scores, {1, 3})
+
+    def test_metrics_after_apply_keep_dependencies(self):
+        # what rescoring.rescore_project writes when metrics change on a project with 1 implemented
+        adjusted = kernel_for(self.snap).score_many([ProjectState(7, self.metrics, frozenset({1}))], limit=0)[0].adjusted
+        self._assert_scores(adjusted, {1})
+        self.assertAlmostEqual(adjusted[3], 1.0 * 0.5)
+
+    def test_kernel_is_compiled_once_per_snapshot(self):
+        self.assertIs(kernel_for(self.snap), kernel_for(self.snap))
+        self.assertIsNot(kernel_for(make_catalogue()), kernel_for(self.snap))
+
+
+class TestPostgresStorage(unittest.TestCase):
+
+    def test_load_states_is_three_queries(self):
+        conn = MagicMock()
+        conn.execute.return_value.mappings.return_value.all.side_effect = [
+            [{'id': 1, 'footprint_area': 300.0, 'levels': None}, {'id': 2, 'footprint_area': None, 'levels': 4}],
+            [{'project_id': 1, 'impl_id': 3}],
+            [{'project_id': 2, 'theme_id': 10, 'weight_norm': 1.0}],
+        ]
+        storage = PostgresStorage(conn, make_catalogue())
+
+        states = storage.load_states([1, 2])
+
+        self.assertEqual(conn.execute.call_count, 3)
+        self.assertEqual(states[0].metrics, {'footprint_area': 300.0})
+        self.assertEqual(states[0].implemented, frozenset({3}))
+        self.assertEqual(states[1].metrics, {'levels': 4.0})
+        self.assertEqual(states[1].theme_weights, {10: 1.0})
+
+    def test_save_scores_single_upsert(self):
+        conn = MagicMock()
+        storage = PostgresStorage(conn, make_catalogue())
+        kernel = ScoringKernel(make_catalogue())
+        results = kernel.score_many([ProjectState(1, {}, frozenset(), {}), ProjectState(2, {}, frozenset(), {})])
+
+        self.assertEqual(storage.save_scores(results), 8)
+        conn.execute.assert_called_once()
+        params = conn.execute.call_args[0][1]
+        self.assertEqual(params['pids'], [1, 1, 1, 1, 2, 2, 2, 2])
+
+    def test_empty_inputs(self):
+        conn = MagicMock()
+        storage = PostgresStorage(conn, make_catalogue())
+        self.assertEqual(storage.load_states([]), [])
+        self.assertEqual(storage.save_scores([]), 0)
+        conn.execute.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
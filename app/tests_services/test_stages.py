@@ -0,0 +1,97 @@
+# tests/test_stages.py
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import stages
+
+
+class TestRecommendationsPage(unittest.TestCase):
+
+    def setUp(self):
+        self.conn = MagicMock()
+        self.rows = [{'intervention_id': 9, 'theme_weighted_effectiveness': 0.9, 'rank': 1, 'score_key': '0.9'},
+                     {'intervention_id': 4, 'theme_weighted_effectiveness': 0.5, 'rank': 2,
+                      'score_key': '0.50000000000000000001'}]
+        self.conn.execute.return_value.mappings.return_value.all.return_value = self.rows
+
+    def _sql_and_params(self):
+        args = self.conn.execute.call_args[0]
+        return str(args[0]), args[1]
+
+    def test_cursor_round_trip(self):
+        cursor = stages.encode_cursor({'intervention_id': 42, 'score_key': '0.12345678901234567890123'})
+        self.assertEqual(stages.decode_cursor(cursor), ('0.12345678901234567890123', 42))  # numeric, not float
+        for bad in ('not-a-cursor',
+                    'eyJhZnRlciI6IDQyfQ',                           # id only
+                    'eyJyYW5rIjogNywgImFmdGVyIjogNDJ9',             # rank and id
+                    'eyJzY29yZSI6ICJOYU4iLCAiYWZ0ZXIiOiA0Mn0'):     # score NaN
+            with self.assertRaises(ValueError, msg=bad):
+                stages.decode_cursor(bad)
+
+    def test_first_page_returns_next_cursor_when_full(self):
+        rows, cursor = stages.recommendations_page(self.conn, 3, limit=2)
+
+        sql, params = self._sql_and_params()
+        self.assertEqual([r['intervention_id'] for r in rows], [9, 4])
+        self.assertNotIn('score_key', rows[0])
+        self.assertEqual(stages.decode_cursor(cursor), ('0.50000000000000000001', 4))
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual(params, {'pid': 3, 'lim': 2})
+
+    def test_last_page_has_no_cursor(self):
+        _, cursor = stages.recommendations_page(self.conn, 3, limit=5)
+        self.assertIsNone(cursor)
+
+    def test_cursor_page_is_keyset_on_score_and_id(self):
+        _, cursor = stages.recommendations_page(self.conn, 3, limit=2)
+        stages.recommendations_page(self.conn, 3, limit=2, cursor=cursor)
+
+        sql, params = self._sql_and_params()
+        self.assertIn('(r.theme_weighted_effectiveness, r.intervention_id) < (CAST(:score AS numeric), :after)', sql)
+        self.assertIn('ORDER BY r.theme_weighted_effectiveness DESC, r.intervention_id DESC', sql)
+        self.assertNotIn('r.rank >', sql)  # ranks renumber when rows are implemented between reads
+        self.assertEqual(params, {'pid': 3, 'lim': 2, 'score': '0.50000000000000000001', 'after': 4})
+
+    def test_cursor_page_does_not_look_up_the_boundary_row(self):
+        # the boundary row may since have been implemented or deleted
+        stages.recommendations_page(self.conn, 3, limit=2, cursor=stages.encode_cursor(self.rows[1]))
+
+        sql, _ = self._sql_and_params()
+        self.assertEqual(sql.count('FROM runtime_scores'), 1)
+
+    def test_first_page_is_cached_and_mints_the_cursor(self):
+        with patch('app.services.stages.topk.cache') as cache:
+            cache.get.return_value = self.rows
+            rows, cursor = stages.first_page(self.conn, 3, limit=2)
+
+        cache.get.assert_called_once_with(self.conn, 3, 2, stages.ranked_recommendations)
+        self.assertEqual(rows, [{k: v for k, v in r.items() if k != 'score_key'} for r in self.rows])
+        self.assertEqual(stages.decode_cursor(cursor), ('0.50000000000000000001', 4))
+
+    def test_from_rank_jumps_by_rank(self):
+        stages.recommendations_page(self.conn, 3, limit=10, from_rank=20)
+
+        sql, params = self._sql_and_params()
+        self.assertIn('r.rank > :from_rank', sql)
+        self.assertIn('ORDER BY r.rank', sql)
+        self.assertEqual(params['from_rank'], 20)
+
+    def test_limit_is_capped(self):
+        stages.recommendations_page(self.conn, 3, limit=10_000)
+        self.assertEqual(self._sql_and_params()[1]['lim'], stages.MAX_PAGE_SIZE)
+
+    def test_refresh_ranks(self):
+        stages.refresh_ranks(self.conn, [])
+        self.conn.execute.assert_not_called()
+        stages.refresh_ranks(self.conn, [5, 6])
+        sql, params = self._sql_and_params()
+        self.assertIn('ROW_NUMBER()', sql)
+        self.assertEqual(params, {'ids': [5, 6]})
+
+
+if __name__ == '__main__':
+    unittest.main()
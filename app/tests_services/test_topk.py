@@ -0,0 +1,124 @@
+# tests/test_topk.py
+import unittest
+from unittest.mock import MagicMock, patch
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services import stages, topk
+
+
+def _rows(n):
+    return [{'intervention_id': 100 - i, 'name': f'I{i}', 'theme_weighted_effectiveness': 1.0 - i / 10}
+            for i in range(n)]
+
+
+class TestTopKCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = topk.TopKCache(max_projects=2, k=5)
+        self.conn = MagicMock()
+        self.version = 1
+        self.reference_version = 1
+        self.wrote = False
+        p = patch('app.services.topk.fetch_stamp', side_effect=lambda conn, pid: None if self.version is None
+                  else ((self.version, self.reference_version), self.wrote))
+        p.start()
+        self.addCleanup(p.stop)
+        self.loader = MagicMock(side_effect=lambda conn, pid, lim: _rows(8)[:lim])
+
+    def test_hit_while_version_unchanged(self):
+        first = self.cache.get(self.conn, 1, 3, self.loader)
+        second = self.cache.get(self.conn, 1, 2, self.loader)
+
+        self.assertEqual(self.loader.call_count, 1)
+        self.loader.assert_called_once_with(self.conn, 1, 5)
+        self.assertEqual(first, _rows(3))
+        self.assertEqual(second, _rows(2))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_version_bump_reloads(self):
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.version = 2
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_reference_version_bump_reloads(self):
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.reference_version = 2
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_reads_after_own_writes_are_not_stored(self):
+        # apply-batch reads inside its uncommitted transaction; it may roll back
+        self.version, self.wrote = 2, True
+        self.assertEqual(self.cache.get(self.conn, 1, 3, self.loader), _rows(3))
+        self.assertEqual(len(self.cache), 0)
+
+        # a different commit reaching version 2 reads its own rows
+        self.wrote = False
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+    def test_lru_evicts_oldest(self):
+        for pid in (1, 2, 1, 3):
+            self.cache.get(self.conn, pid, 3, self.loader)
+        self.assertEqual(list(self.cache._entries), [1, 3])
+
+    def test_limit_beyond_k(self):
+        rows = self.cache.get(self.conn, 1, 7, self.loader)
+        self.assertEqual(len(rows), 7)
+        self.loader.assert_called_once_with(self.conn, 1, 7)
+        self.assertEqual(len(self.cache), 0)
+
+        # a complete short list can answer any limit
+        short = MagicMock(return_value=_rows(2))
+        self.cache.get(self.conn, 2, 3, short)
+        self.assertEqual(self.cache.get(self.conn, 2, 50, short), _rows(2))
+        short.assert_called_once()
+
+    def test_returned_rows_are_copies(self):
+        self.cache.get(self.conn, 1, 3, self.loader)[0]['name'] = 'mutated'
+        self.assertEqual(self.cache.get(self.conn, 1, 3, self.loader)[0]['name'], 'I0')
+
+    def test_unknown_project(self):
+        self.version = None
+        self.assertEqual(self.cache.get(self.conn, 1, 3, self.loader), [])
+        self.loader.assert_not_called()
+
+    def test_invalidate(self):
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.cache.invalidate(1)
+        self.cache.get(self.conn, 1, 3, self.loader)
+        self.assertEqual(self.loader.call_count, 2)
+
+
+class TestFetchStamp(unittest.TestCase):
+
+    def test_stamp_and_write_flag(self):
+        conn = MagicMock()
+        conn.execute.return_value.mappings.return_value.one.return_value = {
+            'score_version': 7, 'reference_version': 3, 'wrote': True}
+        self.assertEqual(topk.fetch_stamp(conn, 1), ((7, 3), True))
+        self.assertIn('pg_current_xact_id_if_assigned', str(conn.execute.call_args[0][0]))
+
+    def test_unknown_project(self):
+        conn = MagicMock()
+        conn.execute.return_value.mappings.return_value.one.return_value = {
+            'score_version': None, 'reference_version': 3, 'wrote': False}
+        self.assertIsNone(topk.fetch_stamp(conn, 1))
+
+
+class TestStagesUsesCache(unittest.TestCase):
+
+    def test_recommendations_delegates_to_cache(self):
+        conn = MagicMock()
+        with patch.object(topk, 'cache') as cache:
+            cache.get.return_value = [{'intervention_id': 2, 'score_key': '0.5'}]
+            self.assertEqual(stages.recommendations(conn, 4, limit=3), [{'intervention_id': 2}])
+            cache.get.assert_called_once_with(conn, 4, 3, stages.ranked_recommendations)
+
+
+if __name__ == '__main__':
+    unittest.main()
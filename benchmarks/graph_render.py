@@ -0,0 +1,73 @@
+"""
+In-process layout vs Graphviz for the intervention graph SVG.
+
+Usage:
+    python -m benchmarks.graph_render [--sizes 30,100,300] [--edges-per-node 1.5] [--seconds 3]
+
+For each top_n this builds a random graph shaped like GRAPH_SQL's output
+(top_n labelled nodes, edges mostly from higher- to lower-ranked
+interventions, ~10% going back, multipliers in 0.5-1.5) and reports renders
+per second through routes/graph.py's _svg_from_nodes_edges with:
+  - python   : services/graph_layout.py, no subprocess
+  - graphviz : the `dot` binary via graphviz.Digraph.pipe() (skipped if not installed)
+"""
+import argparse
+import random
+import shutil
+import time
+
+from app.routes.graph import _svg_from_nodes_edges
+
+
+def _random_graph(n: int, edges_per_node: float, rng: random.Random):
+    nodes = [{"id": i, "label": f"Intervention {i:03d}", "score": 1.0 - i / n} for i in range(n)]
+    edges, seen = [], set()
+    while len(edges) < int(n * edges_per_node) and len(seen) < n * (n - 1):
+        a, b = rng.sample(range(n), 2)
+        if rng.random() > 0.1:
+            a, b = min(a, b), max(a, b)
+        if (a, b) in seen:
+            continue
+        seen.add((a, b))
+        m = rng.uniform(0.5, 1.5)
+        edges.append({"src": a, "dst": b, "weight": m - 1.0, "multiplier": m})
+    return nodes, edges
+
+
+def _rate(backend: str, nodes, edges, seconds: float) -> float:
+    renders, t0 = 0, time.perf_counter()
+    while True:
+        _svg_from_nodes_edges(nodes, edges, "Project 1", backend=backend)
+        renders += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= seconds:
+            return renders / elapsed
+
+
+def run(sizes, edges_per_node, seconds, seed=0):
+    rng = random.Random(seed)
+    has_dot = shutil.which("dot") is not None
+    print(f"{'top_n':>6} {'edges':>6} {'python/s':>9} {'graphviz/s':>11} {'speedup':>8}")
+    for n in sizes:
+        nodes, edges = _random_graph(n, edges_per_node, rng)
+        py = _rate("python", nodes, edges, seconds)
+        if has_dot:
+            gv = _rate("graphviz", nodes, edges, seconds)
+            print(f"{n:>6} {len(edges):>6} {py:>9.1f} {gv:>11.1f} {py / gv:>7.1f}x")
+        else:
+            print(f"{n:>6} {len(edges):>6} {py:>9.1f} {'n/a':>11} {'':>8}")
+    if not has_dot:
+        print("(graphviz column skipped: `dot` is not on PATH)")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="30,100,300")
+    ap.add_argument("--edges-per-node", type=float, default=1.5)
+    ap.add_argument("--seconds", type=float, default=3.0)
+    args = ap.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.edges_per_node, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
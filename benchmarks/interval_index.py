@@ -0,0 +1,79 @@
+"""
+Interval index vs linear scan for metric rule matching.
+
+Usage:
+    python -m benchmarks.interval_index [--sizes 1000,10000,100000,500000] [--queries 2000]
+
+For each rule-count N this builds N random metric_effects-style bounds
+(~4% open-ended, widths up to 5% of the value range) and times matching
+a project value against them with:
+  - in_bounds()   : the per-rule Python loop metric_recompute used to run
+  - numpy mask    : vectorised bounds check over every rule
+  - IntervalIndex : centred interval tree, O(log n + k)
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from app.services.interval_index import IntervalIndex
+from app.services.types import in_bounds
+
+
+def _random_rules(n: int, rng: random.Random):
+    lower, upper = [], []
+    for _ in range(n):
+        lo = rng.uniform(0.0, 1000.0)
+        hi = lo + rng.uniform(0.0, 50.0)
+        r = rng.random()
+        if r < 0.02:
+            lo = None
+        elif r < 0.04:
+            hi = None
+        lower.append(lo)
+        upper.append(hi)
+    return lower, upper
+
+
+def _time(fn, values):
+    t0 = time.perf_counter()
+    hits = 0
+    for v in values:
+        hits += fn(v)
+    return (time.perf_counter() - t0) / len(values), hits
+
+
+def run(sizes, queries, seed=0):
+    rng = random.Random(seed)
+    print(f"{'rules':>9} {'build ms':>9} {'linear us':>11} {'mask us':>9} {'index us':>9} {'avg k':>7} {'speedup':>8}")
+    for n in sizes:
+        lower, upper = _random_rules(n, rng)
+        values = [rng.uniform(0.0, 1000.0) for _ in range(queries)]
+
+        t0 = time.perf_counter()
+        idx = IntervalIndex(lower, upper)
+        build_ms = (time.perf_counter() - t0) * 1e3
+
+        lo_arr, hi_arr = idx.lower, idx.upper
+        # the pure-Python scan is slow; sample fewer queries for large N
+        lin_values = values[: max(10, queries * 1000 // max(n, 1))]
+        pairs = list(zip(lower, upper))
+        t_lin, _ = _time(lambda v: sum(1 for lo, hi in pairs if in_bounds(v, lo, hi)), lin_values)
+        t_mask, _ = _time(lambda v: int(np.count_nonzero((lo_arr <= v) & (hi_arr >= v))), values)
+        t_idx, hits = _time(lambda v: len(idx.stab(v)), values)
+
+        print(f"{n:>9} {build_ms:>9.1f} {t_lin * 1e6:>11.1f} {t_mask * 1e6:>9.1f} "
+              f"{t_idx * 1e6:>9.1f} {hits / len(values):>7.1f} {t_lin / t_idx:>7.0f}x")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1000,10000,100000,500000")
+    ap.add_argument("--queries", type=int, default=2000)
+    args = ap.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.queries)
+
+
+if __name__ == "__main__":
+    main()
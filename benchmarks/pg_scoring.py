@@ -0,0 +1,111 @@
+"""
+Server-side scoring (score_projects_v1) vs the Python scoring path.
+
+Usage:
+    DATABASE_URL=... python -m benchmarks.pg_scoring [--sizes 1,100,10000] [--repeat 3]
+
+For each project count N this times, against the live database:
+  - python : PostgresStorage.load_states -> ScoringKernel.score_many ->
+             save_scores -> eligibility.refresh -> stages.refresh_ranks,
+             in rescoring-sized chunks (what services/rescoring.py runs)
+  - sql    : one SELECT score_projects_v1(ids)
+and reports the largest difference in theme_weighted_effectiveness between
+the two. Everything runs in one transaction that is rolled back, including
+the synthetic projects added when the database has fewer than N.
+"""
+import argparse
+import os
+import time
+
+from sqlalchemy import text
+
+from app.db.pool import create_pooled_engine
+from app.services import catalogue, eligibility, pg_scoring
+from app.services.rescoring import DEFAULT_CHUNK_SIZE
+from app.services.rules_metric import PROJECT_METRIC_COLUMNS
+from app.services.scoring import ScoringKernel
+from app.services.stages import refresh_ranks
+from app.services.storage import PostgresStorage
+
+
+def _ensure_projects(conn, n):
+    have = conn.execute(text("SELECT COUNT(*) FROM projects")).scalar_one()
+    if have < n:
+        cols = sorted(PROJECT_METRIC_COLUMNS)
+        conn.execute(
+            text(f"""
+                INSERT INTO projects (name, status, {", ".join(cols)})
+                SELECT 'bench-' || g, 'draft', {", ".join("(random() * 1000)::int" if c == "levels" else "random() * 1000" for c in cols)}
+                FROM generate_series(1, :n) AS g
+            """),
+            {"n": n - have},
+        )
+    return conn.execute(text("SELECT id FROM projects ORDER BY id LIMIT :n"), {"n": n}).scalars().all()
+
+
+def _python_path(conn, kernel, ids):
+    for a in range(0, len(ids), DEFAULT_CHUNK_SIZE):
+        chunk = ids[a:a + DEFAULT_CHUNK_SIZE]
+        storage = PostgresStorage(conn, kernel.catalogue)
+        storage.save_scores(kernel.score_many(storage.load_states(chunk), limit=0))
+        eligibility.refresh(conn, chunk)
+        refresh_ranks(conn, chunk)
+
+
+def _sql_path(conn, kernel, ids):
+    pg_scoring.score_projects(conn, ids)
+
+
+def _timed(conn, fn, kernel, ids, repeat):
+    """Best of `repeat` runs, each in a savepoint that is rolled back; returns (seconds, scores)."""
+    best, scores = float("inf"), None
+    for _ in range(repeat):
+        sp = conn.begin_nested()
+        t0 = time.perf_counter()
+        fn(conn, kernel, ids)
+        best = min(best, time.perf_counter() - t0)
+        scores = dict(
+            ((r.project_id, r.intervention_id), float(r.tw or 0))
+            for r in conn.execute(
+                text("""
+                    SELECT project_id, intervention_id, theme_weighted_effectiveness AS tw
+                    FROM runtime_scores WHERE project_id = ANY(:ids)
+                """),
+                {"ids": list(ids)},
+            )
+        )
+        sp.rollback()
+    return best, scores
+
+
+def run(sizes, repeat):
+    engine = create_pooled_engine(os.environ["DATABASE_URL"])
+    with engine.connect() as conn:
+        tx = conn.begin()
+        try:
+            for stmt in pg_scoring.install_statements():
+                conn.exec_driver_sql(stmt)
+            ids = _ensure_projects(conn, max(sizes))
+            kernel = ScoringKernel(catalogue.current(conn))
+            print(f"interventions={len(kernel.ids)}")
+            print(f"{'projects':>9} {'python ms':>10} {'sql ms':>9} {'speedup':>8} {'max |diff|':>11}")
+            for n in sizes:
+                t_py, py = _timed(conn, _python_path, kernel, ids[:n], repeat)
+                t_sql, sq = _timed(conn, _sql_path, kernel, ids[:n], repeat)
+                diff = max((abs(py[k] - sq.get(k, 0.0)) for k in py), default=0.0)
+                print(f"{n:>9} {t_py * 1e3:>10.1f} {t_sql * 1e3:>9.1f} {t_py / t_sql:>7.1f}x {diff:>11.2e}")
+        finally:
+            tx.rollback()
+    engine.dispose()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--sizes", default="1,100,10000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import argparse
+import logging
+from dotenv import load_dotenv
+from pathlib import Path
+
+load_dotenv(dotenv_path=Path(__file__).with_name(".env"), override=True)
+
+from app.db.engine import engine  # import AFTER load_dotenv
+from app.services.rescoring import DEFAULT_CHUNK_SIZE, default_workers, rescore_projects
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute runtime_scores after a reference-data ingest.")
+    parser.add_argument("--project-ids", default="", help="comma-separated ids (default: every project)")
+    parser.add_argument("--after-id", type=int, default=0, help="resume after this project id")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="worker processes (default: RESCORE_WORKERS or CPU count)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    ids = [int(p) for p in args.project_ids.split(",") if p.strip()] or None
+
+    try:
+        progress = rescore_projects(engine, project_ids=ids, after_id=args.after_id, chunk_size=args.chunk_size,
+                                    workers=args.workers)
+    except KeyboardInterrupt:
+        print("Interrupted; rerun with --after-id from the last progress line to resume.")
+        raise SystemExit(1)
+    print(f"Done: {progress.processed} projects, {progress.rows_written} rows "
+          f"in {progress.elapsed:.1f}s ({progress.projects_per_minute:.0f}/min).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import argparse
+from dotenv import load_dotenv
+from pathlib import Path
+
+load_dotenv(dotenv_path=Path(__file__).with_name(".env"), override=True)
+
+from app.services.jobs import default_processes, run_workers  # import AFTER load_dotenv
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run background jobs (ingest, rescore, report PDFs) from the jobs table.")
+    parser.add_argument("--processes", type=int, default=default_processes(),
+                        help="worker processes (default: JOB_WORKERS or CPU count)")
+    parser.add_argument("--poll-interval", type=float, default=1.0,
+                        help="seconds to wait when the queue is empty")
+    args = parser.parse_args()
+
+    try:
+        run_workers(args.processes, poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        print("Stopped; jobs that were running are requeued once their heartbeat is JOB_TIMEOUT_SECONDS old.")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()